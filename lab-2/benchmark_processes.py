@@ -0,0 +1,80 @@
+# Benchmark the top-K process collection on a simulated process-heavy host.
+#
+# Starts a few thousand idle child processes (plus a few busy ones), then times
+# the original "sort every process_iter() entry" approach against
+# monitor.ProcessTable over several collection ticks:
+#
+#     python benchmark_processes.py --processes 5000 --ticks 5
+import argparse
+import subprocess
+import sys
+import time
+
+import psutil
+
+from monitor import ProcessTable
+
+BUSY_LOOP = "while True: pass"
+
+
+def sorted_top_processes(k=5):
+    """The original top-process collection: every process read and sorted on each call."""
+    top_processes = []
+    for proc in sorted(psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']),
+                       key=lambda x: x.info['cpu_percent'] if x.info['cpu_percent'] else 0,
+                       reverse=True)[:k]:
+        top_processes.append({
+            'pid': proc.info['pid'],
+            'name': proc.info['name'],
+            'cpu_percent': proc.info['cpu_percent'],
+            'memory_percent': proc.info['memory_percent'] if proc.info['memory_percent'] else 0
+        })
+    return top_processes
+
+
+def start_children(idle, busy):
+    children = [subprocess.Popen(["sleep", "3600"]) for _ in range(idle)]
+    children += [subprocess.Popen([sys.executable, "-c", BUSY_LOOP]) for _ in range(busy)]
+    return children
+
+
+def time_ticks(collect, ticks, pause):
+    timings = []
+    result = None
+    for _ in range(ticks):
+        start = time.perf_counter()
+        result = collect()
+        timings.append(time.perf_counter() - start)
+        time.sleep(pause)
+    return timings, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Top-K process collection: full sort vs ProcessTable")
+    parser.add_argument("--processes", type=int, default=3000, help="idle child processes to start")
+    parser.add_argument("--busy", type=int, default=2, help="CPU-bound child processes to start")
+    parser.add_argument("--ticks", type=int, default=5, help="collections to time per approach")
+    parser.add_argument("--pause", type=float, default=1.0, help="seconds between collections")
+    args = parser.parse_args()
+
+    children = start_children(args.processes, args.busy)
+    busy_pids = {child.pid for child in children[args.processes:]}
+    try:
+        time.sleep(1)
+        print(f"{len(psutil.pids())} processes on the host, {args.busy} busy\n")
+        table = ProcessTable()
+        for name, collect in (("sorted process_iter", sorted_top_processes), ("ProcessTable", table.top)):
+            timings, top = time_ticks(collect, args.ticks, args.pause)
+            found = len(busy_pids & {proc['pid'] for proc in top})
+            print(f"{name:<22} first {timings[0] * 1000:8.1f} ms   later ticks "
+                  f"{min(timings[1:] or timings) * 1000:8.1f} - {max(timings[1:] or timings) * 1000:8.1f} ms   "
+                  f"busy children in top 5: {found}/{args.busy}")
+    finally:
+        for child in children:
+            child.kill()
+        for child in children:
+            child.wait()
+
+
+if __name__ == "__main__":
+    main()
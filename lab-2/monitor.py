@@ -1,5 +1,11 @@
 # Import required libraries
+import argparse
+import asyncio
+import heapq
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from mailjet_rest import Client
 import psutil
 import os
@@ -11,6 +17,12 @@ import socket
 api_key = os.environ.get("MAILJET_API_KEY")
 api_secret = os.environ.get("MAILJET_SECRET_KEY")
 
+# Prometheus exporter settings (python monitor.py --exporter)
+EXPORTER_PORT = 9101  # node-exporter already uses 9100
+EXPORTER_INTERVAL = 15  # Seconds between renders of the /metrics page
+HOST_INFO_TTL = 3600  # Seconds before cached host facts are checked again
+READY_TIMEOUT = 30  # Seconds to wait for every collector's first run before starting
+
 # Define System thresholds
 CPU_THRESHOLD = 2  # Percentage CPU usage to trigger alert
 RAM_THRESHOLD = 8  # Percentage RAM usage to trigger alert
@@ -45,86 +57,283 @@ def send_alert(subject, message):
     except Exception as e:
         print(f"Failed to send email: {str(e)}")
 
-def get_uptime():
+def get_uptime(boot_time=None):
     """Get system uptime in a human-readable format."""
-    boot_time = psutil.boot_time()
+    if boot_time is None:
+        boot_time = psutil.boot_time()
     uptime = datetime.now() - datetime.fromtimestamp(boot_time)
     days = uptime.days
     hours, remainder = divmod(uptime.seconds, 3600)
     minutes, seconds = divmod(remainder, 60)
     return f"{days}d {hours}h {minutes}m {seconds}s"
 
-def get_system_metrics():
-    """Collects various system metrics using psutil."""
-    # Basic system info
+def cpu_total_time(times):
+    """Total CPU time in a psutil.cpu_times() result, including idle time."""
+    total = sum(times)
+    # On Linux guest time is already counted in user/nice
+    total -= getattr(times, "guest", 0) + getattr(times, "guest_nice", 0)
+    return total
+
+def cpu_busy_time(times):
+    """Busy CPU time in a psutil.cpu_times() result (iowait counts as idle)."""
+    return cpu_total_time(times) - times.idle - getattr(times, "iowait", 0)
+
+class CpuSampler:
+    """
+    Non-blocking CPU usage, computed from the change in CPU times between calls.
+
+    psutil.cpu_percent(interval=1) sleeps for a second per call, and the
+    non-blocking form returns a meaningless 0.0 the first time it is used on a
+    process. This sampler keeps the previous CPU times and reports usage since the
+    previous call; on the first call it reports the average since boot. Per-process
+    usage is sampled the same way by ProcessTable.
+    """
+
+    def __init__(self):
+        self.last_cpu_times = None
+
+    def system_percent(self):
+        """System-wide CPU usage (%) since the previous call."""
+        times = psutil.cpu_times()
+        busy = cpu_busy_time(times)
+        total = cpu_total_time(times)
+        if self.last_cpu_times is not None:
+            busy -= cpu_busy_time(self.last_cpu_times)
+            total -= cpu_total_time(self.last_cpu_times)
+        self.last_cpu_times = times
+        if total <= 0:
+            return 0.0
+        return round(min(100.0, max(0.0, busy / total * 100)), 1)
+
+class ProcessEntry:
+    """Cached state of one process, identified by (pid, create_time)."""
+
+    __slots__ = ('process', 'create_time', 'name', 'cpu_seconds', 'sampled_at', 'cpu_percent')
+
+    def __init__(self, process, create_time, name, cpu_seconds, sampled_at, cpu_percent):
+        self.process = process
+        self.create_time = create_time
+        self.name = name
+        self.cpu_seconds = cpu_seconds
+        self.sampled_at = sampled_at
+        self.cpu_percent = cpu_percent
+
+class ProcessTable:
+    """
+    Process table cache for the top-K CPU report.
+
+    Entries are keyed by (pid, create_time), so a pid reused by a new process gets a
+    new entry rather than a CPU delta against the old one's. Each collection builds
+    a psutil.Process per pid (which reads its creation time) and reads only
+    cpu_times(); a process's name is read once, when it is first seen. Processes
+    that exited drop out because the table is rebuilt from psutil.pids(), memory
+    is fetched only for the K processes reported, and the top K are picked with
+    heapq.nlargest instead of sorting every process.
+
+    CPU usage is the change in the process's CPU time since the previous collection,
+    like top: a process keeping one core busy shows 100%. A process seen for the
+    first time reports its average since it started.
+    """
+
+    def __init__(self):
+        # (pid, create_time) -> ProcessEntry
+        self.entries = {}
+
+    def refresh(self):
+        """Update every process's CPU usage since the previous call."""
+        now = time.monotonic()
+        entries = {}
+        for pid in psutil.pids():
+            try:
+                process = psutil.Process(pid)
+                create_time = process.create_time()
+                entry = self.entries.get((pid, create_time))
+                if entry is None:
+                    with process.oneshot():
+                        name = process.name()
+                        times = process.cpu_times()
+                else:
+                    # A single read; oneshot() would only add overhead
+                    times = process.cpu_times()
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+            cpu_seconds = times.user + times.system
+            if entry is None:
+                elapsed = time.time() - create_time
+                cpu_percent = round(cpu_seconds / elapsed * 100, 1) if elapsed > 0 else 0.0
+                entry = ProcessEntry(process, create_time, name, cpu_seconds, now, cpu_percent)
+            else:
+                elapsed = now - entry.sampled_at
+                used = cpu_seconds - entry.cpu_seconds
+                entry.cpu_percent = round(used / elapsed * 100, 1) if elapsed > 0 else 0.0
+                entry.process = process
+                entry.cpu_seconds = cpu_seconds
+                entry.sampled_at = now
+            entries[pid, create_time] = entry
+        self.entries = entries
+
+    def top(self, k=5):
+        """
+        Refresh and return the k processes using the most CPU, as dicts with pid,
+        name, cpu_percent and memory_percent.
+        """
+        self.refresh()
+        total_memory = psutil.virtual_memory().total
+        top_processes = []
+        # A few spares in case some of the leaders have exited since the refresh
+        for entry in heapq.nlargest(k + 5, self.entries.values(), key=lambda x: x.cpu_percent):
+            if len(top_processes) == k:
+                break
+            pid = entry.process.pid
+            try:
+                rss = entry.process.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                self.entries.pop((pid, entry.create_time), None)
+                continue
+            top_processes.append({
+                'pid': pid,
+                'name': entry.name,
+                'cpu_percent': entry.cpu_percent,
+                'memory_percent': rss / total_memory * 100 if total_memory else 0,
+            })
+        return top_processes
+
+def read_host_info():
+    """Reads the host facts cached by HostInfoCache (hostname lookup included)."""
     hostname = socket.gethostname()
-    ip_address = socket.gethostbyname(hostname)
-    os_info = platform.platform()
-    
-    # CPU metrics
-    cpu_percent = psutil.cpu_percent(interval=1)
-    cpu_count_logical = psutil.cpu_count()
-    cpu_count_physical = psutil.cpu_count(logical=False)
+    try:
+        ip_address = socket.gethostbyname(hostname)
+    except OSError:
+        # The hostname does not resolve (common on cloud instances and containers)
+        ip_address = "N/A"
+    return {
+        "hostname": hostname,
+        "ip_address": ip_address,
+        "os_info": platform.platform(),
+        "cpu_count_logical": psutil.cpu_count(),
+        "cpu_count_physical": psutil.cpu_count(logical=False),
+        "boot_time": datetime.fromtimestamp(psutil.boot_time()).strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+class HostInfoCache:
+    """
+    Caches host facts that practically never change.
+
+    The hostname, its address (a possibly slow DNS lookup), platform string, CPU
+    counts and boot time are read once and reused for ttl seconds. When the TTL
+    runs out only the hostname and boot time are read again: if neither changed
+    the cached facts are kept for another ttl, otherwise (the host was renamed or
+    rebooted) everything is read again. invalidate() forces a full re-read.
+    """
+
+    def __init__(self, ttl=HOST_INFO_TTL):
+        self.ttl = ttl
+        self.info = None
+        self.hostname = None
+        self.boot_time = None
+        self.expires_at = 0.0
+
+    def get(self):
+        """The cached host facts as a dict (a copy, safe to modify)."""
+        now = time.monotonic()
+        if self.info is None or now >= self.expires_at:
+            hostname = socket.gethostname()
+            boot_time = psutil.boot_time()
+            if self.info is None or hostname != self.hostname or boot_time != self.boot_time:
+                self.info = read_host_info()
+                self.hostname = hostname
+                self.boot_time = boot_time
+            self.expires_at = now + self.ttl
+        return dict(self.info)
+
+    def invalidate(self):
+        """Makes the next get() read every fact again."""
+        self.info = None
+
+class CollectorTiming:
+    """Run count and durations (seconds) of one collector."""
+
+    __slots__ = ('runs', 'total', 'last', 'max')
+
+    def __init__(self):
+        self.runs = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+
+class CollectorTimings:
+    """
+    Records how long each collector takes, to see where collection time goes.
+    Safe to use from the scheduler's worker threads.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self.lock:
+            timing = self.timings.get(name)
+            if timing is None:
+                timing = self.timings[name] = CollectorTiming()
+            timing.runs += 1
+            timing.total += seconds
+            timing.last = seconds
+            timing.max = max(timing.max, seconds)
+
+    def run(self, name, collector, *args):
+        """Calls collector(*args), recording its duration under name."""
+        start = time.perf_counter()
+        try:
+            return collector(*args)
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        """name -> (runs, total seconds, last seconds, max seconds)."""
+        with self.lock:
+            return {name: (t.runs, t.total, t.last, t.max) for name, t in self.timings.items()}
+
+    def summary(self):
+        """One line with the average and maximum duration of each collector."""
+        parts = [f"{name} {total / runs * 1000:.1f} ms (max {longest * 1000:.1f} ms)"
+                 for name, (runs, total, last, longest) in sorted(self.snapshot().items()) if runs]
+        return "Collector timings: " + (", ".join(parts) if parts else "none yet")
+
+# Shared samplers so each collection measures usage since the previous one
+cpu_sampler = CpuSampler()
+process_table = ProcessTable()
+host_info_cache = HostInfoCache()
+collector_timings = CollectorTimings()
+
+# Collectors: each returns its part of the get_system_metrics() dict
+def collect_host_info(cache=None):
+    """Host facts that practically never change (from the host info cache)."""
+    cache = cache or host_info_cache
+    return cache.get()
+
+def collect_cpu(sampler=None):
+    """CPU usage since the previous call, frequency and load averages."""
+    sampler = sampler or cpu_sampler
     cpu_freq = psutil.cpu_freq()
     if cpu_freq:
         cpu_current_freq = round(cpu_freq.current, 2)
     else:
         cpu_current_freq = "N/A"
     cpu_load_avg = psutil.getloadavg()
-    
-    # Memory metrics
-    ram = psutil.virtual_memory()
-    swap = psutil.swap_memory()
-    
-    # Disk metrics
-    disk = psutil.disk_usage('/')
-    disk_io = psutil.disk_io_counters()
-    
-    # Network metrics
-    net = psutil.net_io_counters()
-    
-    # Process and user metrics
-    users = [user.name for user in psutil.users()]
-    pids = psutil.pids()
-    num_processes = len(pids)
-    
-    # Top 5 CPU-consuming processes
-    top_processes = []
-    for proc in sorted(psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']), 
-                     key=lambda x: x.info['cpu_percent'] if x.info['cpu_percent'] else 0, 
-                     reverse=True)[:5]:
-        try:
-            top_processes.append({
-                'pid': proc.info['pid'],
-                'name': proc.info['name'],
-                'cpu_percent': proc.info['cpu_percent'],
-                'memory_percent': proc.info['memory_percent'] if proc.info['memory_percent'] else 0
-            })
-        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            pass
-    
-    # System uptime
-    uptime = get_uptime()
-    boot_time = datetime.fromtimestamp(psutil.boot_time()).strftime("%Y-%m-%d %H:%M:%S")
-    
     return {
-        "hostname": hostname,
-        "ip_address": ip_address,
-        "os_info": os_info,
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "uptime": uptime,
-        "boot_time": boot_time,
-        
-        # CPU metrics
-        "cpu_percent": cpu_percent,
-        "cpu_count_logical": cpu_count_logical,
-        "cpu_count_physical": cpu_count_physical,
+        "cpu_percent": sampler.system_percent(),
         "cpu_current_freq": cpu_current_freq,
         "cpu_load_avg_1min": cpu_load_avg[0],
         "cpu_load_avg_5min": cpu_load_avg[1],
         "cpu_load_avg_15min": cpu_load_avg[2],
-        
-        # Memory metrics
+    }
+
+def collect_memory():
+    """RAM and swap usage."""
+    ram = psutil.virtual_memory()
+    swap = psutil.swap_memory()
+    return {
         "ram_percent": ram.percent,
         "ram_used": round(ram.used / (1024 ** 3), 2),  # GB
         "ram_total": round(ram.total / (1024 ** 3), 2),  # GB
@@ -132,31 +341,286 @@ def get_system_metrics():
         "swap_percent": swap.percent,
         "swap_used": round(swap.used / (1024 ** 3), 2),  # GB
         "swap_total": round(swap.total / (1024 ** 3), 2),  # GB
-        
-        # Disk metrics
+        "ram_used_bytes": ram.used,
+        "ram_total_bytes": ram.total,
+        "ram_available_bytes": ram.available,
+        "swap_used_bytes": swap.used,
+        "swap_total_bytes": swap.total,
+    }
+
+def collect_disk():
+    """Space used on the root filesystem."""
+    disk = psutil.disk_usage('/')
+    return {
         "disk_percent": disk.percent,
         "disk_free": round(disk.free / (1024 ** 3), 2),  # GB
         "disk_used": round(disk.used / (1024 ** 3), 2),  # GB
         "disk_total": round(disk.total / (1024 ** 3), 2),  # GB
+        "disk_used_bytes": disk.used,
+        "disk_free_bytes": disk.free,
+        "disk_total_bytes": disk.total,
+    }
+
+def collect_disk_io():
+    """Disk I/O counters since boot."""
+    disk_io = psutil.disk_io_counters()
+    return {
         "disk_read_count": disk_io.read_count,
         "disk_write_count": disk_io.write_count,
         "disk_read_bytes": round(disk_io.read_bytes / (1024 ** 3), 2),  # GB
         "disk_write_bytes": round(disk_io.write_bytes / (1024 ** 3), 2),  # GB
-        
-        # Network metrics
+        "disk_read_bytes_total": disk_io.read_bytes,
+        "disk_written_bytes_total": disk_io.write_bytes,
+    }
+
+def collect_network():
+    """Network I/O counters since boot, summed over all interfaces."""
+    net = psutil.net_io_counters()
+    return {
         "network_bytes_sent": round(net.bytes_sent / (1024 ** 2), 2),  # MB
         "network_bytes_recv": round(net.bytes_recv / (1024 ** 2), 2),  # MB
         "network_packets_sent": net.packets_sent,
         "network_packets_recv": net.packets_recv,
         "network_errin": net.errin,
         "network_errout": net.errout,
-        
-        # Process metrics
+        "network_sent_bytes_total": net.bytes_sent,
+        "network_received_bytes_total": net.bytes_recv,
+    }
+
+def collect_processes(processes=None):
+    """Process count, top 5 CPU-consuming processes, logged in users and uptime."""
+    processes = processes or process_table
+    users = [user.name for user in psutil.users()]
+    return {
         "logged_in_users": ", ".join(users) if users else "None",
-        "running_processes": num_processes,
-        "top_processes": top_processes,
+        "running_processes": len(psutil.pids()),
+        "top_processes": processes.top(5),
+        "uptime": get_uptime(host_info_cache.boot_time),
     }
 
+def get_system_metrics(sampler=None, processes=None, timings=None):
+    """Collects various system metrics using psutil."""
+    timings = timings or collector_timings
+    metrics = timings.run("host", collect_host_info)
+    metrics["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    metrics.update(timings.run("cpu", collect_cpu, sampler))
+    metrics.update(timings.run("memory", collect_memory))
+    metrics.update(timings.run("disk", collect_disk))
+    metrics.update(timings.run("disk_io", collect_disk_io))
+    metrics.update(timings.run("network", collect_network))
+    metrics.update(timings.run("processes", collect_processes, processes))
+    return metrics
+
+# Collector name -> (function, seconds between runs)
+COLLECTORS = {
+    "cpu": (collect_cpu, 0.5),
+    "memory": (collect_memory, 0.5),
+    "disk": (collect_disk, 60),
+    "disk_io": (collect_disk_io, 5),
+    "network": (collect_network, 5),
+    "processes": (collect_processes, 10),
+    "host": (collect_host_info, 60),
+}
+
+class MetricsScheduler:
+    """
+    Runs each collector on its own interval in an asyncio event loop.
+
+    The blocking psutil calls run in a thread pool with a worker per collector,
+    so a slow disk_usage() or users() call only delays its own collector. Each
+    result is merged into a new dict that replaces snapshot in one assignment:
+    readers in any thread get a complete, consistent dict and must not modify it.
+    Call start() to run the loop in a background thread, or await run().
+
+    A collector that fails leaves its metrics out of the snapshot (or at their last
+    value) and is listed in failed until it succeeds again; its failed first run
+    still counts towards ready, so one broken collector doesn't stall the others.
+    """
+
+    def __init__(self, collectors=None, timings=None):
+        self.collectors = collectors or COLLECTORS
+        self.timings = timings or collector_timings
+        self.snapshot = {}
+        self.ready = threading.Event()
+        self.pending = set(self.collectors)
+        self.failed = set()
+
+    def _ran(self, name):
+        self.pending.discard(name)
+        if not self.pending:
+            self.ready.set()
+
+    def _update(self, name, values):
+        snapshot = dict(self.snapshot)
+        snapshot.update(values)
+        snapshot["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.snapshot = snapshot
+        self.failed.discard(name)
+        self._ran(name)
+
+    async def _collect(self, name, collector, interval, executor):
+        loop = asyncio.get_running_loop()
+        next_run = loop.time()
+        while True:
+            try:
+                values = await loop.run_in_executor(executor, self.timings.run, name, collector)
+            except Exception as e:
+                print(f"Collector {name} failed: {str(e)}")
+                self.failed.add(name)
+                self._ran(name)
+            else:
+                self._update(name, values)
+            # Keep to the schedule; skip runs missed while a slow collection finished
+            next_run += interval
+            if next_run < loop.time():
+                next_run = loop.time()
+            await asyncio.sleep(next_run - loop.time())
+
+    async def run(self):
+        """Runs every collector until cancelled."""
+        with ThreadPoolExecutor(max_workers=len(self.collectors), thread_name_prefix="collector") as executor:
+            await asyncio.gather(*(self._collect(name, collector, interval, executor)
+                                   for name, (collector, interval) in self.collectors.items()))
+
+    def start(self):
+        """Runs the scheduler in a daemon thread."""
+        thread = threading.Thread(target=asyncio.run, args=(self.run(),), name="metrics-scheduler", daemon=True)
+        thread.start()
+        return thread
+
+    def wait_ready(self, timeout=None):
+        """
+        Waits until every collector has run once (or timeout seconds); returns the
+        snapshot, which lacks the metrics of collectors that failed or are still running.
+        """
+        self.ready.wait(timeout)
+        return self.snapshot
+
+# Prometheus metrics: (name, type, help text, get_system_metrics key)
+PROMETHEUS_METRICS = [
+    ("monitor_cpu_usage_percent", "gauge", "System-wide CPU usage since the previous collection.", "cpu_percent"),
+    ("monitor_cpu_logical_count", "gauge", "Number of logical CPUs.", "cpu_count_logical"),
+    ("monitor_load_average_1m", "gauge", "1 minute load average.", "cpu_load_avg_1min"),
+    ("monitor_load_average_5m", "gauge", "5 minute load average.", "cpu_load_avg_5min"),
+    ("monitor_load_average_15m", "gauge", "15 minute load average.", "cpu_load_avg_15min"),
+    ("monitor_ram_usage_percent", "gauge", "RAM in use.", "ram_percent"),
+    ("monitor_ram_used_bytes", "gauge", "RAM in use.", "ram_used_bytes"),
+    ("monitor_ram_available_bytes", "gauge", "RAM available without swapping.", "ram_available_bytes"),
+    ("monitor_ram_total_bytes", "gauge", "Total RAM.", "ram_total_bytes"),
+    ("monitor_swap_usage_percent", "gauge", "Swap in use.", "swap_percent"),
+    ("monitor_swap_used_bytes", "gauge", "Swap in use.", "swap_used_bytes"),
+    ("monitor_swap_total_bytes", "gauge", "Total swap.", "swap_total_bytes"),
+    ("monitor_disk_usage_percent", "gauge", "Space used on /.", "disk_percent"),
+    ("monitor_disk_used_bytes", "gauge", "Space used on /.", "disk_used_bytes"),
+    ("monitor_disk_free_bytes", "gauge", "Space free on /.", "disk_free_bytes"),
+    ("monitor_disk_total_bytes", "gauge", "Size of /.", "disk_total_bytes"),
+    ("monitor_disk_reads_total", "counter", "Disk read operations.", "disk_read_count"),
+    ("monitor_disk_writes_total", "counter", "Disk write operations.", "disk_write_count"),
+    ("monitor_disk_read_bytes_total", "counter", "Bytes read from disk.", "disk_read_bytes_total"),
+    ("monitor_disk_written_bytes_total", "counter", "Bytes written to disk.", "disk_written_bytes_total"),
+    ("monitor_network_sent_bytes_total", "counter", "Bytes sent on all interfaces.", "network_sent_bytes_total"),
+    ("monitor_network_received_bytes_total", "counter", "Bytes received on all interfaces.",
+     "network_received_bytes_total"),
+    ("monitor_network_sent_packets_total", "counter", "Packets sent on all interfaces.", "network_packets_sent"),
+    ("monitor_network_received_packets_total", "counter", "Packets received on all interfaces.",
+     "network_packets_recv"),
+    ("monitor_network_receive_errors_total", "counter", "Receive errors on all interfaces.", "network_errin"),
+    ("monitor_network_transmit_errors_total", "counter", "Transmit errors on all interfaces.", "network_errout"),
+    ("monitor_processes", "gauge", "Number of processes.", "running_processes"),
+]
+
+def prometheus_label(value):
+    """Escapes a label value for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def render_prometheus(metrics, timings=None):
+    """
+    Renders get_system_metrics() output in the Prometheus text exposition format,
+    plus per-collector durations if a CollectorTimings is given.
+    """
+    lines = []
+    if "hostname" in metrics:
+        lines.append("# HELP monitor_host_info Host the metrics were collected on.")
+        lines.append("# TYPE monitor_host_info gauge")
+        lines.append(f'monitor_host_info{{hostname="{prometheus_label(metrics["hostname"])}",'
+                     f'ip_address="{prometheus_label(metrics["ip_address"])}",'
+                     f'os="{prometheus_label(metrics["os_info"])}"}} 1')
+    for name, kind, help_text, key in PROMETHEUS_METRICS:
+        # Leave out metrics whose collector has not succeeded yet
+        if key not in metrics:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {metrics[key]}")
+    if timings is not None:
+        lines.append("# HELP monitor_collector_duration_seconds Time spent in each collector.")
+        lines.append("# TYPE monitor_collector_duration_seconds summary")
+        for name, (runs, total, last, longest) in sorted(timings.snapshot().items()):
+            lines.append(f'monitor_collector_duration_seconds_sum{{collector="{name}"}} {total}')
+            lines.append(f'monitor_collector_duration_seconds_count{{collector="{name}"}} {runs}')
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Serves the exporter's pre-rendered page; a scrape never calls psutil."""
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.exporter.body
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Prometheus scrapes every few seconds; don't log each request
+        pass
+
+class MetricsExporter:
+    """
+    Serves /metrics from a background HTTP server thread.
+
+    update() renders the metrics once per collection and swaps in the new page,
+    so each scrape only writes out bytes that are already prepared.
+    """
+
+    def __init__(self, port=EXPORTER_PORT, host=""):
+        self.body = b""
+        self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self.server.daemon_threads = True
+        self.server.exporter = self
+
+    def update(self, metrics, timings=None):
+        """Renders a new collection; scrapes from now on get this page."""
+        self.body = render_prometheus(metrics, timings)
+
+    def start(self):
+        """Starts serving in a daemon thread."""
+        thread = threading.Thread(target=self.server.serve_forever, name="metrics-exporter", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def run_exporter(port=EXPORTER_PORT, interval=EXPORTER_INTERVAL):
+    """Renders the collectors' latest snapshot every interval seconds and serves it on /metrics."""
+    scheduler = MetricsScheduler()
+    scheduler.start()
+    exporter = MetricsExporter(port)
+    # Collect before serving so the first scrape already has data
+    exporter.update(scheduler.wait_ready(READY_TIMEOUT), scheduler.timings)
+    exporter.start()
+    print(f"Serving Prometheus metrics on :{port}/metrics (rendering every {interval}s)")
+    next_render = time.monotonic() + interval
+    while True:
+        time.sleep(max(0, next_render - time.monotonic()))
+        next_render += interval
+        exporter.update(scheduler.snapshot, scheduler.timings)
+
 def get_status_color(value, threshold):
     """Returns color based on value relative to threshold."""
     if value >= threshold:
@@ -264,10 +728,28 @@ def create_stat_card(title, value, subtitle=None, icon=None, color="#3498DB"):
     </div>
     '''
 
-def main():
+# Text metrics; missing numeric metrics read as 0 in the email
+TEXT_METRICS = {"hostname", "ip_address", "os_info", "boot_time", "uptime", "logged_in_users", "cpu_current_freq",
+                "timestamp"}
+
+class EmailMetrics(dict):
+    """A snapshot for the email, with placeholders for metrics no collector has reported."""
+
+    def __missing__(self, key):
+        if key == "top_processes":
+            return []
+        return "N/A" if key in TEXT_METRICS else 0
+
+def main(show_timings=False):
     """Main monitoring loop."""
+    # Collectors run in the background; each check reads their latest snapshot
+    scheduler = MetricsScheduler()
+    scheduler.start()
+    scheduler.wait_ready(READY_TIMEOUT)
     while True:
-        metrics = get_system_metrics()
+        metrics = EmailMetrics(scheduler.snapshot)
+        if scheduler.failed or scheduler.pending:
+            print(f"No data from collectors: {', '.join(sorted(scheduler.failed | scheduler.pending))}")
         alert_triggered = False
         
         # Check thresholds
@@ -638,12 +1120,24 @@ def main():
             send_alert(subject, email_content)
         else:
             print(f"[{metrics['timestamp']}] All system metrics are within normal limits.")
+        if show_timings:
+            print(scheduler.timings.summary())
 
         time.sleep(60)  # Check every minute
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="System monitor: email alerts or a Prometheus exporter")
+    parser.add_argument("--exporter", action="store_true", help="serve metrics for Prometheus instead of emailing")
+    parser.add_argument("--port", type=int, default=EXPORTER_PORT, help="exporter port (default: %(default)s)")
+    parser.add_argument("--interval", type=float, default=EXPORTER_INTERVAL,
+                        help="seconds between renders of the /metrics page (default: %(default)s)")
+    parser.add_argument("--timings", action="store_true", help="print how long each collector takes every check")
+    args = parser.parse_args()
+
+    if args.exporter:
+        run_exporter(args.port, args.interval)
     # Ensure Mailjet API keys are set
-    if not os.environ.get("MAILJET_API_KEY") or not os.environ.get("MAILJET_SECRET_KEY"):
+    elif not os.environ.get("MAILJET_API_KEY") or not os.environ.get("MAILJET_SECRET_KEY"):
         print("Error: Mailjet API keys not found in environment variables.")
     else:
-        main()
+        main(args.timings)
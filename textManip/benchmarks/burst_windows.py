@@ -0,0 +1,144 @@
+"""
+Compare the original quadratic burst scan with the two-pointer implementation.
+
+Run from the textManip directory:
+
+    python -m benchmarks.burst_windows --requests 200000
+    python -m benchmarks.burst_windows --memory --requests 1000000
+    python -m benchmarks.burst_windows --profile --requests 200000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from collections import defaultdict
+
+from burst_windows import (
+    DEFAULT_PROFILE_WINDOWS,
+    DEFAULT_WINDOW_SECONDS,
+    StreamingBurstTracker,
+    burst_profile,
+    max_requests_in_window,
+)
+
+
+def quadratic_max_requests_in_window(timestamps, window_seconds=DEFAULT_WINDOW_SECONDS):
+    """The nested-loop scan that analyze_ip_request_windows used before the two-pointer version."""
+    window_counts = []
+    for i, start_time in enumerate(timestamps):
+        count = 0
+        for j in range(i + 1, len(timestamps)):
+            if timestamps[j] - start_time <= window_seconds:
+                count += 1
+            else:
+                break
+        if count > 0:
+            window_counts.append(count)
+    return max(window_counts) if window_counts else 0
+
+
+def heavy_hitter_timestamps(requests, requests_per_second, seed=0):
+    """Sorted timestamps for a single scraper IP sending ``requests_per_second`` on average."""
+    rng = random.Random(seed)
+    timestamps = []
+    now = 1_700_000_000
+    for _ in range(requests):
+        if rng.random() < 1 / requests_per_second:
+            now += 1
+        timestamps.append(now)
+    return timestamps
+
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def rotating_ip_traffic(requests, active_ips, seed=0):
+    """Yield (ip, timestamp) pairs where a fresh pool of ``active_ips`` takes over every minute."""
+    rng = random.Random(seed)
+    now = 1_700_000_000
+    for i in range(requests):
+        if rng.random() < 0.01:
+            now += 1
+        pool = now // 60
+        yield f"10.{pool % 256}.{rng.randrange(active_ips) // 256}.{rng.randrange(256)}", now
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def compare_memory(requests, active_ips, window_seconds):
+    def batch():
+        ip_requests = defaultdict(list)
+        for ip, timestamp in rotating_ip_traffic(requests, active_ips):
+            ip_requests[ip].append(timestamp)
+        return {ip: max_requests_in_window(sorted(ts), window_seconds) for ip, ts in ip_requests.items()}
+
+    def streaming():
+        tracker = StreamingBurstTracker(window_seconds)
+        for ip, timestamp in rotating_ip_traffic(requests, active_ips):
+            tracker.add(ip, timestamp)
+        return tracker.results()
+
+    print(f"{requests} requests, ~{active_ips} active IPs per minute, {window_seconds}s window")
+    print(f"full history: {peak_memory(batch) / 1024 ** 2:8.2f} MB peak")
+    print(f"streaming:    {peak_memory(streaming) / 1024 ** 2:8.2f} MB peak")
+
+
+def compare_profiles(timestamps, windows):
+    def per_window():
+        return {window: max_requests_in_window(timestamps, window) for window in windows}
+
+    separate, separate_time = time_call(per_window)
+    profile, profile_time = time_call(burst_profile, timestamps, windows, (5, 20))
+    assert profile.maxima == separate, (profile.maxima, separate)
+
+    print(f"windows {', '.join(f'{window}s' for window in windows)}")
+    print(f"one scan per window:   {separate_time:8.3f}s  (max only)")
+    print(f"burst_profile:         {profile_time:8.3f}s  (max, thresholds and histograms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200_000, help="requests from the heavy-hitter IP")
+    parser.add_argument("--rate", type=int, default=50, help="average requests per second")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW_SECONDS)
+    parser.add_argument("--memory", action="store_true",
+                        help="compare peak memory of the full-history and streaming trackers")
+    parser.add_argument("--active-ips", type=int, default=500)
+    parser.add_argument("--profile", action="store_true",
+                        help="compare per-window scans with a single multi-window burst_profile pass")
+    args = parser.parse_args()
+
+    if args.memory:
+        compare_memory(args.requests, args.active_ips, args.window)
+        return
+
+    timestamps = heavy_hitter_timestamps(args.requests, args.rate)
+    if args.profile:
+        print(f"Heavy hitter: {args.requests} requests at ~{args.rate}/s")
+        compare_profiles(timestamps, DEFAULT_PROFILE_WINDOWS)
+        return
+
+    print(f"Heavy hitter: {args.requests} requests at ~{args.rate}/s, {args.window}s window")
+
+    new_result, new_time = time_call(max_requests_in_window, timestamps, args.window)
+    old_result, old_time = time_call(quadratic_max_requests_in_window, timestamps, args.window)
+    assert new_result == old_result, (new_result, old_result)
+
+    print(f"quadratic:   {old_time:8.3f}s  (max {old_result})")
+    print(f"two-pointer: {new_time:8.3f}s  (max {new_result})")
+    if new_time > 0:
+        print(f"speedup:     {old_time / new_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Text-mode vs bytes-mode parsing of the same log, scaled up by repetition.
+
+The log is repeated ``--scale`` times into a temporary file (the default turns the
+725-line sample into about 7 million lines, ~1.4 GB), then analyzed once per mode
+with the endpoint, burst and user agent aggregators. Run from the textManip directory:
+
+    python -m benchmarks.bytes_mode --scale 10000
+"""
+import argparse
+import os
+import tempfile
+
+from log_engine import BurstWindowAggregator, EndpointCounter, UserAgentCounter, run_analysis
+
+
+def write_scaled(log_file, scale, directory=None):
+    with open(log_file, 'rb') as file:
+        data = file.read()
+    if data and not data.endswith(b'\n'):
+        data += b'\n'
+    # Write in batches of copies so memory stays at a few MB whatever the scale
+    batch = max(1, (8 * 1024 * 1024) // max(len(data), 1))
+    handle, path = tempfile.mkstemp(suffix=".log", dir=directory)
+    with os.fdopen(handle, 'wb') as out:
+        remaining = scale
+        while remaining:
+            copies = min(batch, remaining)
+            out.write(data * copies)
+            remaining -= copies
+    return path
+
+
+def run(path, binary):
+    aggregators = [EndpointCounter(), BurstWindowAggregator(), UserAgentCounter()]
+    stats = run_analysis(path, aggregators, binary=binary)
+    return stats, [aggregator.result() for aggregator in aggregators]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("log_file", nargs="?", default="NodeJsApp.log")
+    parser.add_argument("--scale", type=int, default=10000, help="times to repeat the log")
+    parser.add_argument("--tmpdir", help="directory for the scaled log (default: system temp)")
+    args = parser.parse_args()
+
+    path = write_scaled(args.log_file, args.scale, args.tmpdir)
+    try:
+        size = os.path.getsize(path)
+        print(f"{args.log_file} x {args.scale}: {size / 1024 ** 2:,.0f} MB\n")
+        print(f"{'mode':<8}{'seconds':>10}{'lines/s':>14}{'MB/s':>10}")
+        results = {}
+        for mode, binary in (("text", False), ("bytes", True)):
+            stats, results[mode] = run(path, binary)
+            print(f"{mode:<8}{stats.seconds:>10.2f}{stats.lines_per_second:>14,.0f}"
+                  f"{stats.bytes_per_second / 1024 ** 2:>10.1f}")
+        print(f"\nresults identical: {results['text'] == results['bytes']}")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
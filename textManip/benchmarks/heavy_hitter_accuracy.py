@@ -0,0 +1,62 @@
+"""
+Accuracy check for the approximate heavy-hitter summaries on synthetic Zipf traffic.
+
+Draws requests over a large set of distinct endpoints with Zipfian popularity,
+counts them exactly and with each summary, and reports top-K recall, the largest
+count error and whether every reported error bound holds.
+
+Run from the textManip directory:
+
+    python -m benchmarks.heavy_hitter_accuracy --requests 1000000 --distinct 200000
+"""
+import argparse
+import random
+import time
+from collections import Counter
+from itertools import accumulate
+
+from heavy_hitters import CountMinSketch, SpaceSaving
+
+
+def zipf_keys(requests, distinct, exponent, seed=0):
+    """``requests`` endpoint strings whose popularity follows Zipf(exponent) over ``distinct`` keys."""
+    rng = random.Random(seed)
+    cumulative = list(accumulate(1 / rank ** exponent for rank in range(1, distinct + 1)))
+    ranks = rng.choices(range(distinct), cum_weights=cumulative, k=requests)
+    return [f"/items/{rank}?session={rank * 7919 % 100003}" for rank in ranks]
+
+
+def evaluate(name, summary, keys, exact, k):
+    start = time.perf_counter()
+    for key in keys:
+        summary.add(key)
+    elapsed = time.perf_counter() - start
+
+    reported = summary.top(k)
+    true_top = {key for key, _ in exact.most_common(k)}
+    recall = len(true_top & {hitter.key for hitter in reported}) / k
+    max_error = max(abs(hitter.count - exact[hitter.key]) for hitter in reported)
+    bounds_hold = all(hitter.count - hitter.error <= exact[hitter.key] <= hitter.count for hitter in reported)
+    print(f"{name:<28}{recall:>8.0%}{max_error:>12}{str(bounds_hold):>10}{len(keys) / elapsed:>14,.0f}")
+    return recall, bounds_hold
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500_000)
+    parser.add_argument("--distinct", type=int, default=100_000)
+    parser.add_argument("--exponent", type=float, default=1.1, help="Zipf exponent")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--capacity", type=int, default=2000)
+    args = parser.parse_args()
+
+    keys = zipf_keys(args.requests, args.distinct, args.exponent)
+    exact = Counter(keys)
+    print(f"{args.requests} requests, {len(exact)} distinct keys, Zipf s={args.exponent}, top {args.top}\n")
+    print(f"{'summary':<28}{'recall':>8}{'max error':>12}{'bounds':>10}{'keys/s':>14}")
+    evaluate(f"Space-Saving ({args.capacity})", SpaceSaving(args.capacity), keys, exact, args.top)
+    evaluate(f"Count-Min ({args.capacity}x4)", CountMinSketch(args.capacity, 4, args.top), keys, exact, args.top)
+
+
+if __name__ == "__main__":
+    main()
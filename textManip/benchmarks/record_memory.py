@@ -0,0 +1,80 @@
+"""
+Memory per retained request: LogRecord objects vs the packed RecordStore.
+
+Generates a synthetic log, parses it once while keeping every record three ways and
+reports the traced bytes per request of each. Run from the textManip directory:
+
+    python -m benchmarks.record_memory --size 50MB --ips 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic_log import add_generator_arguments, generator_options, parse_size, write_synthetic_log
+from compact_records import RecordStore
+from log_engine import ALL_FIELDS, run_analysis
+
+
+class RecordList:
+    """Keeps the parsed LogRecords as they are (optionally without their raw line)."""
+
+    fields = ALL_FIELDS
+
+    def __init__(self, keep_line=True):
+        self.keep_line = keep_line
+        self.records = []
+
+    def add(self, record):
+        self.records.append(record if self.keep_line else record._replace(line=None))
+
+
+def traced(make):
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        kept = make()
+        seconds = time.perf_counter() - start
+        return kept, tracemalloc.get_traced_memory()[0], seconds
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--log", help="use this log instead of generating one")
+    parser.add_argument("--tmpdir", help="directory for the generated log (default: system temp)")
+    add_generator_arguments(parser)
+    parser.set_defaults(size="20MB")
+    args = parser.parse_args()
+
+    if args.log:
+        path = args.log
+    else:
+        handle, path = tempfile.mkstemp(suffix=".log", dir=args.tmpdir)
+        os.close(handle)
+        write_synthetic_log(path, parse_size(args.size), **generator_options(args))
+    try:
+        candidates = [
+            ("LogRecord list", lambda: RecordList()),
+            ("LogRecord list, no line", lambda: RecordList(keep_line=False)),
+            ("RecordStore", RecordStore),
+        ]
+        print(f"{'representation':<26}{'bytes/request':>15}{'total MB':>10}{'parse s':>10}")
+        for name, make in candidates:
+            def parse():
+                aggregator = make()
+                run_analysis(path, [aggregator])
+                return aggregator
+            kept, size, seconds = traced(parse)
+            requests = len(kept.records) if isinstance(kept, RecordList) else len(kept)
+            print(f"{name:<26}{size / requests:>15.1f}{size / 1024 ** 2:>10.1f}{seconds:>10.2f}")
+            del kept
+    finally:
+        if not args.log:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Report generation for large result dicts: full sort + one print per entry vs the
+reporting helpers (heapq top-N, batched writes).
+
+Output goes to os.devnull so only the formatting and write calls are timed. Run
+from the textManip directory:
+
+    python -m benchmarks.reporting --keys 2000000 --top 100
+"""
+import argparse
+import os
+import random
+import time
+
+from reporting import ReportWriter, top_items, write_rows
+
+
+def synthetic_counts(keys, seed=0):
+    rng = random.Random(seed)
+    return {f"/items/{key}": int(rng.paretovariate(1.2)) for key in range(keys)}
+
+
+def print_all(counts, out):
+    for endpoint, count in sorted(counts.items(), key=lambda x: x[1], reverse=True):
+        print(f"{endpoint}: {count}", file=out)
+
+
+def write_all(counts, out):
+    with ReportWriter(out) as writer:
+        for endpoint, count in top_items(counts):
+            writer.line(f"{endpoint}: {count}")
+
+
+def write_top(counts, out, top_n):
+    with ReportWriter(out) as writer:
+        for endpoint, count in top_items(counts, top_n):
+            writer.line(f"{endpoint}: {count}")
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--keys", type=int, default=1_000_000, help="distinct keys in the result dict")
+    parser.add_argument("--top", type=int, default=100)
+    args = parser.parse_args()
+
+    counts = synthetic_counts(args.keys)
+    print(f"{args.keys:,} keys\n")
+    with open(os.devnull, 'w') as out:
+        rows = [
+            ("sorted + print per entry", timed(print_all, counts, out)),
+            ("sorted + batched writes", timed(write_all, counts, out)),
+            (f"nlargest top {args.top}", timed(write_top, counts, out, args.top)),
+            ("JSON lines, all entries", timed(lambda: write_rows(top_items(counts), ("endpoint", "count"),
+                                                                 "jsonl", out))),
+            ("CSV, all entries", timed(lambda: write_rows(top_items(counts), ("endpoint", "count"), "csv", out))),
+        ]
+    for name, seconds in rows:
+        print(f"{name:<28}{seconds:>8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
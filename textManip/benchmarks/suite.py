@@ -0,0 +1,171 @@
+"""
+End-to-end benchmark of the analyzers on a synthetic (or given) log, saved as JSON.
+
+Each stage (count_endpoints, analyze_ip_request_windows, analyze_user_agents) runs
+in a fresh process, so its peak RSS is its own. The runner reports lines/sec, MB/s,
+wall time and peak RSS per stage and writes them, with the commit, interpreter and
+log description, to a JSON file; ``--compare`` prints the change against an earlier
+run. Run from the textManip directory:
+
+    python -m benchmarks.suite --size 200MB
+    python -m benchmarks.suite --size 2GB --ips 50000 --workers 4 --output after.json --compare before.json
+    python -m benchmarks.suite --log /var/log/app/access.log --stages endpoints,user_agents
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic_log import add_generator_arguments, generator_options, parse_size, write_synthetic_log
+from log_sources import expand_sources, open_log, source_size
+
+STAGES = ("endpoints", "ip_windows", "user_agents")
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def peak_rss_mb():
+    """This process's peak resident set size in MB (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def run_stage(stage, log_file, workers):
+    """Run one analyzer on ``log_file``; returns (seconds, distinct keys in the result, peak RSS MB)."""
+    from diagnostics import get_logger
+    from endpoint_counter import count_endpoints
+    from ip_burst_analyzer import analyze_ip_request_windows
+    from user_agent_counter import analyze_user_agents
+
+    start = time.perf_counter()
+    if stage == "endpoints":
+        result = count_endpoints(log_file, workers)
+    elif stage == "ip_windows":
+        result = analyze_ip_request_windows(log_file, workers=workers)
+    else:
+        # A logger without handlers keeps the skipped-line report off the terminal
+        result = analyze_user_agents(log_file, workers, logger=get_logger("benchmarks"))
+    return time.perf_counter() - start, len(result), peak_rss_mb()
+
+
+def measure(stage, log_file, workers):
+    """Run a stage in a freshly spawned interpreter so earlier stages don't inflate its RSS."""
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(run_stage, (stage, log_file, workers))
+
+
+def count_lines(source):
+    """Lines in a log path or glob, decompressing as the analyzers do."""
+    lines = 0
+    for path in expand_sources(source):
+        with open_log(path) as file:
+            for block in iter(lambda: file.read(1024 * 1024), ''):
+                lines += block.count('\n')
+    return lines
+
+
+def git_revision():
+    """(commit, dirty) of the working tree, or (None, None) outside a git checkout."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def compare(report, baseline):
+    print(f"\nvs {baseline.get('commit')} ({baseline.get('created')}):")
+    for stage, result in report["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before:
+            continue
+        speed = result["lines_per_second"] / before["lines_per_second"] - 1
+        rss = result["peak_rss_mb"] - before["peak_rss_mb"]
+        print(f"{stage:<14}{speed:>+10.1%} lines/s{rss:>+12.1f} MB peak RSS")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--log", help="benchmark this log (path, glob or compressed file) instead of generating one")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"comma-separated subset of {', '.join(STAGES)}")
+    parser.add_argument("--workers", type=int, default=1, help="parse with this many processes (0 = one per CPU)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per stage; the fastest is kept")
+    parser.add_argument("--tmpdir", help="directory for the generated log (default: system temp)")
+    parser.add_argument("--keep-log", action="store_true", help="keep the generated log")
+    parser.add_argument("--output", help="JSON results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", metavar="JSON", help="earlier results to compare against")
+    add_generator_arguments(parser)
+    args = parser.parse_args()
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+    workers = args.workers or None
+
+    if args.log:
+        log_file = args.log
+        log = {"path": log_file, "lines": count_lines(log_file), "bytes": source_size(log_file)}
+    else:
+        handle, log_file = tempfile.mkstemp(suffix=".log", dir=args.tmpdir)
+        os.close(handle)
+        options = generator_options(args)
+        print(f"Generating {args.size} synthetic log...")
+        log = {"generator": options, **write_synthetic_log(log_file, parse_size(args.size), **options)}
+        if args.keep_log:
+            log["path"] = log_file
+
+    commit, dirty = git_revision()
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "workers": args.workers,
+        "log": log,
+        "stages": {},
+    }
+    try:
+        print(f"{log['lines']:,} lines, {log['bytes'] / 1024 ** 2:,.1f} MB\n")
+        print(f"{'stage':<14}{'seconds':>10}{'lines/s':>14}{'MB/s':>10}{'peak RSS MB':>14}{'keys':>10}")
+        for stage in stages:
+            runs = [measure(stage, log_file, workers) for _ in range(max(1, args.repeat))]
+            seconds, keys, rss = min(runs)
+            result = report["stages"][stage] = {
+                "seconds": round(seconds, 3),
+                "lines_per_second": round(log["lines"] / seconds),
+                "mb_per_second": round(log["bytes"] / 1024 ** 2 / seconds, 2),
+                "peak_rss_mb": round(max(run[2] for run in runs), 1),
+                "keys": keys,
+            }
+            print(f"{stage:<14}{seconds:>10.2f}{result['lines_per_second']:>14,}{result['mb_per_second']:>10.1f}"
+                  f"{result['peak_rss_mb']:>14.1f}{keys:>10,}")
+    finally:
+        if not args.log and not args.keep_log:
+            os.remove(log_file)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{commit or 'results'}{'-dirty' if dirty else ''}.json")
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"\nSaved {output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare(report, json.load(file))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Deterministic synthetic logs in the NodeJsApp.log format.
+
+Traffic is generated one second at a time from a seeded RNG, so the same options
+always produce byte-identical files:
+
+- about ``rate`` requests per second from ``ips`` distinct client IPs (mildly skewed),
+- ``endpoints`` distinct paths with Zipfian popularity ("/" and "/favicon.ico" first),
+- a user agent mix given as family weights, e.g. "chrome=60,safari=12,bot=4",
+- a burst every ``burst_every`` seconds: one otherwise unseen IP sends
+  ``burst_requests`` requests spread over ``burst_seconds`` seconds,
+- a small fraction of non-access lines (startup messages, truncated writes).
+
+Run from the textManip directory:
+
+    python -m benchmarks.synthetic_log synthetic.log --size 500MB
+    python -m benchmarks.synthetic_log synthetic.log.gz --size 20GB --ips 100000 --rate 2000
+    python -m benchmarks.synthetic_log - --size 10MB | python endpoint_counter.py -
+"""
+import argparse
+import calendar
+import gzip
+import random
+import re
+import sys
+import time
+from itertools import accumulate
+
+DEFAULT_START = "2025-06-03T10:00:00"
+DEFAULT_UA_MIX = "chrome=60,safari=12,firefox=8,edge=5,mobile=8,bot=4,tool=3"
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+WRITE_BUFFER = 1024 * 1024
+
+USER_AGENTS = {
+    "chrome": [
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36",
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36",
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
+    ],
+    "safari": [
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.5 Safari/605.1.15",
+    ],
+    "firefox": [
+        "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:139.0) Gecko/20100101 Firefox/139.0",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:138.0) Gecko/20100101 Firefox/138.0",
+    ],
+    "edge": [
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36 Edg/137.0.0.0",
+    ],
+    "mobile": [
+        "Mozilla/5.0 (iPhone; CPU iPhone OS 18_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.5 Mobile/15E148 Safari/604.1",
+        "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Mobile Safari/537.36",
+    ],
+    "bot": [
+        "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)",
+        "Mozilla/5.0 (compatible; bingbot/2.0; +http://www.bing.com/bingbot.htm)",
+    ],
+    "tool": [
+        "curl/8.5.0",
+        "python-requests/2.32.3",
+        "Wget/1.21.4",
+    ],
+}
+
+ENDPOINT_TEMPLATES = (
+    "/api/products/{n}",
+    "/api/users/{n}/orders",
+    "/static/js/app.{h:08x}.js",
+    "/blog/post-{n}",
+    "/search?q=term{n}",
+    "/api/orders/{n}?page={p}",
+)
+
+STATUS_WEIGHTS = ((200, 90), (304, 5), (404, 4), (500, 1))
+REFERERS = ("-", "http://108.129.212.117:8080/")
+
+
+def parse_size(text):
+    """Parse sizes such as "500MB", "1.5G" or "20GB" into bytes (binary units)."""
+    match = re.fullmatch(r"\s*([\d.]+)\s*([KMGT]?)i?B?\s*", text, re.IGNORECASE)
+    if not match:
+        raise ValueError(f"not a size: {text!r}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def parse_mix(text):
+    """Parse "family=weight,..." into a dict, checking the families exist."""
+    mix = {}
+    for item in text.split(","):
+        family, _, weight = item.partition("=")
+        family = family.strip()
+        if family not in USER_AGENTS:
+            raise ValueError(f"unknown user agent family {family!r} (known: {', '.join(USER_AGENTS)})")
+        mix[family] = float(weight or 1)
+    return mix
+
+
+def ip_address(index, seed=0):
+    """A deterministic, well-spread public-looking IPv4 address for client ``index``."""
+    value = (index * 2654435761 + seed * 97 + 12345) % 2 ** 32
+    return f"{1 + (value >> 24) % 223}.{(value >> 16) & 255}.{(value >> 8) & 255}.{value & 255}"
+
+
+def endpoint_path(rank):
+    if rank == 0:
+        return "/"
+    if rank == 1:
+        return "/favicon.ico"
+    n = rank - 2
+    template = ENDPOINT_TEMPLATES[n % len(ENDPOINT_TEMPLATES)]
+    number = n // len(ENDPOINT_TEMPLATES)
+    return template.format(n=number, h=number * 2654435761 % 2 ** 32, p=number % 7 + 1)
+
+
+def zipf_weights(count, exponent):
+    return list(accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def synthetic_seconds(seed=0, rate=200, ips=1000, ip_exponent=0.8, endpoints=200, endpoint_exponent=1.1,
+                      ua_mix=DEFAULT_UA_MIX, burst_every=300, burst_requests=200, burst_seconds=10,
+                      noise=0.001, start=DEFAULT_START):
+    """
+    Yield the log one second at a time, as a string of complete lines.
+
+    Args:
+        seed (int): RNG seed; everything else being equal, the output is identical.
+        rate (int): Average requests per second (each second draws between half and
+            one and a half times this).
+        ips (int): Distinct client IPs for regular traffic.
+        ip_exponent (float): Zipf exponent of IP activity (0 for uniform).
+        endpoints (int): Distinct endpoint paths.
+        endpoint_exponent (float): Zipf exponent of endpoint popularity.
+        ua_mix (str or dict): User agent family weights.
+        burst_every (int): Seconds between injected bursts (0 for none).
+        burst_requests (int): Requests per burst.
+        burst_seconds (int): Seconds each burst is spread over.
+        noise (float): Fraction of lines that are not access lines.
+        start (str): UTC start time, ISO format.
+
+    Yields:
+        str: The lines for one second of traffic.
+    """
+    rng = random.Random(seed)
+    mix = parse_mix(ua_mix) if isinstance(ua_mix, str) else ua_mix
+    user_agents = [agent for family in mix for agent in USER_AGENTS[family]]
+    ua_weights = list(accumulate(weight / len(USER_AGENTS[family]) for family, weight in mix.items()
+                                 for _ in USER_AGENTS[family]))
+    client_ips = [ip_address(index, seed) for index in range(ips)]
+    ip_weights = zipf_weights(ips, ip_exponent)
+    paths = [endpoint_path(rank) for rank in range(endpoints)]
+    path_weights = zipf_weights(endpoints, endpoint_exponent)
+    statuses = [str(status) for status, _ in STATUS_WEIGHTS]
+    status_weights = list(accumulate(weight for _, weight in STATUS_WEIGHTS))
+    milliseconds = [f"{ms:03d}" for ms in range(1000)]
+
+    second = calendar.timegm(time.strptime(start, "%Y-%m-%dT%H:%M:%S"))
+    elapsed = 0
+    while True:
+        count = rng.randint(rate // 2, rate + rate // 2)
+        chosen_ips = rng.choices(client_ips, cum_weights=ip_weights, k=count)
+
+        # Bursts start half way through each period, from an IP outside the regular pool
+        step = elapsed % burst_every - burst_every // 2 if burst_every else -1
+        if 0 <= step < burst_seconds:
+            extra = burst_requests // burst_seconds + (step < burst_requests % burst_seconds)
+            chosen_ips.extend([ip_address(ips + elapsed // burst_every, seed)] * extra)
+            count += extra
+
+        moment = time.gmtime(second)
+        iso = time.strftime("%Y-%m-%dT%H:%M:%S", moment)
+        apache = f"{moment.tm_mday:02d}/{MONTHS[moment.tm_mon - 1]}/{moment.tm_year}:" \
+                 f"{time.strftime('%H:%M:%S', moment)} +0000"
+        stamps = sorted(rng.choices(milliseconds, k=count))
+        chosen_paths = rng.choices(paths, cum_weights=path_weights, k=count)
+        chosen_agents = rng.choices(user_agents, cum_weights=ua_weights, k=count)
+        chosen_statuses = rng.choices(statuses, cum_weights=status_weights, k=count)
+        chosen_referers = rng.choices(REFERERS, k=count)
+        rng.shuffle(chosen_ips)
+
+        lines = [
+            f'{iso}.{ms}Z {ip} - - [{apache}] "GET {path} HTTP/1.1" {status} - "{referer}" "{agent}"\n'
+            for ms, ip, path, status, referer, agent
+            in zip(stamps, chosen_ips, chosen_paths, chosen_statuses, chosen_referers, chosen_agents)
+        ]
+        if noise and rng.random() < noise * count:
+            position = rng.randrange(len(lines) + 1)
+            if rng.random() < 0.5:
+                lines.insert(position, f"{iso}.000Z Server running at http://localhost:3000\n")
+            elif lines:
+                truncated = lines[min(position, len(lines) - 1)]
+                lines.insert(position, truncated[:rng.randrange(len(truncated) - 1)] + "\n")
+        yield "".join(lines)
+        second += 1
+        elapsed += 1
+
+
+def write_synthetic_log(path, size, **options):
+    """
+    Write at least ``size`` bytes of synthetic log to ``path`` ("-" for stdout; a
+    ".gz" suffix compresses).
+
+    Returns:
+        dict: Lines and bytes written, seconds of log time covered and generation time.
+    """
+    started = time.perf_counter()
+    if path == "-":
+        out = sys.stdout
+    elif str(path).endswith(".gz"):
+        out = gzip.open(path, "wt", encoding="ascii", compresslevel=1)
+    else:
+        out = open(path, "w", encoding="ascii", buffering=WRITE_BUFFER)
+    written = lines = seconds = 0
+    try:
+        for chunk in synthetic_seconds(**options):
+            out.write(chunk)
+            written += len(chunk)
+            lines += chunk.count("\n")
+            seconds += 1
+            if written >= size:
+                break
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        else:
+            out.flush()
+    return {"lines": lines, "bytes": written, "log_seconds": seconds,
+            "generate_seconds": round(time.perf_counter() - started, 3)}
+
+
+def add_generator_arguments(parser):
+    """Add the generator options to an argparse parser (shared with the benchmark runner)."""
+    parser.add_argument("--size", default="100MB", help="approximate output size, e.g. 500MB or 20GB")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rate", type=int, default=200, help="average requests per second of log time")
+    parser.add_argument("--ips", type=int, default=1000, help="distinct client IPs")
+    parser.add_argument("--ip-exponent", type=float, default=0.8, help="Zipf exponent of IP activity")
+    parser.add_argument("--endpoints", type=int, default=200, help="distinct endpoint paths")
+    parser.add_argument("--endpoint-exponent", type=float, default=1.1, help="Zipf exponent of endpoint popularity")
+    parser.add_argument("--ua-mix", default=DEFAULT_UA_MIX,
+                        help=f"user agent family weights (families: {', '.join(USER_AGENTS)})")
+    parser.add_argument("--burst-every", type=int, default=300, help="seconds between bursts (0 = none)")
+    parser.add_argument("--burst-requests", type=int, default=200)
+    parser.add_argument("--burst-seconds", type=int, default=10)
+    parser.add_argument("--noise", type=float, default=0.001, help="fraction of non-access lines")
+    parser.add_argument("--start", default=DEFAULT_START, help="UTC start time (default: %(default)s)")
+
+
+def generator_options(args):
+    """The synthetic_seconds keyword arguments from parsed add_generator_arguments options."""
+    return {
+        "seed": args.seed, "rate": args.rate, "ips": args.ips, "ip_exponent": args.ip_exponent,
+        "endpoints": args.endpoints, "endpoint_exponent": args.endpoint_exponent, "ua_mix": args.ua_mix,
+        "burst_every": args.burst_every, "burst_requests": args.burst_requests,
+        "burst_seconds": args.burst_seconds, "noise": args.noise, "start": args.start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("output", help="file to write (\"-\" for stdout, .gz to compress)")
+    add_generator_arguments(parser)
+    args = parser.parse_args()
+
+    summary = write_synthetic_log(args.output, parse_size(args.size), **generator_options(args))
+    if args.output != "-":
+        print(f"{args.output}: {summary['lines']:,} lines, {summary['bytes'] / 1024 ** 2:,.1f} MB, "
+              f"{summary['log_seconds']:,}s of traffic, generated in {summary['generate_seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
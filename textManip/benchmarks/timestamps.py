@@ -0,0 +1,45 @@
+"""
+Micro-benchmark: regex + strptime timestamp extraction vs TimestampParser.
+
+Run from the textManip directory:
+
+    python -m benchmarks.timestamps --repeat 200
+"""
+import argparse
+import time
+
+from timestamps import TimestampParser, extract_timestamp
+
+
+def time_parser(parse, lines):
+    start = time.perf_counter()
+    for line in lines:
+        parse(line)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("log_file", nargs="?", default="NodeJsApp.log")
+    parser.add_argument("--repeat", type=int, default=100, help="times to repeat the log's lines")
+    args = parser.parse_args()
+
+    with open(args.log_file, 'r') as file:
+        lines = file.readlines() * args.repeat
+
+    fast = TimestampParser()
+    assert [fast.parse(line) for line in lines[:5000]] == [extract_timestamp(line) for line in lines[:5000]]
+
+    fast = TimestampParser()
+    strptime_seconds = time_parser(extract_timestamp, lines)
+    fast_seconds = time_parser(fast.parse, lines)
+
+    print(f"{len(lines)} lines")
+    print(f"regex + strptime: {len(lines) / strptime_seconds:12,.0f} lines/s")
+    print(f"TimestampParser:  {len(lines) / fast_seconds:12,.0f} lines/s "
+          f"(format {fast.format}, {fast.fast_hits} fast, {fast.fallbacks} fallback)")
+    print(f"speedup:          {strptime_seconds / fast_seconds:12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
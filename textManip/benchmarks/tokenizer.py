@@ -0,0 +1,68 @@
+"""
+Per-field throughput of the regex extractors vs the combined access-log tokenizer.
+
+Run from the textManip directory:
+
+    python -m benchmarks.tokenizer --repeat 100
+"""
+import argparse
+import time
+
+from log_engine import (
+    ALL_FIELDS,
+    extract_endpoint,
+    extract_ip,
+    extract_status,
+    extract_user_agent,
+    parse_line,
+)
+from log_tokenizer import tokenize
+from timestamps import TimestampParser, extract_timestamp
+
+FIELD_EXTRACTORS = {
+    "endpoint": extract_endpoint,
+    "ip": extract_ip,
+    "timestamp": extract_timestamp,
+    "status": extract_status,
+    "user_agent": extract_user_agent,
+}
+
+
+def lines_per_second(func, lines):
+    start = time.perf_counter()
+    for line in lines:
+        func(line)
+    return len(lines) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("log_file", nargs="?", default="NodeJsApp.log")
+    parser.add_argument("--repeat", type=int, default=100, help="times to repeat the log's lines")
+    args = parser.parse_args()
+
+    with open(args.log_file, 'r') as file:
+        lines = file.readlines() * args.repeat
+    tokenized = sum(1 for line in lines if tokenize(line) is not None)
+    print(f"{len(lines)} lines, {tokenized / len(lines):.1%} in access-log format\n")
+
+    print(f"{'field':<12}{'per-field regex':>18}{'parse_line':>18}")
+    for field, extractor in FIELD_EXTRACTORS.items():
+        fields = frozenset([field])
+        parse_timestamp = TimestampParser()
+        regex_rate = lines_per_second(extractor, lines)
+        engine_rate = lines_per_second(lambda line: parse_line(line, 0, fields, parse_timestamp), lines)
+        print(f"{field:<12}{regex_rate:>18,.0f}{engine_rate:>18,.0f}")
+
+    def all_regexes(line):
+        for extractor in FIELD_EXTRACTORS.values():
+            extractor(line)
+
+    parse_timestamp = TimestampParser()
+    print(f"{'all fields':<12}{lines_per_second(all_regexes, lines):>18,.0f}"
+          f"{lines_per_second(lambda line: parse_line(line, 0, ALL_FIELDS, parse_timestamp), lines):>18,.0f}")
+    print(f"\ntokenize() alone: {lines_per_second(tokenize, lines):,.0f} lines/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Real-time burst alerting.
+
+A long-running asyncio service that reads access-log lines as they are written,
+keeps a sliding window of recent requests per IP (burst_windows.StreamingBurstTracker,
+with idle IPs evicted after a window) and emits an alert as soon as an IP has more
+than ``threshold`` requests within ``window_seconds`` of one another. Alerts are
+JSON lines on stdout:
+
+    {"ip": "197.159.135.110", "count": 51, "window": 10, "log_time": 1748945343, "line": 412}
+
+An IP is re-alerted at most once per ``cooldown`` seconds of log time.
+
+Line sources:
+
+    python burst_alerts.py --tail NodeJsApp.log            # follow a file (handles rotation)
+    python burst_alerts.py --listen 127.0.0.1:5140         # lines sent over TCP
+    python burst_alerts.py --listen /tmp/bursts.sock       # ... or a Unix socket
+    tail -F NodeJsApp.log | python burst_alerts.py --stdin
+
+The replay harness feeds a log through a socket at ``--speedup`` times its original
+pace and reports the wall-clock delay from sending a line to alerting on it:
+
+    python burst_alerts.py --replay NodeJsApp.log --speedup 100 --threshold 50
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import stat
+import statistics
+import sys
+import time
+
+from burst_windows import DEFAULT_WINDOW_SECONDS, StreamingBurstTracker
+from log_engine import parse_line
+from timestamps import TimestampParser
+
+DEFAULT_THRESHOLD = 50
+POLL_SECONDS = 0.05
+QUEUE_LINES = 10000
+FIELDS = frozenset(["ip", "timestamp"])
+
+
+class BurstDetector:
+    """
+    Turns log lines into alerts.
+
+    Args:
+        window_seconds (int): Sliding window length.
+        threshold (int): Alert when an IP has more than this many requests within the
+            window before a request.
+        cooldown (int): Log-time seconds before the same IP can alert again
+            (default: one window).
+        on_alert (callable): Called with each alert dict.
+    """
+
+    def __init__(self, window_seconds=DEFAULT_WINDOW_SECONDS, threshold=DEFAULT_THRESHOLD, cooldown=None,
+                 on_alert=None):
+        self.window_seconds = window_seconds
+        self.threshold = threshold
+        self.cooldown = window_seconds if cooldown is None else cooldown
+        self.on_alert = on_alert or print_alert
+        self.tracker = StreamingBurstTracker(window_seconds, keep_results=False)
+        self.parse_timestamp = TimestampParser()
+        self.last_alert = {}
+        self.lines = 0
+        self.alerts = 0
+
+    def feed(self, line, line_number=None):
+        """Process one line; returns the alert it raised, if any."""
+        self.lines += 1
+        record = parse_line(line, line_number or self.lines, FIELDS, self.parse_timestamp)
+        if record.ip is None or record.timestamp is None:
+            return None
+        count = self.tracker.add(record.ip, record.timestamp)
+        if count <= self.threshold:
+            return None
+        previous = self.last_alert.get(record.ip)
+        if previous is not None and record.timestamp - previous < self.cooldown:
+            return None
+        self.last_alert[record.ip] = record.timestamp
+        if len(self.last_alert) > 2 * len(self.tracker.active) + 1024:
+            self._forget_quiet_ips(record.timestamp)
+        self.alerts += 1
+        alert = {
+            "ip": record.ip,
+            "count": count,
+            "window": self.window_seconds,
+            "log_time": record.timestamp,
+            "line": record.line_number,
+        }
+        self.on_alert(alert)
+        return alert
+
+    def _forget_quiet_ips(self, now):
+        self.last_alert = {ip: alerted for ip, alerted in self.last_alert.items()
+                           if now - alerted < self.cooldown}
+
+
+def print_alert(alert):
+    sys.stdout.write(json.dumps(alert) + "\n")
+    sys.stdout.flush()
+
+
+async def tail_lines(path, queue, from_start=False, poll_seconds=POLL_SECONDS):
+    """Put lines appended to ``path`` on ``queue``, reopening the file when it is rotated or truncated."""
+    file = open(path, 'r')
+    if not from_start:
+        file.seek(0, os.SEEK_END)
+    identity = os.fstat(file.fileno()).st_ino
+    pending = ''
+    try:
+        while True:
+            chunk = file.readline()
+            if chunk:
+                pending += chunk
+                if pending.endswith('\n'):
+                    await queue.put(pending)
+                    pending = ''
+                continue
+            await asyncio.sleep(poll_seconds)
+            try:
+                current = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if current.st_ino != identity or current.st_size < file.tell():
+                # Finish the old file (its first line completes any partial line read
+                # so far), then start on the new one from the top
+                for line in file:
+                    await queue.put(pending + line)
+                    pending = ''
+                if pending:
+                    # The old file ended (or was truncated) mid-line
+                    await queue.put(pending + '\n')
+                    pending = ''
+                file.close()
+                file = open(path, 'r')
+                identity = os.fstat(file.fileno()).st_ino
+    finally:
+        file.close()
+
+
+async def _read_stream(reader, queue):
+    while True:
+        line = await reader.readline()
+        if not line:
+            return
+        await queue.put(line.decode('utf-8', 'replace'))
+
+
+async def listen_lines(address, queue):
+    """Accept connections on "host:port" or a Unix socket path and put their lines on ``queue``."""
+    async def handle(reader, writer):
+        try:
+            await _read_stream(reader, queue)
+        finally:
+            writer.close()
+
+    if ':' in address and not address.startswith('/'):
+        host, port = address.rsplit(':', 1)
+        server = await asyncio.start_server(handle, host, int(port))
+    else:
+        server = await asyncio.start_unix_server(handle, address)
+    async with server:
+        await server.serve_forever()
+
+
+async def stdin_lines(queue):
+    loop = asyncio.get_running_loop()
+    if stat.S_ISREG(os.fstat(sys.stdin.fileno()).st_mode):
+        # Pipe transports refuse regular files (``< file``); those never block, so read them directly
+        for line in sys.stdin:
+            await queue.put(line)
+    else:
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        await _read_stream(reader, queue)
+    await queue.put(None)
+
+
+async def detect(queue, detector):
+    """Consume lines from ``queue`` until a None sentinel arrives."""
+    while True:
+        line = await queue.get()
+        if line is None:
+            return
+        detector.feed(line)
+
+
+async def run(source, detector):
+    """Run the detector on one source: ("tail", path), ("listen", address) or ("stdin", None)."""
+    queue = asyncio.Queue(QUEUE_LINES)
+    kind, target = source
+    if kind == "tail":
+        producer = tail_lines(target, queue)
+    elif kind == "listen":
+        producer = listen_lines(target, queue)
+    else:
+        producer = stdin_lines(queue)
+    consumer = asyncio.ensure_future(detect(queue, detector))
+    producer = asyncio.ensure_future(producer)
+    try:
+        await asyncio.wait([consumer, producer], return_when=asyncio.FIRST_EXCEPTION)
+        if producer.done() and producer.exception():
+            raise producer.exception()
+        await consumer
+    finally:
+        producer.cancel()
+        consumer.cancel()
+
+
+async def replay(log_file, speedup, detector, address="127.0.0.1:0"):
+    """
+    Send ``log_file`` to a listening detector at ``speedup`` times the pace implied by
+    its timestamps and measure how long each alert took from sending the line.
+
+    Lines are sent in file order; a timestamp earlier than the previous one (e.g.
+    runs concatenated out of order) is sent without delay.
+
+    Returns:
+        list: Detection latencies in seconds, one per alert.
+    """
+    sent = {}
+    latencies = []
+
+    def on_alert(alert):
+        latencies.append(time.perf_counter() - sent[alert["line"]])
+
+    detector.on_alert = on_alert
+    queue = asyncio.Queue(QUEUE_LINES)
+    consumer = asyncio.ensure_future(detect(queue, detector))
+
+    async def handle(reader, writer):
+        await _read_stream(reader, queue)
+        await queue.put(None)
+        writer.close()
+
+    host, port = address.rsplit(':', 1)
+    server = await asyncio.start_server(handle, host, int(port))
+    port = server.sockets[0].getsockname()[1]
+    _, writer = await asyncio.open_connection(host, port)
+
+    parse_timestamp = TimestampParser()
+    start = time.perf_counter()
+    previous = None
+    with open(log_file, 'r') as file:
+        for line_number, line in enumerate(file, 1):
+            timestamp = parse_timestamp(line)
+            if timestamp is not None:
+                if previous is None:
+                    previous = timestamp
+                if timestamp > previous:
+                    start += (timestamp - previous) / speedup
+                    previous = timestamp
+                    delay = start - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+            sent[line_number] = time.perf_counter()
+            writer.write(line.encode('utf-8'))
+            await writer.drain()
+    writer.close()
+    await consumer
+    server.close()
+    await server.wait_closed()
+    return latencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alert on per-IP request bursts as the log is written")
+    sources = parser.add_mutually_exclusive_group(required=True)
+    sources.add_argument("--tail", metavar="LOG", help="follow a log file")
+    sources.add_argument("--listen", metavar="ADDRESS", help="read lines from HOST:PORT or a Unix socket path")
+    sources.add_argument("--stdin", action="store_true", help="read lines from standard input")
+    sources.add_argument("--replay", metavar="LOG", help="replay a log through a socket and report latency")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW_SECONDS,
+                        help="window length in seconds (default: %(default)s)")
+    parser.add_argument("--threshold", type=int, default=DEFAULT_THRESHOLD,
+                        help="alert above this many requests in a window (default: %(default)s)")
+    parser.add_argument("--cooldown", type=int, help="seconds before an IP can alert again (default: one window)")
+    parser.add_argument("--speedup", type=float, default=100.0, help="replay speed multiplier (default: %(default)s)")
+    args = parser.parse_args()
+
+    detector = BurstDetector(args.window, args.threshold, args.cooldown)
+    if args.replay:
+        latencies = asyncio.run(replay(args.replay, args.speedup, detector))
+        print(f"Replayed {detector.lines} lines at {args.speedup:g}x: {len(latencies)} alerts")
+        if latencies:
+            latencies.sort()
+            p99 = latencies[math.ceil(0.99 * len(latencies)) - 1]
+            print(f"Detection latency: min {latencies[0] * 1000:.3f} ms, "
+                  f"median {statistics.median(latencies) * 1000:.3f} ms, "
+                  f"p99 {p99 * 1000:.3f} ms, max {latencies[-1] * 1000:.3f} ms")
+    else:
+        source = ("tail", args.tail) if args.tail else ("listen", args.listen) if args.listen else ("stdin", None)
+        try:
+            asyncio.run(run(source, detector))
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,227 @@
+"""
+Sliding-window helpers for per-IP request burst detection.
+"""
+from array import array
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+DEFAULT_WINDOW_SECONDS = 10
+DEFAULT_PROFILE_WINDOWS = (1, 10, 60, 300)
+
+# Per-IP burst statistics for several window lengths, each keyed by window seconds:
+#   maxima:     max requests after a request within the window (as max_requests_in_window)
+#   over:       {threshold: number of requests followed by more than ``threshold`` requests
+#               within the window}
+#   histograms: {bin lower bound: number of requests} where a request's bin is how many
+#               requests follow it within the window, in power-of-two bins (0, 1, 2-3, 4-7, ...)
+BurstProfile = namedtuple("BurstProfile", ["maxima", "over", "histograms"])
+
+
+def max_requests_in_window(timestamps, window_seconds=DEFAULT_WINDOW_SECONDS):
+    """
+    Return the maximum number of requests that follow a request within ``window_seconds``.
+
+    Uses two pointers over the sorted timestamps, so each timestamp is visited at
+    most twice regardless of how dense the traffic is.
+
+    Args:
+        timestamps (list): Sorted request timestamps in epoch seconds.
+        window_seconds (int): Window length; a request ``window_seconds`` after the
+            first one is still inside the window.
+
+    Returns:
+        int: Largest count of later requests within the window of any request, or 0.
+    """
+    best = 0
+    end = 0
+    total = len(timestamps)
+    for start, start_time in enumerate(timestamps):
+        if end <= start:
+            end = start + 1
+        limit = start_time + window_seconds
+        while end < total and timestamps[end] <= limit:
+            end += 1
+        if end - start - 1 > best:
+            best = end - start - 1
+    return best
+
+
+def burst_profile(timestamps, windows=DEFAULT_PROFILE_WINDOWS, thresholds=()):
+    """
+    Compute a BurstProfile for several windows in one pass over sorted timestamps.
+
+    Every window keeps its own end pointer into the shared array, advanced as in
+    max_requests_in_window. Requests that share a timestamp share a window end, so
+    the pass steps over runs of equal timestamps and adds each run's counts
+    (consecutive integers) to the maxima, threshold exceedances and histograms
+    arithmetically; per-window work follows the number of distinct seconds.
+
+    Args:
+        timestamps (list): Sorted request timestamps in epoch seconds.
+        windows (iterable): Window lengths in seconds.
+        thresholds (iterable): Request counts to report exceedances of.
+
+    Returns:
+        BurstProfile
+    """
+    windows = sorted(set(windows))
+    thresholds = sorted(set(thresholds))
+    total = len(timestamps)
+    ends = [0] * len(windows)
+    maxima = [0] * len(windows)
+    over = [[0] * len(thresholds) for _ in windows]
+    bins = [[0] * (total.bit_length() + 1) for _ in windows]
+
+    run_start = 0
+    while run_start < total:
+        run_time = timestamps[run_start]
+        run_end = run_start + 1
+        while run_end < total and timestamps[run_end] == run_time:
+            run_end += 1
+        for slot, window in enumerate(windows):
+            end = ends[slot]
+            if end < run_end:
+                end = run_end
+            limit = run_time + window
+            while end < total and timestamps[end] <= limit:
+                end += 1
+            ends[slot] = end
+            # The run's requests are followed by end - run_end ... end - run_start - 1 requests
+            low, high = end - run_end, end - run_start - 1
+            if high > maxima[slot]:
+                maxima[slot] = high
+            counts = over[slot]
+            for position, threshold in enumerate(thresholds):
+                if high <= threshold:
+                    break
+                counts[position] += high - (low if low > threshold else threshold + 1) + 1
+            counts = bins[slot]
+            if low == high:
+                counts[high.bit_length()] += 1
+                continue
+            for index in range(low.bit_length(), high.bit_length() + 1):
+                bin_low = 1 << index >> 1
+                bin_high = (1 << index) - 1
+                counts[index] += min(high, bin_high) - max(low, bin_low) + 1
+        run_start = run_end
+
+    return BurstProfile(
+        dict(zip(windows, maxima)),
+        {window: dict(zip(thresholds, counts)) for window, counts in zip(windows, over)},
+        {window: {(1 << index >> 1): count for index, count in enumerate(counts) if count}
+         for window, counts in zip(windows, bins)},
+    )
+
+
+class StreamingBurstTracker:
+    """
+    Bounded-memory burst tracker fed one request at a time.
+
+    Each active IP keeps only the timestamps that can still share a window with a
+    future request, stored as epoch seconds in an ``array('q')``. IPs idle for longer
+    than the window are evicted down to their best count, so peak memory follows the
+    number of concurrently active IPs rather than the total number of requests.
+
+    Results match ``max_requests_in_window`` over the full history as long as each
+    IP's requests arrive no more than ``reorder_seconds`` out of order. A request
+    further back in time than that (e.g. two log files concatenated out of order)
+    restarts that IP's buffer; windows spanning the jump are then not seen, and the
+    jump is counted in ``restarts`` so callers can warn about it.
+
+    Long-running callers that only need the live counts returned by ``add`` can set
+    ``keep_results=False`` so that evicted IPs are forgotten entirely.
+    """
+
+    def __init__(self, window_seconds=DEFAULT_WINDOW_SECONDS, reorder_seconds=1, keep_results=True):
+        self.window_seconds = window_seconds
+        self.reorder_seconds = reorder_seconds
+        self.keep_results = keep_results
+        self.retain_seconds = window_seconds + reorder_seconds
+        self.active = {}
+        self.best = {}
+        self.clock = None
+        self.next_sweep = None
+        self.peak_active = 0
+        self.restarts = 0
+
+    def add(self, ip, timestamp):
+        """
+        Record one request from ``ip`` at ``timestamp`` (epoch seconds).
+
+        Returns:
+            int: Requests from ``ip`` within the window before this one (for a late
+            arrival, the best count in the IP's buffer).
+        """
+        buffer = self.active.get(ip)
+        if buffer is None:
+            buffer = self.active[ip] = array('q')
+            if ip not in self.best:
+                self.best[ip] = 0
+            if len(self.active) > self.peak_active:
+                self.peak_active = len(self.active)
+
+        if not buffer or timestamp >= buffer[-1]:
+            buffer.append(timestamp)
+            expired = bisect_left(buffer, timestamp - self.retain_seconds)
+            if expired:
+                del buffer[:expired]
+            count = len(buffer) - bisect_left(buffer, timestamp - self.window_seconds) - 1
+        elif timestamp < buffer[-1] - self.reorder_seconds:
+            # Older than the buffer can answer exactly: the retained timestamps only go
+            # back retain_seconds from the newest, i.e. a window before the reorder limit
+            self.restarts += 1
+            buffer = self.active[ip] = array('q', [timestamp])
+            count = 0
+        else:
+            # Late arrival: the buffer is only a window's worth, so rescanning it is cheap
+            insort(buffer, timestamp)
+            count = max_requests_in_window(buffer, self.window_seconds)
+        if count > self.best[ip]:
+            self.best[ip] = count
+
+        if self.clock is None or timestamp > self.clock:
+            self.clock = timestamp
+            if self.next_sweep is None:
+                self.next_sweep = timestamp + self.retain_seconds
+            elif timestamp >= self.next_sweep:
+                self.evict_idle()
+        return count
+
+    def evict_idle(self):
+        """Drop the buffers of IPs whose newest request has left the retention window."""
+        cutoff = self.clock - self.retain_seconds
+        idle = [ip for ip, buffer in self.active.items() if buffer[-1] < cutoff]
+        for ip in idle:
+            del self.active[ip]
+            if not self.keep_results:
+                del self.best[ip]
+        self.next_sweep = self.clock + self.retain_seconds
+        return len(idle)
+
+    def results(self):
+        """Mapping of IP to the max requests after a request within the window."""
+        return dict(self.best)
+
+    def to_state(self):
+        """JSON-serialisable snapshot of the tracker, including open windows."""
+        return {
+            "window_seconds": self.window_seconds,
+            "reorder_seconds": self.reorder_seconds,
+            "active": {ip: buffer.tolist() for ip, buffer in self.active.items()},
+            "best": self.best,
+            "clock": self.clock,
+            "next_sweep": self.next_sweep,
+            "restarts": self.restarts,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild a tracker saved with ``to_state``."""
+        tracker = cls(state["window_seconds"], state["reorder_seconds"])
+        tracker.active = {ip: array('q', buffer) for ip, buffer in state["active"].items()}
+        tracker.best = dict(state["best"])
+        tracker.clock = state["clock"]
+        tracker.next_sweep = state["next_sweep"]
+        tracker.restarts = state["restarts"]
+        tracker.peak_active = len(tracker.active)
+        return tracker
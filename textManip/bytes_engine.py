@@ -0,0 +1,183 @@
+"""
+Bytes-mode parsing for log_engine.
+
+The text path decodes every line and translates its newline before any regex
+runs. Here the log is read in large binary blocks and lines in the NodeJsApp
+access-log format are matched with a bytes version of log_tokenizer's pattern;
+only the fields that become dict keys (endpoint, IP, user agent) are decoded, and
+each distinct value is decoded and interned once.
+
+Records are identical to the text path's for any log the text path can read.
+Lines it cannot vouch for (non-ASCII, other formats, malformed requests) are
+decoded and handed to ``parse_line``. Invalid UTF-8, which makes the text path
+fail with UnicodeDecodeError, is decoded with replacement characters instead.
+
+One difference: ``LogRecord.line`` is only filled in for lines that needed the
+text fallbacks or have no user agent (the only lines UserAgentCounter looks at);
+for the rest it is None.
+"""
+import locale
+import re
+import sys
+
+from log_engine import (
+    LogRecord,
+    extract_ip,
+    extract_user_agent,
+    parse_line,
+)
+from log_tokenizer import ACCESS_LINE
+from timestamps import TimestampParser, apache_epoch
+
+# Python's str-mode \s also matches the ASCII separators \x1c-\x1f, bytes-mode \s does not
+ACCESS_LINE_BYTES = re.compile(ACCESS_LINE.pattern.replace(r'\s', r'\s\x1c-\x1f').encode('ascii'))
+
+READ_BLOCK_BYTES = 8 * 1024 * 1024
+# Decoded-value caches are cleared when they grow past this many entries
+CACHE_ENTRIES = 100000
+
+_FALLBACK = object()
+
+
+class BytesLineParser:
+    """Parses raw lines (bytes, newline included) into LogRecords for a set of fields."""
+
+    def __init__(self, fields, encoding=None, parse_timestamp=None):
+        self.fields = fields
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        self.parse_timestamp = parse_timestamp or TimestampParser()
+        self.want_endpoint = "endpoint" in fields
+        self.want_ip = "ip" in fields
+        self.want_timestamp = "timestamp" in fields
+        self.want_status = "status" in fields
+        self.want_user_agent = "user_agent" in fields
+        self.endpoints = {}
+        self.ips = {}
+        self.user_agents = {}
+        self.clf_times = {}
+
+    def decode(self, raw):
+        return raw.decode(self.encoding, 'replace')
+
+    def _interned(self, cache, raw):
+        value = cache.get(raw)
+        if value is None:
+            if len(cache) >= CACHE_ENTRIES:
+                cache.clear()
+            value = cache[raw] = sys.intern(raw.decode('ascii'))
+        return value
+
+    def _user_agent(self, raw):
+        value = self.user_agents.get(raw)
+        if value is None:
+            if len(self.user_agents) >= CACHE_ENTRIES:
+                self.user_agents.clear()
+            user_agent = raw.decode('ascii').strip()
+            if not user_agent or user_agent.isdigit() or len(user_agent) < 2:
+                value = _FALLBACK
+            else:
+                value = sys.intern(user_agent)
+            self.user_agents[raw] = value
+        return value
+
+    def _timestamp(self, raw):
+        value = self.clf_times.get(raw)
+        if value is None:
+            if len(self.clf_times) >= CACHE_ENTRIES:
+                self.clf_times.clear()
+            epoch = apache_epoch(raw.decode('ascii')) if len(raw) >= 20 else None
+            value = self.clf_times[raw] = _FALLBACK if epoch is None else epoch
+        return value
+
+    def parse(self, raw, line_number):
+        match = ACCESS_LINE_BYTES.match(raw) if raw.isascii() else None
+        if match is None or match['path'] is None:
+            return parse_line(self.decode(raw), line_number, self.fields, self.parse_timestamp)
+
+        line = None
+        endpoint = ip = timestamp = status = user_agent = None
+        if self.want_endpoint:
+            endpoint = self._interned(self.endpoints, match['path'])
+        if self.want_ip:
+            if match['ipv4'] is not None:
+                ip = self._interned(self.ips, match['ipv4'])
+            else:
+                line = self.decode(raw)
+                ip = extract_ip(match['ip'].decode('ascii')) or extract_ip(line)
+        if self.want_timestamp:
+            timestamp = self._timestamp(match['clf_time'][:20])
+            if timestamp is _FALLBACK:
+                line = line or self.decode(raw)
+                timestamp = self.parse_timestamp(line)
+        if self.want_status:
+            status = int(match['status'])
+        if self.want_user_agent:
+            user_agent = self._user_agent(match['user_agent'])
+            if user_agent is _FALLBACK:
+                line = line or self.decode(raw)
+                user_agent = extract_user_agent(line)
+            if user_agent is None:
+                line = line or self.decode(raw)
+
+        return LogRecord(line_number, line, endpoint, ip, timestamp, status, user_agent)
+
+
+def complete_lines_end(data):
+    """
+    Offset just past the last complete line in a block, splitting like universal newlines.
+
+    Lines end at '\\n', '\\r\\n' or a lone '\\r'. A '\\r' at the very end of the block
+    does not count yet: it may be the first half of a '\\r\\n' in the next block. This
+    is the split the text path makes, for callers that track byte offsets.
+    """
+    return max(data.rfind(b'\n'), data.rfind(b'\r', 0, len(data) - 1)) + 1
+
+
+def split_lines(data, final=False):
+    """
+    Split a block into complete lines, with universal newlines translated to b'\\n'.
+
+    Returns:
+        tuple: (lines, unconsumed tail). With ``final`` the tail is returned as a last line.
+    """
+    cut = len(data) if final else complete_lines_end(data)
+    body = data[:cut]
+    if b'\r' in body:
+        body = body.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    return body.splitlines(keepends=True), data[cut:]
+
+
+def feed_bytes(blocks, aggregators, line_offset=0, parse_timestamp=None, encoding=None):
+    """
+    Bytes-mode equivalent of log_engine.feed_lines, taking an iterable of binary blocks.
+
+    Returns:
+        int: Number of lines processed.
+    """
+    fields = frozenset().union(*(aggregator.fields for aggregator in aggregators))
+    adders = [aggregator.add for aggregator in aggregators]
+    parse = BytesLineParser(fields, encoding, parse_timestamp).parse
+    line_number = line_offset
+    pending = b''
+    for block in blocks:
+        lines, pending = split_lines(pending + block)
+        for raw in lines:
+            line_number += 1
+            record = parse(raw, line_number)
+            for add in adders:
+                add(record)
+    if pending:
+        for raw in split_lines(pending, final=True)[0]:
+            line_number += 1
+            record = parse(raw, line_number)
+            for add in adders:
+                add(record)
+    return line_number - line_offset
+
+
+def read_blocks(file, block_bytes=READ_BLOCK_BYTES):
+    while True:
+        block = file.read(block_bytes)
+        if not block:
+            return
+        yield block
@@ -0,0 +1,297 @@
+"""
+Columnar export of parsed log records, for vectorised analysis without re-parsing.
+
+``ColumnBuilder`` is an engine aggregator that stores one row per log line:
+
+- ``endpoint``, ``ip`` and ``user_agent`` are dictionary-encoded: each distinct
+  string is stored once and rows hold int32 codes into it (MISSING_CODE if absent),
+- ``timestamp`` is int64 epoch seconds (MISSING_TIMESTAMP if absent),
+- ``status`` is int16 (MISSING_STATUS if absent).
+
+The resulting ``LogColumns`` can be saved as a NumPy ``.npz`` or a Parquet file (with
+dictionary-encoded string columns) and loaded back. ``endpoint_counts``,
+``user_agent_counts``, ``user_agent_categories`` and ``burst_windows`` recompute the
+analyzers' results from the columns with ``np.bincount``/``searchsorted``, giving the
+same numbers as the text pass in milliseconds.
+
+NumPy is needed for the vectorised functions and ``.npz`` files, pyarrow for Parquet;
+building the columns needs neither.
+
+Usage:
+
+    python columnar.py NodeJsApp.log --save NodeJsApp.npz
+    python columnar.py --load NodeJsApp.npz
+    python columnar.py NodeJsApp.log --save NodeJsApp.parquet
+"""
+import argparse
+import time
+from array import array
+
+from burst_windows import DEFAULT_WINDOW_SECONDS
+from compact_records import SymbolTable
+from log_engine import run_analysis
+from ua_classifier import UserAgentClassifier
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+STRING_COLUMNS = ("endpoint", "ip", "user_agent")
+MISSING_CODE = -1
+MISSING_TIMESTAMP = -(2 ** 63)
+MISSING_STATUS = -1
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("vectorised analysis and .npz files require numpy")
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet files require pyarrow")
+
+
+class LogColumns:
+    """
+    Column store of parsed records.
+
+    Attributes:
+        dictionaries (dict): Column name -> list of distinct strings, for STRING_COLUMNS.
+        codes (dict): Column name -> int32 codes into its dictionary, one per row.
+        timestamps: int64 epoch seconds per row.
+        status: int16 status code per row.
+
+    The sequences are ``array.array`` objects as built, or NumPy arrays after
+    ``to_numpy()`` / loading from a file.
+    """
+
+    def __init__(self, dictionaries, codes, timestamps, status):
+        self.dictionaries = dictionaries
+        self.codes = codes
+        self.timestamps = timestamps
+        self.status = status
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def to_numpy(self):
+        """Return the columns as NumPy arrays (sharing memory with array.array columns)."""
+        _require_numpy()
+        return LogColumns(
+            self.dictionaries,
+            {name: np.asarray(codes, dtype=np.int32) for name, codes in self.codes.items()},
+            np.asarray(self.timestamps, dtype=np.int64),
+            np.asarray(self.status, dtype=np.int16),
+        )
+
+    def save_npz(self, path):
+        _require_numpy()
+        columns = self.to_numpy()
+        arrays = {"timestamp": columns.timestamps, "status": columns.status}
+        for name in STRING_COLUMNS:
+            arrays[f"{name}_codes"] = columns.codes[name]
+            arrays[f"{name}_dictionary"] = np.array(self.dictionaries[name], dtype=str)
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load_npz(cls, path):
+        _require_numpy()
+        with np.load(path) as data:
+            return cls(
+                {name: data[f"{name}_dictionary"].tolist() for name in STRING_COLUMNS},
+                {name: data[f"{name}_codes"] for name in STRING_COLUMNS},
+                data["timestamp"],
+                data["status"],
+            )
+
+    def save_parquet(self, path):
+        _require_numpy()
+        _require_pyarrow()
+        columns = self.to_numpy()
+        table = {}
+        for name in STRING_COLUMNS:
+            codes = columns.codes[name]
+            indices = pa.array(codes, mask=codes == MISSING_CODE, type=pa.int32())
+            table[name] = pa.DictionaryArray.from_arrays(indices, pa.array(self.dictionaries[name], type=pa.string()))
+        table["timestamp"] = pa.array(columns.timestamps, mask=columns.timestamps == MISSING_TIMESTAMP,
+                                      type=pa.int64())
+        table["status"] = pa.array(columns.status, mask=columns.status == MISSING_STATUS, type=pa.int16())
+        pq.write_table(pa.table(table), path)
+
+    @classmethod
+    def load_parquet(cls, path):
+        _require_numpy()
+        _require_pyarrow()
+        table = pq.read_table(path).unify_dictionaries()
+        dictionaries = {}
+        codes = {}
+        for name in STRING_COLUMNS:
+            column = table.column(name).combine_chunks()
+            dictionaries[name] = column.dictionary.to_pylist()
+            codes[name] = column.indices.fill_null(MISSING_CODE).to_numpy().astype(np.int32)
+        timestamps = table.column("timestamp").fill_null(MISSING_TIMESTAMP).to_numpy()
+        status = table.column("status").fill_null(MISSING_STATUS).to_numpy().astype(np.int16)
+        return cls(dictionaries, codes, timestamps, status)
+
+    @classmethod
+    def load(cls, path):
+        return cls.load_parquet(path) if str(path).endswith(".parquet") else cls.load_npz(path)
+
+    def save(self, path):
+        if str(path).endswith(".parquet"):
+            self.save_parquet(path)
+        else:
+            self.save_npz(path)
+
+
+class ColumnBuilder:
+    """Engine aggregator that appends every record to dictionary-encoded columns."""
+
+    fields = frozenset(["endpoint", "ip", "timestamp", "status", "user_agent"])
+
+    def __init__(self):
+        self.lookups = {name: SymbolTable() for name in STRING_COLUMNS}
+        self.codes = {name: array('i') for name in STRING_COLUMNS}
+        self.timestamps = array('q')
+        self.status = array('h')
+
+    def _encode(self, name, value):
+        if value is None:
+            return MISSING_CODE
+        return self.lookups[name].intern(value)
+
+    def add(self, record):
+        self.codes["endpoint"].append(self._encode("endpoint", record.endpoint))
+        self.codes["ip"].append(self._encode("ip", record.ip))
+        self.codes["user_agent"].append(self._encode("user_agent", record.user_agent))
+        self.timestamps.append(MISSING_TIMESTAMP if record.timestamp is None else record.timestamp)
+        self.status.append(MISSING_STATUS if record.status is None else record.status)
+
+    def result(self):
+        return LogColumns({name: list(lookup) for name, lookup in self.lookups.items()},
+                          self.codes, self.timestamps, self.status)
+
+    def fresh(self):
+        return ColumnBuilder()
+
+    def partial(self):
+        return self.result()
+
+    def merge(self, columns, line_offset=0):
+        for name in STRING_COLUMNS:
+            remap = [self._encode(name, value) for value in columns.dictionaries[name]]
+            self.codes[name].extend(MISSING_CODE if code == MISSING_CODE else remap[code]
+                                    for code in columns.codes[name])
+        self.timestamps.extend(columns.timestamps)
+        self.status.extend(columns.status)
+
+
+def build_columns(filename, workers=1):
+    """Parse a log once into LogColumns."""
+    builder = ColumnBuilder()
+    run_analysis(filename, [builder], workers)
+    return builder.result()
+
+
+def _counts(columns, name):
+    _require_numpy()
+    codes = np.asarray(columns.codes[name])
+    dictionary = columns.dictionaries[name]
+    counts = np.bincount(codes[codes != MISSING_CODE], minlength=len(dictionary))
+    return dictionary, counts
+
+
+def endpoint_counts(columns):
+    """Requests per endpoint, as count_endpoints returns them."""
+    dictionary, counts = _counts(columns, "endpoint")
+    return {dictionary[code]: int(count) for code, count in enumerate(counts) if count}
+
+
+def user_agent_counts(columns):
+    """Requests per user agent, as analyze_user_agents returns them."""
+    dictionary, counts = _counts(columns, "user_agent")
+    return {dictionary[code]: int(count) for code, count in enumerate(counts) if count}
+
+
+def user_agent_categories(columns, classifier=None):
+    """Requests per user agent category, classifying each distinct user agent once."""
+    dictionary, counts = _counts(columns, "user_agent")
+    classify = (classifier or UserAgentClassifier()).classify
+    names = [classify(user_agent).category for user_agent in dictionary]
+    categories = {}
+    for name, count in zip(names, counts.tolist()):
+        if count:
+            categories[name] = categories.get(name, 0) + count
+    return categories
+
+
+def burst_windows(columns, window_seconds=DEFAULT_WINDOW_SECONDS):
+    """
+    Per-IP maximum requests within ``window_seconds`` after a request, as
+    analyze_ip_request_windows returns them.
+
+    Rows are sorted by (IP, timestamp) and packed into one int64 key per row with a
+    gap of more than a window between IPs, so a single ``searchsorted`` finds where
+    every request's window ends.
+    """
+    _require_numpy()
+    ips = np.asarray(columns.codes["ip"])
+    timestamps = np.asarray(columns.timestamps)
+    keep = (ips != MISSING_CODE) & (timestamps != MISSING_TIMESTAMP)
+    ips = ips[keep].astype(np.int64)
+    timestamps = timestamps[keep]
+    if not len(ips):
+        return {}
+
+    order = np.lexsort((timestamps, ips))
+    ips = ips[order]
+    offsets = timestamps[order] - timestamps.min()
+    stride = int(offsets.max()) + window_seconds + 1
+    keys = ips * stride + offsets
+    ends = np.searchsorted(keys, keys + window_seconds, side='right')
+    counts = ends - np.arange(len(keys)) - 1
+
+    starts = np.flatnonzero(np.r_[True, ips[1:] != ips[:-1]])
+    best = np.maximum.reduceat(counts, starts)
+    dictionary = columns.dictionaries["ip"]
+    return {dictionary[code]: int(count) for code, count in zip(ips[starts].tolist(), best.tolist())}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export parsed log records to columns and analyze them")
+    parser.add_argument("log_file", nargs="?", default="NodeJsApp.log")
+    parser.add_argument("--save", metavar="FILE", help="write the columns to FILE (.npz or .parquet)")
+    parser.add_argument("--load", metavar="FILE", help="analyze previously saved columns instead of a log")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW_SECONDS)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="parse with this many processes (0 = one per CPU)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.load:
+        columns = LogColumns.load(args.load)
+        print(f"Loaded {len(columns)} rows from {args.load} in {time.perf_counter() - start:.3f}s")
+    else:
+        columns = build_columns(args.log_file, args.workers or None)
+        print(f"Parsed {len(columns)} rows from {args.log_file} in {time.perf_counter() - start:.3f}s")
+        if args.save:
+            columns.save(args.save)
+            print(f"Saved to {args.save}")
+
+    start = time.perf_counter()
+    columns = columns.to_numpy()
+    endpoints = endpoint_counts(columns)
+    categories = user_agent_categories(columns)
+    windows = burst_windows(columns, args.window)
+    print(f"Recomputed from columns in {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(f"Endpoints: {len(endpoints)} unique, {sum(endpoints.values())} requests")
+    print(f"User agent categories: {categories}")
+    print(f"IPs: {len(windows)}, max burst {max(windows.values(), default=0)} in {args.window}s")
@@ -0,0 +1,261 @@
+"""
+Compact in-memory storage for parsed log records.
+
+A ``LogRecord`` holds its own line, endpoint, IP and user agent strings, so keeping
+millions of them costs several hundred bytes per request. ``RecordStore`` keeps the
+same information in struct-packed ``array`` columns instead:
+
+- endpoints and user agents are interned in a shared ``SymbolTable`` and stored as
+  int32 ids,
+- IPs are packed into integers (``pack_ip``: IPv4 as IPv4-mapped IPv6, so v4 and v6
+  share one 128-bit key space), interned in their own table and stored as int32 ids,
+- timestamps and line numbers are int64, status codes int16,
+
+about 30 bytes per request plus one entry per distinct string or IP. Rows are read
+back as ``CompactRecord`` objects (``__slots__``, ids rather than strings) or as
+full ``LogRecord`` objects.
+
+Example:
+    >>> store = RecordStore()
+    >>> run_analysis("NodeJsApp.log", [store])
+    >>> store.log_record(0).ip
+    '197.159.135.110'
+"""
+import ipaddress
+from array import array
+
+from log_engine import LogRecord
+
+MISSING_ID = -1
+MISSING_TIMESTAMP = -(2 ** 63)
+MISSING_STATUS = -1
+IPV4_MAPPED = 0xFFFF << 32
+
+
+def pack_ip(text):
+    """
+    Pack an IPv4 or IPv6 address into an int in the IPv6 address space.
+
+    Raises:
+        ValueError: If ``text`` is not an IP address.
+    """
+    parts = text.split('.')
+    # Octets with a leading zero are left to ipaddress, which rejects them as ambiguous
+    if len(parts) == 4 and all(part.isdigit() and len(part) <= 3 and (part[0] != '0' or len(part) == 1)
+                               for part in parts):
+        a, b, c, d = map(int, parts)
+        if a <= 255 and b <= 255 and c <= 255 and d <= 255:
+            return IPV4_MAPPED | a << 24 | b << 16 | c << 8 | d
+    address = ipaddress.ip_address(text)
+    return IPV4_MAPPED | int(address) if address.version == 4 else int(address)
+
+
+def unpack_ip(value):
+    """Inverse of ``pack_ip``; IPv4-mapped values come back in dotted form."""
+    if value >> 32 == 0xFFFF:
+        return str(ipaddress.IPv4Address(value & 0xFFFFFFFF))
+    return str(ipaddress.IPv6Address(value))
+
+
+def ip_key(value):
+    """A packed IP as a fixed 16-byte big-endian key (sortable, usable in bytes columns)."""
+    return value.to_bytes(16, 'big')
+
+
+class SymbolTable:
+    """
+    Interns values as dense integer ids.
+
+    Example:
+        >>> symbols = SymbolTable()
+        >>> symbols.intern("/favicon.ico"), symbols.intern("/"), symbols.intern("/favicon.ico")
+        (0, 1, 0)
+        >>> symbols[1]
+        '/'
+    """
+
+    __slots__ = ("ids", "values")
+
+    def __init__(self, values=()):
+        self.ids = {}
+        self.values = []
+        for value in values:
+            self.intern(value)
+
+    def intern(self, value):
+        """The id of ``value``, adding it if it is new."""
+        symbol = self.ids.get(value)
+        if symbol is None:
+            symbol = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return symbol
+
+    def get(self, value, default=None):
+        """The id of ``value`` if it has one."""
+        return self.ids.get(value, default)
+
+    def __getitem__(self, symbol):
+        return self.values[symbol]
+
+    def __len__(self):
+        return len(self.values)
+
+    def __contains__(self, value):
+        return value in self.ids
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __getstate__(self):
+        # The id map is rebuilt on load, halving what workers send back
+        return self.values
+
+    def __setstate__(self, values):
+        self.values = []
+        self.ids = {}
+        for value in values:
+            self.intern(value)
+
+
+class CompactRecord:
+    """
+    One stored request. ``endpoint`` and ``user_agent`` are symbol ids, ``ip`` an IP
+    table id; missing fields are None.
+    """
+
+    __slots__ = ("line_number", "endpoint", "ip", "timestamp", "status", "user_agent")
+
+    def __init__(self, line_number, endpoint, ip, timestamp, status, user_agent):
+        self.line_number = line_number
+        self.endpoint = endpoint
+        self.ip = ip
+        self.timestamp = timestamp
+        self.status = status
+        self.user_agent = user_agent
+
+    def __repr__(self):
+        return (f"CompactRecord(line_number={self.line_number}, endpoint={self.endpoint}, ip={self.ip}, "
+                f"timestamp={self.timestamp}, status={self.status}, user_agent={self.user_agent})")
+
+
+def _optional(value, missing):
+    return None if value == missing else value
+
+
+class RecordStore:
+    """
+    Engine aggregator that keeps every record in packed columns.
+
+    Args:
+        symbols (SymbolTable): Table for endpoint and user agent strings, e.g. one
+            shared with another store (default: a new table).
+
+    Attributes:
+        symbols (SymbolTable): Endpoint and user agent strings.
+        ips (SymbolTable): Packed IPs (``pack_ip``); text that is not a valid address
+            is kept as the original string.
+    """
+
+    fields = frozenset(["endpoint", "ip", "timestamp", "status", "user_agent"])
+
+    def __init__(self, symbols=None):
+        self.symbols = symbols if symbols is not None else SymbolTable()
+        self.ips = SymbolTable()
+        self.line_numbers = array('q')
+        self.endpoints = array('i')
+        self.ip_ids = array('i')
+        self.timestamps = array('q')
+        self.status = array('h')
+        self.user_agents = array('i')
+        # Parsing an address costs more than a dict lookup, so remember the last few
+        self._recent_ips = {}
+
+    def _ip_id(self, text):
+        if text is None:
+            return MISSING_ID
+        symbol = self._recent_ips.get(text)
+        if symbol is None:
+            try:
+                packed = pack_ip(text)
+            except ValueError:
+                packed = text
+            symbol = self.ips.intern(packed)
+            if len(self._recent_ips) >= 4096:
+                self._recent_ips.clear()
+            self._recent_ips[text] = symbol
+        return symbol
+
+    def _symbol(self, text):
+        return MISSING_ID if text is None else self.symbols.intern(text)
+
+    def add(self, record):
+        self.line_numbers.append(record.line_number)
+        self.endpoints.append(self._symbol(record.endpoint))
+        self.ip_ids.append(self._ip_id(record.ip))
+        self.timestamps.append(MISSING_TIMESTAMP if record.timestamp is None else record.timestamp)
+        self.status.append(MISSING_STATUS if record.status is None else record.status)
+        self.user_agents.append(self._symbol(record.user_agent))
+
+    def __len__(self):
+        return len(self.line_numbers)
+
+    def __getitem__(self, row):
+        return CompactRecord(
+            self.line_numbers[row],
+            _optional(self.endpoints[row], MISSING_ID),
+            _optional(self.ip_ids[row], MISSING_ID),
+            _optional(self.timestamps[row], MISSING_TIMESTAMP),
+            _optional(self.status[row], MISSING_STATUS),
+            _optional(self.user_agents[row], MISSING_ID),
+        )
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def ip_text(self, ip_id):
+        """The address string of an IP table id, in canonical form (2001:db8::1)."""
+        packed = self.ips[ip_id]
+        return packed if isinstance(packed, str) else unpack_ip(packed)
+
+    def log_record(self, row):
+        """
+        Row ``row`` as a LogRecord with its strings restored. ``line`` is not kept, and
+        IPs come back in canonical form.
+        """
+        record = self[row]
+        return LogRecord(
+            record.line_number,
+            None,
+            None if record.endpoint is None else self.symbols[record.endpoint],
+            None if record.ip is None else self.ip_text(record.ip),
+            record.timestamp,
+            record.status,
+            None if record.user_agent is None else self.symbols[record.user_agent],
+        )
+
+    def nbytes(self):
+        """Bytes held by the per-request columns (excluding the symbol and IP tables)."""
+        columns = (self.line_numbers, self.endpoints, self.ip_ids, self.timestamps, self.status, self.user_agents)
+        return sum(column.itemsize * len(column) for column in columns)
+
+    def result(self):
+        return self
+
+    def fresh(self):
+        return RecordStore()
+
+    def partial(self):
+        self._recent_ips = {}
+        return self
+
+    def merge(self, store, line_offset=0):
+        symbols = [self.symbols.intern(value) for value in store.symbols]
+        ips = [self.ips.intern(value) for value in store.ips]
+        self.line_numbers.extend(line_number + line_offset for line_number in store.line_numbers)
+        self.endpoints.extend(MISSING_ID if symbol == MISSING_ID else symbols[symbol] for symbol in store.endpoints)
+        self.ip_ids.extend(MISSING_ID if symbol == MISSING_ID else ips[symbol] for symbol in store.ip_ids)
+        self.timestamps.extend(store.timestamps)
+        self.status.extend(store.status)
+        self.user_agents.extend(MISSING_ID if symbol == MISSING_ID else symbols[symbol]
+                                for symbol in store.user_agents)
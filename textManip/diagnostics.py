@@ -0,0 +1,37 @@
+"""
+Logging sinks for analyzer diagnostics that keep I/O out of the parsing loop.
+
+``start_background_logging`` hands records to a queue that a separate thread
+drains into the real handler, so the caller never waits on the terminal or disk.
+
+Example:
+    >>> logger = logging.getLogger("textManip")
+    >>> listener = start_background_logging(logger, logging.FileHandler("diagnostics.log"))
+    >>> ...  # analyze
+    >>> listener.stop()  # flushes the queue
+"""
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+LOGGER_NAME = "textManip"
+
+
+def get_logger(name=None):
+    """The package logger, or a child of it (e.g. "user_agents")."""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}" if name else LOGGER_NAME)
+
+
+def start_background_logging(logger, handler, level=logging.DEBUG):
+    """
+    Route ``logger``'s records through a queue to ``handler`` on a background thread.
+
+    Returns:
+        QueueListener: Call ``stop()`` when done to flush and join the thread.
+    """
+    records = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(records))
+    logger.setLevel(level)
+    listener = QueueListener(records, handler, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -1,7 +1,11 @@
-import re
+import argparse
 
+from log_engine import EndpointCounter, run_analysis
+from reporting import ReportWriter, add_report_arguments, open_output, top_items, write_rows
+from route_templates import RouteNormalizer, load_routes
 
-def count_endpoints(filename):
+
+def count_endpoints(filename, workers=1, normalize=False, routes=None):
     """
     Count the number of times each HTTP endpoint was accessed from a log file.
 
@@ -13,6 +17,14 @@ def count_endpoints(filename):
     ----------
     filename : str
         Path to the log file to be analyzed.
+    workers : int, optional
+        Number of processes to parse with (default 1, None for one per CPU).
+    normalize : bool, optional
+        Count per route template instead of per raw URL: query strings are dropped
+        and numeric/UUID/hex segments become ':id' (e.g. /users/123 -> /users/:id).
+    routes : list of str, optional
+        Route patterns such as "/users/:id/orders/:order_id" to match first.
+        Implies ``normalize``.
 
     Returns
     -------
@@ -24,32 +36,46 @@ def count_endpoints(filename):
     endpoint_counts = count_endpoints("access.log")
     print(endpoint_counts)
     """
-    endpoint_count = {}
+    normalizer = RouteNormalizer(routes or ()) if normalize or routes else None
+    counter = EndpointCounter(normalizer)
+    run_analysis(filename, [counter], workers)
+    return counter.result()
 
-    # Pattern to extract HTTP method and endpoint from log
-    # Matches: "GET /path/to/endpoint HTTP/1.1" or "POST /api/users HTTP/1.1"
-    endpoint_pattern = r'"[A-Z]+ ([^\s]+) HTTP'
 
-    with open(filename, "r") as file:
-        for line in file:
-            match = re.search(endpoint_pattern, line)
-            if match:
-                endpoint = match.group(1)
-                if endpoint in endpoint_count:
-                    endpoint_count[endpoint] += 1
-                else:
-                    endpoint_count[endpoint] = 1
+def display_endpoint_counts(endpoint_counts, top_n=None, threshold=None, fmt="text", out=None):
+    """
+    Report endpoint counts, highest first.
 
-    return endpoint_count
+    Args:
+        endpoint_counts (dict): Result of count_endpoints.
+        top_n (int): Only the ``top_n`` busiest endpoints.
+        threshold (int): Only endpoints with at least this many requests.
+        fmt (str): "text", "jsonl" or "csv".
+        out: Text stream (default: stdout).
+    """
+    ranked = top_items(endpoint_counts, top_n, threshold)
+    if fmt != "text":
+        write_rows(ranked, ("endpoint", "count"), fmt, out)
+        return
+    with ReportWriter(out) as writer:
+        for endpoint, count in ranked:
+            writer.line(f"{endpoint}: {count}")
 
 
 # Usage
 if __name__ == "__main__":
-    log_file = "NodeJsApp.log"
-    results = count_endpoints(log_file)
-
-    # Sort by access count (highest first)
-    sorted_endpoints = sorted(results.items(), key=lambda x: x[1], reverse=True)
+    parser = argparse.ArgumentParser(description="Count requests per endpoint")
+    parser.add_argument("log_file", nargs="?", default="NodeJsApp.log")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="parse with this many processes (0 = one per CPU)")
+    parser.add_argument("--normalize", action="store_true",
+                        help="count per route template (/users/:id) instead of per URL")
+    parser.add_argument("--routes", help="file of route patterns to match, one per line")
+    add_report_arguments(parser)
+    args = parser.parse_args()
+    routes = load_routes(args.routes) if args.routes else None
+    results = count_endpoints(args.log_file, args.workers or None, args.normalize, routes)
 
-    for endpoint, count in sorted_endpoints:
-        print(f"{endpoint}: {count}")
+    # Highest access count first
+    with open_output(args.output) as out:
+        display_endpoint_counts(results, args.top, args.threshold, args.format, out)
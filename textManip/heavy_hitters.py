@@ -0,0 +1,293 @@
+"""
+Approximate top-K counting for endpoints, IPs and user agents in fixed memory.
+
+The exact counters in log_engine keep one dict entry per distinct key, which grows
+without bound when a scanner requests millions of unique URLs. The summaries here
+keep a fixed number of counters instead and report an error bound with each count:
+
+- ``SpaceSaving`` (Metwally et al.): ``capacity`` monitored keys. Any key with a true
+  count above N / capacity is guaranteed to be monitored, and each reported count
+  overestimates the true count by at most the reported ``error``.
+- ``CountMinSketch`` with a top-K heap: a ``depth`` x ``width`` table of counters
+  (with conservative update). Estimates never underestimate, and for any given key
+  overestimate by at most e/width * N with probability 1 - e^-depth.
+
+Usage:
+
+    python heavy_hitters.py NodeJsApp.log --field endpoint --top 10
+    python heavy_hitters.py big.log --field user_agent --method cms --capacity 4096
+"""
+import argparse
+import hashlib
+import heapq
+import math
+from array import array
+from collections import namedtuple
+
+from log_engine import run_analysis
+
+# ``count`` is the estimate; the true count lies in [count - error, count]
+HeavyHitter = namedtuple("HeavyHitter", ["key", "count", "error"])
+
+FIELDS = ("endpoint", "ip", "user_agent")
+
+
+class SpaceSaving:
+    """
+    Space-Saving summary using the stream-summary layout: keys are grouped in buckets
+    by count, so incrementing a key and replacing the minimum are both O(1).
+    """
+
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.total = 0
+        self.counts = {}
+        self.errors = {}
+        self.buckets = {}
+        self.min_count = 0
+
+    def _move(self, key, old_count, new_count):
+        bucket = self.buckets[old_count]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[old_count]
+            if old_count == self.min_count:
+                self.min_count = new_count
+        self.buckets.setdefault(new_count, {})[key] = None
+        self.counts[key] = new_count
+
+    def add(self, key, count=1):
+        self.total += count
+        current = self.counts.get(key)
+        if current is not None:
+            self._move(key, current, current + count)
+            if count > 1:
+                self.min_count = min(self.buckets)
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[key] = count
+            self.errors[key] = 0
+            self.buckets.setdefault(count, {})[key] = None
+            if len(self.counts) == 1 or count < self.min_count:
+                self.min_count = count
+            return
+        # Replace a key with the minimum count; the newcomer inherits it as error
+        evicted = next(iter(self.buckets[self.min_count]))
+        floor = self.min_count
+        del self.errors[evicted]
+        self.counts[key] = floor
+        del self.counts[evicted]
+        bucket = self.buckets[floor]
+        del bucket[evicted]
+        bucket[key] = None
+        self.errors[key] = floor
+        self._move(key, floor, floor + count)
+        if count > 1:
+            self.min_count = min(self.buckets)
+
+    def top(self, k):
+        """The ``k`` keys with the highest estimated counts, as HeavyHitter tuples."""
+        best = heapq.nlargest(k, self.counts.items(), key=lambda item: item[1])
+        return [HeavyHitter(key, count, self.errors[key]) for key, count in best]
+
+    def merge(self, other):
+        """
+        Fold another summary into this one. Keys missing from a full summary may have
+        had up to its minimum count there, which is added to their error.
+        """
+        floor_self = self.min_count if len(self.counts) >= self.capacity else 0
+        floor_other = other.min_count if len(other.counts) >= other.capacity else 0
+        counts = {}
+        errors = {}
+        for key in set(self.counts) | set(other.counts):
+            counts[key] = self.counts.get(key, floor_self) + other.counts.get(key, floor_other)
+            errors[key] = self.errors.get(key, floor_self) + other.errors.get(key, floor_other)
+        total = self.total + other.total
+        self.__init__(self.capacity)
+        for key, count in heapq.nlargest(self.capacity, counts.items(), key=lambda item: item[1]):
+            self.counts[key] = count
+            self.errors[key] = errors[key]
+            self.buckets.setdefault(count, {})[key] = None
+        self.min_count = min(self.buckets) if self.buckets else 0
+        self.total = total
+
+
+class CountMinSketch:
+    """
+    Count-Min sketch plus a size-K min-heap of the keys with the largest estimates.
+
+    Hashes come from blake2b rather than ``hash()`` so that sketches built in
+    different processes can be merged.
+    """
+
+    def __init__(self, width, depth=4, k=10):
+        if not 1 <= depth <= 16:
+            raise ValueError("depth must be between 1 and 16")
+        self.width = width
+        self.depth = depth
+        self.k = k
+        self.total = 0
+        self.rows = [array('q', bytes(8 * width)) for _ in range(depth)]
+        self.candidates = {}
+        self.heap = []
+
+    @classmethod
+    def for_error(cls, epsilon, delta, k=10):
+        """Size a sketch so estimates exceed true counts by at most epsilon*N with probability 1-delta."""
+        return cls(math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta)), k)
+
+    @property
+    def error_bound(self):
+        """Additive error (in requests) that holds with probability ``1 - confidence``."""
+        return math.e / self.width * self.total
+
+    @property
+    def confidence(self):
+        return 1 - math.exp(-self.depth)
+
+    def _columns(self, key):
+        # One independent 32-bit hash per row, all cut from a single digest
+        digest = hashlib.blake2b(key.encode('utf-8', 'surrogatepass'), digest_size=4 * self.depth).digest()
+        return [int.from_bytes(digest[4 * row:4 * row + 4], 'little') % self.width
+                for row in range(self.depth)]
+
+    def estimate(self, key):
+        return min(row[column] for row, column in zip(self.rows, self._columns(key)))
+
+    def add(self, key, count=1):
+        self.total += count
+        cells = list(zip(self.rows, self._columns(key)))
+        # Conservative update: only raise counters that are below the new estimate,
+        # which keeps estimates as upper bounds but cuts collision noise considerably
+        estimate = min(row[column] for row, column in cells) + count
+        for row, column in cells:
+            if row[column] < estimate:
+                row[column] = estimate
+        self._offer(key, estimate)
+
+    def _offer(self, key, estimate):
+        if key in self.candidates:
+            # Heap entries may lag behind; they are refreshed lazily when popped
+            self.candidates[key] = estimate
+            return
+        if len(self.candidates) < self.k:
+            self.candidates[key] = estimate
+            heapq.heappush(self.heap, (estimate, key))
+            return
+        while True:
+            smallest, smallest_key = self.heap[0]
+            current = self.candidates[smallest_key]
+            if current == smallest:
+                break
+            heapq.heapreplace(self.heap, (current, smallest_key))
+        if estimate > smallest:
+            heapq.heapreplace(self.heap, (estimate, key))
+            del self.candidates[smallest_key]
+            self.candidates[key] = estimate
+
+    def top(self, k=None):
+        """The top keys by estimated count, as HeavyHitter tuples with the probabilistic error bound."""
+        bound = int(math.ceil(self.error_bound))
+        best = heapq.nlargest(k or self.k, self.candidates.items(), key=lambda item: item[1])
+        return [HeavyHitter(key, count, min(bound, count)) for key, count in best]
+
+    def merge(self, other):
+        """Add another sketch of the same shape into this one."""
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("can only merge sketches of the same width and depth")
+        for row, other_row in zip(self.rows, other.rows):
+            for column, value in enumerate(other_row):
+                if value:
+                    row[column] += value
+        self.total += other.total
+        keys = set(self.candidates) | set(other.candidates)
+        self.candidates = {}
+        self.heap = []
+        for key in keys:
+            self._offer(key, self.estimate(key))
+
+
+def new_summary(method, capacity, k):
+    if method == "space-saving":
+        return SpaceSaving(capacity)
+    if method == "cms":
+        return CountMinSketch(capacity, k=k)
+    raise ValueError(f"unknown method: {method}")
+
+
+class HeavyHitterAggregator:
+    """
+    Engine aggregator that keeps an approximate top-K of one record field
+    ("endpoint", "ip" or "user_agent") in fixed memory.
+    """
+
+    def __init__(self, field, k=10, capacity=1000, method="space-saving"):
+        if field not in FIELDS:
+            raise ValueError(f"field must be one of {', '.join(FIELDS)}")
+        self.field = field
+        self.fields = frozenset([field])
+        self.k = k
+        self.capacity = capacity
+        self.method = method
+        self.summary = new_summary(method, capacity, k)
+
+    def add(self, record):
+        key = getattr(record, self.field)
+        if key is not None:
+            self.summary.add(key)
+
+    def result(self):
+        return self.summary.top(self.k)
+
+    def fresh(self):
+        return HeavyHitterAggregator(self.field, self.k, self.capacity, self.method)
+
+    def partial(self):
+        return self.summary
+
+    def merge(self, summary, line_offset=0):
+        self.summary.merge(summary)
+
+
+def approximate_top_k(filename, field, k=10, capacity=1000, method="space-saving", workers=1):
+    """
+    Approximate the ``k`` most frequent values of a field in fixed memory.
+
+    Args:
+        filename (str): Path to the log file.
+        field (str): "endpoint", "ip" or "user_agent".
+        k (int): Number of heavy hitters to return.
+        capacity (int): Counters to keep (Space-Saving) or sketch width (Count-Min).
+        method (str): "space-saving" or "cms".
+        workers (int): Processes to parse with (None for one per CPU).
+
+    Returns:
+        list: HeavyHitter(key, count, error) tuples, highest count first. For
+        Space-Saving the true count is within [count - error, count]; for Count-Min
+        this holds with the sketch's confidence (1 - e^-depth).
+    """
+    aggregator = HeavyHitterAggregator(field, k, capacity, method)
+    run_analysis(filename, [aggregator], workers)
+    return aggregator.result()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Approximate top-K endpoints, IPs or user agents")
+    parser.add_argument("log_file", nargs="?", default="NodeJsApp.log")
+    parser.add_argument("--field", choices=FIELDS, default="endpoint")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--capacity", type=int, default=1000,
+                        help="counters kept (space-saving) or sketch width (cms)")
+    parser.add_argument("--method", choices=["space-saving", "cms"], default="space-saving")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="parse with this many processes (0 = one per CPU)")
+    args = parser.parse_args()
+
+    hitters = approximate_top_k(args.log_file, args.field, args.top, args.capacity, args.method,
+                                args.workers or None)
+    print(f"Approximate top {args.top} {args.field} values ({args.method}, capacity {args.capacity})")
+    print("=" * 60)
+    for hitter in hitters:
+        print(f"{hitter.count:>10} (+/- {hitter.error})  {hitter.key}")
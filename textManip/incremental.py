@@ -0,0 +1,271 @@
+"""
+Incremental (follow) mode for the textManip analyzers.
+
+Each run parses only the bytes appended to the log since the previous run. The
+byte offset, the file's device/inode and first bytes, and the partial aggregates (endpoint counts,
+user agent counts and the open burst windows) are kept in a JSON state file, so
+the cost of a run follows the volume of new data rather than the size of the log.
+
+Log rotation is detected from the inode and the file's first bytes (a new log
+can reuse the inode of one that was rotated and compressed): the unread tail of
+the rotated file is finished before the new file is read from the start. The
+rotated file is looked for at ``<log>.1``, or at ``<log>.1.gz`` (``.bz2``, ``.xz``,
+``.zst``) if it was compressed as it was rotated; a copy left by copytruncate is
+found the same way. If none is there, a note is printed and its unread tail is
+skipped.
+
+Burst counts use burst_windows.StreamingBurstTracker, which only keeps a window
+plus ``--reorder`` seconds of each IP's requests. Requests that arrive further out
+of order than that make the counts lower than a full run's; the number of such
+jumps is kept in the state and reported as a note on stderr.
+
+Usage (e.g. from cron):
+
+    python incremental.py NodeJsApp.log --state NodeJsApp.state.json
+    python incremental.py NodeJsApp.log --interval 30     # keep following
+    python incremental.py NodeJsApp.log --reorder 3600    # tolerate an hour of disorder
+"""
+import argparse
+import io
+import json
+import locale
+import os
+import sys
+import time
+
+from burst_windows import DEFAULT_WINDOW_SECONDS, StreamingBurstTracker
+from bytes_engine import complete_lines_end
+from log_engine import (
+    EndpointCounter,
+    EngineStats,
+    StreamingBurstAggregator,
+    UserAgentCounter,
+    feed_lines,
+)
+from log_sources import open_binary
+from timestamps import TimestampParser
+
+STATE_VERSION = 1
+READ_BLOCK_BYTES = 8 * 1024 * 1024
+ROTATED_SUFFIXES = ("", ".gz", ".bz2", ".xz", ".zst")
+HEAD_BYTES = 64
+
+
+def load_state(state_file):
+    """Return the saved state, or None if there is none yet."""
+    try:
+        with open(state_file, 'r') as file:
+            state = json.load(file)
+    except FileNotFoundError:
+        return None
+    if state.get("version") != STATE_VERSION:
+        return None
+    return state
+
+
+def save_state(state_file, state):
+    """Write the state atomically so an interrupted run never leaves a torn file."""
+    temp_file = f"{state_file}.tmp"
+    with open(temp_file, 'w') as file:
+        json.dump(state, file)
+    os.replace(temp_file, state_file)
+
+
+def _file_id(stat_result):
+    return [stat_result.st_dev, stat_result.st_ino]
+
+
+def _feed_blocks(file, aggregators, line_offset, parse_timestamp, to_eof=False):
+    """
+    Feed the complete lines read from ``file`` to the aggregators, in large blocks.
+
+    Lines are split like the text path's universal newlines. A trailing line without
+    a newline, or ending in a '\r' that may still become '\r\n', is left for the next
+    run (it may still be being written) unless ``to_eof`` is set.
+
+    Returns:
+        tuple: (lines processed, bytes processed)
+    """
+    encoding = locale.getpreferredencoding(False)
+    lines = read = 0
+    pending = b''
+    while True:
+        block = file.read(READ_BLOCK_BYTES)
+        if not block:
+            break
+        data = pending + block
+        cut = complete_lines_end(data)
+        pending = data[cut:]
+        if cut:
+            text = io.StringIO(data[:cut].decode(encoding), newline=None)
+            lines += feed_lines(text, aggregators, line_offset + lines, parse_timestamp)
+            read += cut
+    if to_eof and pending:
+        text = io.StringIO(pending.decode(encoding), newline=None)
+        lines += feed_lines(text, aggregators, line_offset + lines, parse_timestamp)
+        read += len(pending)
+    return lines, read
+
+
+def _read_from(path, offset, aggregators, line_offset, parse_timestamp, to_eof=False):
+    """
+    Feed the complete lines after ``offset`` in ``path`` to the aggregators.
+
+    Returns:
+        tuple: (new offset, lines processed, bytes processed)
+    """
+    with open(path, 'rb') as file:
+        file.seek(offset)
+        lines, read = _feed_blocks(file, aggregators, line_offset, parse_timestamp, to_eof)
+    return offset + read, lines, read
+
+
+def _head(path, offset):
+    """The first bytes of ``path`` (at most ``offset``), to recognise it once compressed."""
+    with open(path, 'rb') as file:
+        return file.read(min(HEAD_BYTES, offset))
+
+
+def _skip_to(file, offset, head):
+    """Read up to ``offset``; False if the stream does not start with ``head`` or ends first."""
+    if file.read(len(head)) != head:
+        return False
+    size = offset - len(head)
+    while size:
+        block = file.read(min(size, READ_BLOCK_BYTES))
+        if not block:
+            return False
+        size -= len(block)
+    return True
+
+
+def _finish_rotated(filename, file_id, head, offset, aggregators, line_offset, parse_timestamp):
+    """
+    Feed what was appended to the log after ``offset`` before it was rotated.
+
+    A member with the old inode is the log itself, moved. Otherwise (compressed
+    or copied) a member is taken if it decompresses to at least ``offset`` bytes
+    starting with the ``head`` bytes saved from the old file.
+
+    Returns:
+        tuple: (lines processed, bytes processed), or None if the rotated file was not found
+    """
+    for suffix in ROTATED_SUFFIXES:
+        rotated = f"{filename}.1{suffix}"
+        if not os.path.exists(rotated):
+            continue
+        if _file_id(os.stat(rotated)) == file_id:
+            _, lines, read = _read_from(rotated, offset, aggregators, line_offset, parse_timestamp, to_eof=True)
+            return lines, read
+        if head:
+            with open(rotated, 'rb') as raw:
+                file = open_binary(raw)
+                if _skip_to(file, offset, head):
+                    return _feed_blocks(file, aggregators, line_offset, parse_timestamp, to_eof=True)
+    return None
+
+
+def follow_log(filename, state_file, window_seconds=DEFAULT_WINDOW_SECONDS, reorder_seconds=1):
+    """
+    Process the part of ``filename`` appended since the last run and update ``state_file``.
+
+    Args:
+        filename (str): Path to the log file.
+        state_file (str): JSON file holding offsets and partial aggregates between runs.
+        window_seconds (int): Burst window length; changing it resets the state.
+        reorder_seconds (int): How far out of order an IP's requests may arrive and
+            still be counted exactly; changing it resets the state.
+
+    Returns:
+        tuple: (endpoint_counts, ip_windows, user_agent_counts, EngineStats) where the
+        counts cover everything seen so far and the stats cover only this run.
+    """
+    start = time.perf_counter()
+    state = load_state(state_file)
+    if state is not None and (state["bursts"]["window_seconds"] != window_seconds
+                              or state["bursts"]["reorder_seconds"] != reorder_seconds):
+        state = None
+
+    endpoints = EndpointCounter()
+    user_agents = UserAgentCounter()
+    bursts = StreamingBurstAggregator(window_seconds, reorder_seconds)
+    offset = lines_seen = 0
+    if state is not None:
+        endpoints.counts.update(state["endpoint_counts"])
+        user_agents.counts.update(state["user_agent_counts"])
+        user_agents.total_lines = state["lines"]
+        bursts.tracker = StreamingBurstTracker.from_state(state["bursts"])
+        offset, lines_seen = state["offset"], state["lines"]
+
+    aggregators = [endpoints, bursts, user_agents]
+    parse_timestamp = TimestampParser()
+    current = os.stat(filename)
+    new_lines = new_bytes = 0
+    restarts = bursts.tracker.restarts
+
+    head = bytes.fromhex(state.get("head", "")) if state is not None else b''
+    if state is not None and (state["file_id"] != _file_id(current) or _head(filename, len(head)) != head):
+        # Rotated or truncated: finish whatever was appended to the old file before the move
+        finished = _finish_rotated(filename, state["file_id"], head, offset, aggregators, lines_seen,
+                                   parse_timestamp)
+        if finished is None:
+            print(f"NOTE: {filename} was rotated but {filename}.1 was not found; "
+                  "lines written to it since the last run were skipped", file=sys.stderr)
+        else:
+            lines, read = finished
+            lines_seen += lines
+            new_lines += lines
+            new_bytes += read
+        offset = 0
+    elif offset > current.st_size:
+        # Truncated in place
+        offset = 0
+
+    offset, lines, read = _read_from(filename, offset, aggregators, lines_seen, parse_timestamp)
+    lines_seen += lines
+    new_lines += lines
+    new_bytes += read
+
+    if bursts.tracker.restarts > restarts:
+        print(f"NOTE: {bursts.tracker.restarts} out-of-order jumps in follow mode; "
+              "counts may be lower than a full (non-streaming) run", file=sys.stderr)
+
+    save_state(state_file, {
+        "version": STATE_VERSION,
+        "file_id": _file_id(current),
+        "offset": offset,
+        "head": _head(filename, offset).hex(),
+        "lines": lines_seen,
+        "endpoint_counts": endpoints.counts,
+        "user_agent_counts": user_agents.counts,
+        "bursts": bursts.tracker.to_state(),
+    })
+
+    stats = EngineStats(new_lines, new_bytes, time.perf_counter() - start)
+    return endpoints.result(), bursts.result(), user_agents.result(), stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze only what was appended to a log since the last run")
+    parser.add_argument("log_file", nargs="?", default="NodeJsApp.log")
+    parser.add_argument("--state", help="state file (default: <log_file>.state.json)")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW_SECONDS,
+                        help="burst window length in seconds (default: %(default)s)")
+    parser.add_argument("--reorder", type=int, default=1,
+                        help="seconds an IP's requests may arrive out of order and still "
+                             "be counted exactly (default: %(default)s)")
+    parser.add_argument("--interval", type=float,
+                        help="keep following the log, checking every INTERVAL seconds")
+    args = parser.parse_args()
+    state_file = args.state or f"{args.log_file}.state.json"
+
+    while True:
+        endpoint_counts, ip_windows, user_agent_counts, stats = follow_log(
+            args.log_file, state_file, args.window, args.reorder)
+        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {stats.lines} new lines ({stats.bytes} bytes) "
+              f"in {stats.seconds:.3f}s - totals: {sum(endpoint_counts.values())} endpoint hits, "
+              f"{len(ip_windows)} IPs, {len(user_agent_counts)} user agents, "
+              f"max burst {max(ip_windows.values(), default=0)} in {args.window}s")
+        if args.interval is None:
+            break
+        time.sleep(args.interval)
@@ -1,14 +1,29 @@
-import re
-from datetime import datetime
-from collections import defaultdict
+import argparse
+import sys
 
-def analyze_ip_request_windows(filename):
+from burst_windows import DEFAULT_PROFILE_WINDOWS, DEFAULT_WINDOW_SECONDS
+from log_engine import BurstProfileAggregator, BurstWindowAggregator, StreamingBurstAggregator, run_analysis
+from log_index import parse_time, run_indexed
+from reporting import ReportWriter, add_report_arguments, open_output, top_items, write_rows
+
+def analyze_ip_request_windows(filename, window_seconds=DEFAULT_WINDOW_SECONDS, streaming=False, workers=1,
+                               since=None, until=None):
     """
     Analyze a log file to determine, for each IP address, the maximum number of requests
     observed within any 10-second window after the first request from that IP.
 
     Args:
         filename (str): Path to the log file. Each line should contain an IP address and a timestamp.
+        window_seconds (int): Length of the burst window in seconds (default 10).
+        streaming (bool): Keep only a window's worth of timestamps per active IP instead of
+            every timestamp in the log. Use for logs too large to hold in memory; requests
+            from one IP must be in time order to within a second.
+        workers (int): Number of processes to parse with (default 1, None for one per CPU).
+            Not available in streaming mode.
+        since (int): Only count requests at or after this epoch time. With ``since`` or
+            ``until`` the log's sidecar index (log_index.py) is built or updated and only
+            the byte ranges it points at are read.
+        until (int): Only count requests at or before this epoch time.
 
     Supported Timestamp Formats:
         - [25/Dec/2023:10:15:30]   (Apache)
@@ -16,81 +31,136 @@ def analyze_ip_request_windows(filename):
         - 25/12/2023 10:15:30      (European)
 
     Returns:
-        dict: Mapping of IP address (str) to max requests (int) in any 10-second window after the first request.
+        dict: Mapping of IP address (str) to max requests (int) in any window after the first request.
               If an IP has only one request, its value will be 0.
 
     Notes:
         - Only the first IP per line is considered.
         - Lines without a recognizable IP or timestamp are ignored.
     """
-    ip_requests = defaultdict(list)
-    ip_pattern = r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b|\b(?:[0-9a-fA-F]{1,4}:){7}[0-9a-fA-F]{1,4}\b|\b(?:[0-9a-fA-F]{1,4}:)*::[0-9a-fA-F]{0,4}(?::[0-9a-fA-F]{1,4})*\b'
-    timestamp_patterns = [
-        r'\[(\d{2}/\w{3}/\d{4}:\d{2}:\d{2}:\d{2})',  # [25/Dec/2023:10:15:30
-        r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})',   # 2023-12-25 10:15:30
-        r'(\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2})',   # 25/12/2023 10:15:30
-    ]
-    with open(filename, 'r') as file:
-        for line in file:
-            ips = re.findall(ip_pattern, line)
-            if not ips:
-                continue
-            ip = ips[0]
-            timestamp = None
-            for pattern in timestamp_patterns:
-                match = re.search(pattern, line)
-                if match:
-                    timestamp_str = match.group(1)
-                    try:
-                        if '/' in timestamp_str and ':' in timestamp_str and timestamp_str.count('/') == 2 and timestamp_str.count(':') == 2:
-                            timestamp = datetime.strptime(timestamp_str, '%d/%m/%Y %H:%M:%S')
-                        elif '/' in timestamp_str and ':' in timestamp_str:
-                            timestamp = datetime.strptime(timestamp_str, '%d/%b/%Y:%H:%M:%S')
-                        elif '-' in timestamp_str:
-                            timestamp = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S')
-                        break
-                    except ValueError:
-                        continue
-            if timestamp:
-                ip_requests[ip].append(timestamp)
-    results = {}
-    for ip, timestamps in ip_requests.items():
-        if len(timestamps) < 2:
-            results[ip] = 0
-            continue
-        timestamps.sort()
-        window_counts = []
-        for i, start_time in enumerate(timestamps):
-            count = 0
-            for j in range(i + 1, len(timestamps)):
-                time_diff = (timestamps[j] - start_time).total_seconds()
-                if time_diff <= 10:
-                    count += 1
-                else:
-                    break
-            if count > 0:
-                window_counts.append(count)
-        results[ip] = max(window_counts) if window_counts else 0
-    return results
-
-def display_window_analysis(results):
+    if since is not None or until is not None:
+        aggregator = BurstWindowAggregator(window_seconds)
+        run_indexed(filename, [aggregator], start=since, end=until)
+        return aggregator.result()
+
+    if not streaming:
+        aggregator = BurstWindowAggregator(window_seconds)
+        run_analysis(filename, [aggregator], workers)
+        return aggregator.result()
+
+    if workers != 1:
+        raise ValueError("streaming mode does not support multiple workers")
+    aggregator = StreamingBurstAggregator(window_seconds)
+    run_analysis(filename, [aggregator])
+    if aggregator.tracker.restarts:
+        print(f"NOTE: {aggregator.tracker.restarts} out-of-order jumps in streaming mode; "
+              "counts may be lower than a full (non-streaming) run", file=sys.stderr)
+    return aggregator.result()
+
+def analyze_ip_burst_profiles(filename, windows=DEFAULT_PROFILE_WINDOWS, thresholds=(), workers=1):
+    """
+    Compute burst statistics for several window lengths in a single pass.
+
+    Args:
+        filename (str): Path to the log file.
+        windows (iterable): Window lengths in seconds (default 1, 10, 60 and 300).
+        thresholds (iterable): For each window, count the requests followed by more
+            than each of these numbers of requests (useful for rate-limit tuning).
+        workers (int): Number of processes to parse with (default 1, None for one per CPU).
+
+    Returns:
+        dict: Mapping of IP address to a burst_windows.BurstProfile with per-window
+              maxima, threshold exceedances and histograms.
+    """
+    aggregator = BurstProfileAggregator(windows, thresholds)
+    run_analysis(filename, [aggregator], workers)
+    return aggregator.result()
+
+def display_burst_profiles(results, show_histograms=False, top_n=None, threshold=None, fmt="text", out=None):
+    """
+    Display per-IP maxima and threshold exceedances for every window, busiest IPs first.
+
+    IPs are ranked by their maximum in the longest window, then the next longest, and
+    so on; ``top_n`` and ``threshold`` (a minimum for that first maximum) limit the report.
+    """
+    if not results:
+        print("No IP addresses with timestamps found", file=out)
+        return
+    first = next(iter(results.values()))
+    windows = list(first.maxima)
+    thresholds = list(next(iter(first.over.values()), {}))
+    columns = [f"max/{window}s" for window in windows]
+    columns += [f">{threshold}/{window}s" for window in windows for threshold in thresholds]
+    ranked = top_items(results, top_n, None if threshold is None else (threshold,),
+                       key=lambda x: tuple(x[1].maxima.values())[::-1])
+
+    def row(profile):
+        values = list(profile.maxima.values())
+        return values + [profile.over[window][threshold] for window in windows for threshold in thresholds]
+
+    if fmt != "text":
+        write_rows(([ip] + row(profile) for ip, profile in ranked), ["ip"] + columns, fmt, out)
+        return
+    with ReportWriter(out) as writer:
+        writer.line("IP Address Burst Profile (requests after a request within each window)")
+        writer.line("=" * 55)
+        writer.line(f"{'IP':<40}" + "".join(f"{column:>10}" for column in columns))
+        for ip, profile in ranked:
+            writer.line(f"{ip:<40}" + "".join(f"{value:>10}" for value in row(profile)))
+            if show_histograms:
+                for window, histogram in profile.histograms.items():
+                    bins = ", ".join(f"{low if low < 2 else f'{low}-{2 * low - 1}'}: {count}"
+                                     for low, count in histogram.items())
+                    writer.line(f"    {window}s histogram: {bins}")
+
+def display_window_analysis(results, window_seconds=DEFAULT_WINDOW_SECONDS, top_n=None, threshold=None, fmt="text",
+                            out=None):
     """
     Display results sorted by highest request count.
+
+    Only IPs with at least ``threshold`` requests in a window are listed (default 1,
+    i.e. every IP with any burst activity), at most ``top_n`` of them.
     """
     if not results:
-        print("No IP addresses with timestamps found")
+        print("No IP addresses with timestamps found", file=out)
+        return
+    ranked = top_items(results, top_n, 1 if threshold is None else threshold)
+    if fmt != "text":
+        write_rows(ranked, ("ip", "max_requests"), fmt, out)
         return
-    print("IP Address Request Window Analysis (10-second windows)")
-    print("=" * 55)
-    sorted_results = sorted(results.items(), key=lambda x: x[1], reverse=True)
-    for ip, max_requests in sorted_results:
-        if max_requests > 0:
-            print(f"{ip}: {max_requests} requests after first in 10s window")
-    zero_count = sum(1 for count in results.values() if count == 0)
-    if zero_count > 0:
-        print(f"\n{zero_count} IPs had no burst activity (single requests only)")
+    with ReportWriter(out) as writer:
+        writer.line(f"IP Address Request Window Analysis ({window_seconds}-second windows)")
+        writer.line("=" * 55)
+        for ip, max_requests in ranked:
+            writer.line(f"{ip}: {max_requests} requests after first in {window_seconds}s window")
+        zero_count = sum(1 for count in results.values() if count == 0)
+        if zero_count > 0:
+            writer.line(f"\n{zero_count} IPs had no burst activity (single requests only)")
 
 if __name__ == "__main__":
-    log_file = "NodeJsApp.log"  # Replace with your log file path
-    results = analyze_ip_request_windows(log_file)
-    display_window_analysis(results)
+    parser = argparse.ArgumentParser(description="Per-IP request burst analysis")
+    parser.add_argument("log_file", nargs="?", default="NodeJsApp.log")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW_SECONDS,
+                        help="burst window length in seconds (default: %(default)s)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="bounded-memory mode for very large logs")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="parse with this many processes (0 = one per CPU)")
+    parser.add_argument("--windows", type=lambda text: [int(value) for value in text.split(",")],
+                        help="report several windows at once, e.g. 1,10,60,300")
+    parser.add_argument("--thresholds", type=lambda text: [int(value) for value in text.split(",")], default=[],
+                        help="with --windows, count requests followed by more than N requests, e.g. 5,20")
+    parser.add_argument("--histogram", action="store_true", help="with --windows, show per-IP histograms")
+    parser.add_argument("--since", type=parse_time,
+                        help="only requests from this time on, e.g. 2025-06-03T10:09 (UTC; uses the log index)")
+    parser.add_argument("--until", type=parse_time, help="only requests up to this time (inclusive)")
+    add_report_arguments(parser)
+    args = parser.parse_args()
+    with open_output(args.output) as out:
+        if args.windows:
+            profiles = analyze_ip_burst_profiles(args.log_file, args.windows, args.thresholds, args.workers or None)
+            display_burst_profiles(profiles, args.histogram, args.top, args.threshold, args.format, out)
+        else:
+            results = analyze_ip_request_windows(args.log_file, args.window, args.streaming, args.workers or None,
+                                                 args.since, args.until)
+            display_window_analysis(results, args.window, args.top, args.threshold, args.format, out)
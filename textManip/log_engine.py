@@ -0,0 +1,512 @@
+import argparse
+import os
+import re
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, namedtuple
+
+from burst_windows import (
+    DEFAULT_PROFILE_WINDOWS,
+    DEFAULT_WINDOW_SECONDS,
+    StreamingBurstTracker,
+    burst_profile,
+    max_requests_in_window,
+)
+from log_sources import is_plain_file, open_lines, source_size
+from log_tokenizer import tokenize
+from timestamps import TimestampParser, apache_epoch, extract_timestamp
+
+# Pattern to extract HTTP method and endpoint from log
+# Matches: "GET /path/to/endpoint HTTP/1.1" or "POST /api/users HTTP/1.1"
+ENDPOINT_PATTERN = re.compile(r'"[A-Z]+ ([^\s]+) HTTP')
+
+# Status code that follows the quoted request: "GET / HTTP/1.1" 200
+STATUS_PATTERN = re.compile(r'"[A-Z]+ [^\s]+ HTTP[^"]*" (\d{3})\b')
+
+IP_PATTERN = re.compile(
+    r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b'
+    r'|\b(?:[0-9a-fA-F]{1,4}:){7}[0-9a-fA-F]{1,4}\b'
+    r'|\b(?:[0-9a-fA-F]{1,4}:)*::[0-9a-fA-F]{0,4}(?::[0-9a-fA-F]{1,4})*\b'
+)
+
+# Common user agent patterns in log files
+USER_AGENT_PATTERNS = [
+    re.compile(r'"([^"]*)"[^"]*$'),  # Last quoted string in line
+    re.compile(r'" "([^"]*)"$'),     # After response code, before end
+    re.compile(r'"[^"]*" "([^"]*)"$'),  # Standard Apache format
+    re.compile(r'"[^"]*" \d+ \d+ "([^"]*)"$'),  # With response size
+]
+MOZILLA_PATTERN = re.compile(r'(Mozilla[^"]*)')
+
+ALL_FIELDS = frozenset(["endpoint", "ip", "timestamp", "status", "user_agent"])
+
+# One parsed log line. Fields that were not requested or not found are None.
+# ``timestamp`` is an integer number of seconds since the epoch.
+LogRecord = namedtuple(
+    "LogRecord",
+    ["line_number", "line", "endpoint", "ip", "timestamp", "status", "user_agent"],
+)
+
+
+class EngineStats(namedtuple("EngineStats", ["lines", "bytes", "seconds"])):
+    """Throughput figures for one pass over a log."""
+
+    __slots__ = ()
+
+    @property
+    def bytes_per_second(self):
+        return self.bytes / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def lines_per_second(self):
+        return self.lines / self.seconds if self.seconds > 0 else 0.0
+
+
+def extract_endpoint(line):
+    match = ENDPOINT_PATTERN.search(line)
+    return match.group(1) if match else None
+
+
+def extract_status(line):
+    match = STATUS_PATTERN.search(line)
+    return int(match.group(1)) if match else None
+
+
+def extract_ip(line):
+    """Return the first IPv4/IPv6 address on the line, or None."""
+    match = IP_PATTERN.search(line)
+    return match.group(0) if match else None
+
+
+def extract_user_agent(line):
+    """Return the user agent string on the line, or None if there is none (or it is '-')."""
+    user_agent = None
+    for pattern in USER_AGENT_PATTERNS:
+        match = pattern.search(line)
+        if match:
+            candidate = match.group(1).strip()
+            # Validate it looks like a user agent
+            if candidate and not candidate.isdigit() and len(candidate) > 1:
+                user_agent = candidate
+                break
+
+    # If no pattern worked, try finding Mozilla or other common UA indicators
+    if not user_agent:
+        mozilla_match = MOZILLA_PATTERN.search(line)
+        if mozilla_match:
+            user_agent = mozilla_match.group(1).strip()
+
+    if user_agent and user_agent != '-':
+        return user_agent
+    return None
+
+
+def parse_line(line, line_number=0, fields=ALL_FIELDS, parse_timestamp=extract_timestamp):
+    """
+    Parse one log line into a LogRecord.
+
+    Only the fields listed in ``fields`` are extracted. When more than one field is
+    needed, lines in the NodeJsApp access-log format are split by log_tokenizer in
+    one regex match; anything the tokenizer cannot vouch for falls back to the
+    per-field patterns above, which give the same result. Passes over a whole file
+    should supply a ``TimestampParser`` as ``parse_timestamp``.
+    """
+    if len(fields) > 1:
+        tokens = tokenize(line)
+        if tokens is not None:
+            return _record_from_tokens(tokens, line, line_number, fields, parse_timestamp)
+    return LogRecord(
+        line_number,
+        line,
+        extract_endpoint(line) if "endpoint" in fields else None,
+        extract_ip(line) if "ip" in fields else None,
+        parse_timestamp(line) if "timestamp" in fields else None,
+        extract_status(line) if "status" in fields else None,
+        extract_user_agent(line) if "user_agent" in fields else None,
+    )
+
+
+def _record_from_tokens(tokens, line, line_number, fields, parse_timestamp):
+    # A request of the form "METHOD /path HTTP/x" is exactly what the endpoint
+    # and status patterns match first; otherwise they might match later on the line.
+    well_formed = tokens.path is not None
+    endpoint = ip = timestamp = status = user_agent = None
+
+    if "endpoint" in fields:
+        endpoint = tokens.path if well_formed else extract_endpoint(line)
+    if "ip" in fields:
+        ip = tokens.ipv4 or extract_ip(tokens.ip) or extract_ip(line)
+    if "timestamp" in fields:
+        timestamp = apache_epoch(tokens.clf_time[:20]) if len(tokens.clf_time) >= 20 else None
+        if timestamp is None:
+            timestamp = parse_timestamp(line)
+    if "status" in fields:
+        status = int(tokens.status) if well_formed else extract_status(line)
+    if "user_agent" in fields:
+        user_agent = tokens.user_agent.strip()
+        if not user_agent or user_agent.isdigit() or len(user_agent) < 2:
+            user_agent = extract_user_agent(line)
+
+    return LogRecord(line_number, line, endpoint, ip, timestamp, status, user_agent)
+
+
+class EndpointCounter:
+    """
+    Counts requests per endpoint path.
+
+    ``normalize`` is an optional callable applied to each endpoint before counting,
+    e.g. a route_templates.RouteNormalizer to count per route instead of per URL.
+    """
+
+    fields = frozenset(["endpoint"])
+
+    def __init__(self, normalize=None):
+        self.normalize = normalize
+        self.counts = {}
+
+    def add(self, record):
+        endpoint = record.endpoint
+        if endpoint is not None:
+            if self.normalize is not None:
+                endpoint = self.normalize(endpoint)
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+
+    def result(self):
+        return self.counts
+
+    def fresh(self):
+        return EndpointCounter(self.normalize)
+
+    def partial(self):
+        return self.counts
+
+    def merge(self, counts, line_offset=0):
+        for endpoint, count in counts.items():
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + count
+
+
+# Why a line had no user agent
+SKIP_BLANK = "blank line"
+SKIP_EMPTY_AGENT = "empty user agent"
+SKIP_NO_AGENT = "no user agent field"
+DEFAULT_SKIP_SAMPLES = 10
+
+
+def skip_reason(line):
+    """Classify a line without a user agent by why extraction failed."""
+    stripped = line.strip()
+    if not stripped:
+        return SKIP_BLANK
+    if stripped.endswith('"-"'):
+        return SKIP_EMPTY_AGENT
+    return SKIP_NO_AGENT
+
+
+class UserAgentCounter:
+    """
+    Counts requests per user agent, plus diagnostics for lines that had none.
+
+    Skipped lines are counted by reason and the first ``sample_limit`` are kept as
+    (line number, line) samples. Every skipped line is kept in ``skipped`` only when
+    ``keep_skipped`` is set, so a log full of probes does not grow memory.
+    """
+
+    fields = frozenset(["user_agent"])
+
+    def __init__(self, sample_limit=DEFAULT_SKIP_SAMPLES, keep_skipped=False):
+        self.counts = defaultdict(int)
+        self.total_lines = 0
+        self.sample_limit = sample_limit
+        self.keep_skipped = keep_skipped
+        self.skip_reasons = defaultdict(int)
+        self.samples = []
+        self.skipped = []
+
+    @property
+    def skipped_count(self):
+        return sum(self.skip_reasons.values())
+
+    def add(self, record):
+        self.total_lines += 1
+        if record.user_agent is not None:
+            self.counts[record.user_agent] += 1
+            return
+        self.skip_reasons[skip_reason(record.line)] += 1
+        if self.keep_skipped:
+            self.skipped.append((record.line_number, record.line.strip()))
+        if len(self.samples) < self.sample_limit:
+            self.samples.append((record.line_number, record.line.strip()))
+
+    def result(self):
+        return dict(self.counts)
+
+    def fresh(self):
+        return UserAgentCounter(self.sample_limit, self.keep_skipped)
+
+    def partial(self):
+        return dict(self.counts), self.total_lines, dict(self.skip_reasons), self.samples, self.skipped
+
+    def merge(self, partial, line_offset=0):
+        counts, total_lines, skip_reasons, samples, skipped = partial
+        for user_agent, count in counts.items():
+            self.counts[user_agent] += count
+        self.total_lines += total_lines
+        for reason, count in skip_reasons.items():
+            self.skip_reasons[reason] += count
+        room = self.sample_limit - len(self.samples)
+        self.samples.extend((line_number + line_offset, line) for line_number, line in samples[:max(room, 0)])
+        self.skipped.extend((line_number + line_offset, line) for line_number, line in skipped)
+
+
+class BurstWindowAggregator:
+    """
+    Collects request timestamps per IP and reports, for each IP, the maximum number
+    of requests observed within any ``window_seconds`` window after a request from that IP.
+
+    When merging partial results from parallel chunks, each chunk only ships the
+    timestamps within one window of its first and last request per IP; windows that
+    straddle a chunk boundary are stitched from those. IPs whose chunks overlap in
+    time cannot be stitched and are listed in ``unstitched`` for a full rescan.
+    """
+
+    fields = frozenset(["ip", "timestamp"])
+
+    def __init__(self, window_seconds=DEFAULT_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self.ip_requests = defaultdict(list)
+        self.merged = None
+        self.unstitched = set()
+
+    def add(self, record):
+        if record.ip is not None and record.timestamp is not None:
+            self.ip_requests[record.ip].append(record.timestamp)
+
+    def result(self):
+        if self.merged is not None:
+            return {ip: state[0] for ip, state in self.merged.items()}
+        results = {}
+        for ip, timestamps in self.ip_requests.items():
+            timestamps.sort()
+            results[ip] = max_requests_in_window(timestamps, self.window_seconds)
+        return results
+
+    def fresh(self):
+        return BurstWindowAggregator(self.window_seconds)
+
+    def partial(self):
+        window = self.window_seconds
+        summaries = {}
+        for ip, timestamps in self.ip_requests.items():
+            timestamps.sort()
+            first, last = timestamps[0], timestamps[-1]
+            summaries[ip] = (
+                max_requests_in_window(timestamps, window),
+                first,
+                last,
+                timestamps[:bisect_right(timestamps, first + window)],
+                timestamps[bisect_left(timestamps, last - window):],
+            )
+        return summaries
+
+    def merge(self, summaries, line_offset=0):
+        if self.merged is None:
+            self.merged = {}
+        window = self.window_seconds
+        for ip, (best, first, last, head, tail) in summaries.items():
+            # state: [best so far, newest timestamp, timestamps within a window of it]
+            state = self.merged.get(ip)
+            if state is None:
+                self.merged[ip] = [best, last, tail]
+            elif ip in self.unstitched:
+                continue
+            elif state[1] > first:
+                self.unstitched.add(ip)
+            else:
+                crossing = max_requests_in_window(state[2] + head, window)
+                state[0] = max(state[0], best, crossing)
+                cutoff = last - window
+                state[2] = [timestamp for timestamp in state[2] if timestamp >= cutoff] + tail
+                state[1] = last
+
+    def resolve(self, ip_timestamps):
+        """Replace the stitched result of each IP with an exact one from all its timestamps."""
+        for ip, timestamps in ip_timestamps.items():
+            timestamps.sort()
+            self.merged[ip][0] = max_requests_in_window(timestamps, self.window_seconds)
+        self.unstitched.clear()
+
+
+class StreamingBurstAggregator:
+    """
+    Same report as BurstWindowAggregator, but only buffers a window's worth of
+    timestamps per active IP (see burst_windows.StreamingBurstTracker).
+    """
+
+    fields = frozenset(["ip", "timestamp"])
+
+    def __init__(self, window_seconds=DEFAULT_WINDOW_SECONDS, reorder_seconds=1):
+        self.tracker = StreamingBurstTracker(window_seconds, reorder_seconds)
+
+    def add(self, record):
+        if record.ip is not None and record.timestamp is not None:
+            self.tracker.add(record.ip, record.timestamp)
+
+    def result(self):
+        return self.tracker.results()
+
+
+class BurstProfileAggregator:
+    """
+    Collects request timestamps per IP and reports a burst_windows.BurstProfile per IP:
+    maxima, threshold exceedances and count histograms for several windows at once.
+    """
+
+    fields = frozenset(["ip", "timestamp"])
+
+    def __init__(self, windows=DEFAULT_PROFILE_WINDOWS, thresholds=()):
+        self.windows = tuple(windows)
+        self.thresholds = tuple(thresholds)
+        self.ip_requests = defaultdict(list)
+
+    def add(self, record):
+        if record.ip is not None and record.timestamp is not None:
+            self.ip_requests[record.ip].append(record.timestamp)
+
+    def result(self):
+        results = {}
+        for ip, timestamps in self.ip_requests.items():
+            timestamps.sort()
+            results[ip] = burst_profile(timestamps, self.windows, self.thresholds)
+        return results
+
+    def fresh(self):
+        return BurstProfileAggregator(self.windows, self.thresholds)
+
+    def partial(self):
+        return dict(self.ip_requests)
+
+    def merge(self, ip_requests, line_offset=0):
+        for ip, timestamps in ip_requests.items():
+            self.ip_requests[ip].extend(timestamps)
+
+
+def run_analysis(filename, aggregators, workers=1, binary=False):
+    """
+    Parse a log once and feed every line to each aggregator.
+
+    Args:
+        filename: Path to the log file. Compressed files, "-" for stdin, rotation globs,
+            lists of paths and iterables of lines are also accepted (see log_sources).
+        aggregators (list): Objects with a ``fields`` set and an ``add(record)`` method,
+            such as EndpointCounter, UserAgentCounter or BurstWindowAggregator.
+        workers (int): Number of processes to parse with. Values above 1 use the
+            chunked backend in parallel_engine, which gives identical results. It needs
+            a single uncompressed file; other sources are read serially, with
+            decompression on a background thread.
+        binary (bool): Parse a plain file in bytes mode (see bytes_engine), decoding
+            only the fields that are kept.
+
+    Returns:
+        EngineStats: Lines and bytes processed, elapsed seconds and derived throughput.
+            For compressed sources ``bytes`` is the compressed size.
+    """
+    start = time.perf_counter()
+    if not is_plain_file(filename):
+        with open_lines(filename) as lines:
+            count = feed_lines(lines, aggregators)
+        return EngineStats(count, source_size(filename), time.perf_counter() - start)
+
+    if workers != 1:
+        # Imported here because parallel_engine builds on this module
+        from parallel_engine import run_analysis_parallel
+        return run_analysis_parallel(filename, aggregators, workers, binary=binary)
+
+    if binary:
+        from bytes_engine import feed_bytes, read_blocks
+        with open(filename, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            lines = feed_bytes(read_blocks(file), aggregators)
+        return EngineStats(lines, size, time.perf_counter() - start)
+
+    with open(filename, 'r') as file:
+        size = os.fstat(file.fileno()).st_size
+        lines = feed_lines(file, aggregators)
+    return EngineStats(lines, size, time.perf_counter() - start)
+
+
+def feed_lines(lines, aggregators, line_offset=0, parse_timestamp=None):
+    """
+    Parse an iterable of lines and feed each record to the aggregators.
+
+    Args:
+        lines (iterable): Lines of text, e.g. an open file.
+        aggregators (list): Aggregators as for ``run_analysis``.
+        line_offset (int): Number of lines that precede these in the log, so record
+            line numbers stay correct when a log is processed in pieces.
+        parse_timestamp (callable): Timestamp parser to use (default: a new TimestampParser).
+
+    Returns:
+        int: Number of lines processed.
+    """
+    fields = frozenset().union(*(aggregator.fields for aggregator in aggregators))
+    adders = [aggregator.add for aggregator in aggregators]
+    if parse_timestamp is None:
+        parse_timestamp = TimestampParser()
+    line_number = line_offset
+    for line in lines:
+        line_number += 1
+        record = parse_line(line, line_number, fields, parse_timestamp)
+        for add in adders:
+            add(record)
+    return line_number - line_offset
+
+
+def analyze_log(filename, workers=1, binary=False, records=None):
+    """
+    Run endpoint, burst window and user agent analysis over a log in a single pass.
+
+    Args:
+        filename (str): Path to the log file.
+        workers (int): Processes to parse with (None for one per CPU).
+        binary (bool): Use the bytes-mode parser.
+        records (compact_records.RecordStore): If given, every parsed request is also
+            kept in this store, in the same pass.
+
+    Returns:
+        tuple: (endpoint_counts, ip_windows, user_agent_counts, EngineStats)
+    """
+    endpoints = EndpointCounter()
+    bursts = BurstWindowAggregator()
+    user_agents = UserAgentCounter()
+    aggregators = [endpoints, bursts, user_agents]
+    if records is not None:
+        aggregators.append(records)
+    stats = run_analysis(filename, aggregators, workers, binary)
+    return endpoints.result(), bursts.result(), user_agents.result(), stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Endpoint, burst and user agent analysis in one pass")
+    parser.add_argument("log_file", nargs="?", default="NodeJsApp.log")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="parse with this many processes (0 = one per CPU)")
+    parser.add_argument("--binary", action="store_true",
+                        help="parse in bytes mode, decoding only the fields that are counted")
+    parser.add_argument("--records", action="store_true",
+                        help="also keep every request in a compact_records.RecordStore and report its size")
+    args = parser.parse_args()
+    records = None
+    if args.records:
+        # Imported here because compact_records builds on this module
+        from compact_records import RecordStore
+        records = RecordStore()
+    endpoint_counts, ip_windows, user_agent_counts, stats = analyze_log(args.log_file, args.workers or None,
+                                                                        args.binary, records)
+    print(f"Endpoints: {len(endpoint_counts)} unique, {sum(endpoint_counts.values())} requests")
+    print(f"IPs with timestamps: {len(ip_windows)}")
+    print(f"User agents: {len(user_agent_counts)} unique, {sum(user_agent_counts.values())} requests")
+    print(f"Processed {stats.lines} lines ({stats.bytes} bytes) in {stats.seconds:.3f}s "
+          f"- {stats.bytes_per_second / (1024 ** 2):.2f} MB/s")
+    if records is not None:
+        print(f"Kept {len(records)} records in {records.nbytes() / 1024:.1f} KB of columns "
+              f"({len(records.symbols)} strings, {len(records.ips)} IPs)")
@@ -0,0 +1,512 @@
+"""
+Sidecar index for time-range and per-IP queries over large logs.
+
+``build_index`` writes ``<log>.idx`` next to the log. It records:
+
+- for each time bucket (a minute by default), the byte ranges of the log whose
+  lines fall in it. Logs concatenated out of order just give a bucket more than one range,
+- for each IP, a posting list of (timestamp, byte offset, line number) per request,
+  sorted by time.
+
+The index is a flat little-endian binary file that is memory-mapped for queries,
+so opening it costs nothing and lookups only touch the pages they need (binary
+search over the sorted bucket and IP tables).
+
+Updates are incremental in both directions: only the bytes appended to the log
+since the last build are parsed, and their buckets and postings are appended to
+the index as a new segment, with a footer naming the segment's bucket range and
+the log bytes and lines indexed so far. Reading the last footer is all an
+up-to-date index costs, and queries skip segments outside their time range.
+Segments are merged lazily, like a binary counter: a new segment absorbs the
+newest older segments that are no larger than it, so there are about log2(n)
+segments and each entry is rewritten O(log n) times. Merged segments are appended
+rather than written in place (so open memory maps stay valid); once the
+superseded bytes outweigh the live ones the file is compacted through a ``.tmp``
+file and rename. A rotated or truncated log is indexed again from the start, as
+is an index whose last write was interrupted.
+
+Usage:
+
+    python log_index.py NodeJsApp.log                                   # build / update
+    python log_index.py NodeJsApp.log --ip 197.159.135.110 --since 2025-06-03T10:09 --until 2025-06-03T10:15
+    python log_index.py NodeJsApp.log --since 2025-06-03T10:09 --until 2025-06-03T10:10
+"""
+import argparse
+import calendar
+import heapq
+import locale
+import mmap
+import os
+import struct
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from bytes_engine import BytesLineParser, complete_lines_end, read_blocks
+from log_engine import parse_line
+from timestamps import TimestampParser
+
+MAGIC = b'TMIDX\x00\x00\x01'
+SEGMENT_MAGIC = b'TMIDXSEG'
+INDEX_VERSION = 2
+DEFAULT_BUCKET_SECONDS = 60
+# Postings point at a line start; its line is read in blocks of this size
+READ_LINE_BYTES = 8192
+
+# magic, version, bucket_seconds, st_dev, st_ino
+HEADER = struct.Struct('<8sIIqq')
+# Each segment: buckets, ranges, IPs, postings, IP names (padded to 8 bytes), footer.
+# Offsets inside a segment are relative to it, so segments can be copied verbatim.
+BUCKET = struct.Struct('<qqq')    # bucket start, first range, range count
+RANGE = struct.Struct('<qqq')     # start offset, end offset, first line number
+IP_ENTRY = struct.Struct('<qqqq')  # name offset, name length, first posting, posting count
+POSTING = struct.Struct('<qqq')   # timestamp, offset, line number
+# segment start, end of the previous live segment, log bytes and lines indexed up to
+# the end of this segment, first and last bucket, buckets, ranges, IPs, postings,
+# IP name bytes, magic
+FOOTER = struct.Struct('<qqqqqqqqqqq8s')
+FIELDS = frozenset(["ip", "timestamp"])
+
+
+def parse_time(text):
+    """'2025-06-03T10:09', '2025-06-03 10:09:30' or an ISO time with offset -> epoch seconds (UTC if naive)."""
+    moment = datetime.fromisoformat(text)
+    return calendar.timegm(moment.utctimetuple())
+
+
+def default_index_file(log_file):
+    return f"{log_file}.idx"
+
+
+def _segment_size(n_buckets, n_ranges, n_ips, n_postings, name_bytes):
+    return (n_buckets * BUCKET.size + n_ranges * RANGE.size + n_ips * IP_ENTRY.size + n_postings * POSTING.size
+            + name_bytes + -name_bytes % 8 + FOOTER.size)
+
+
+class IndexSegment:
+    """
+    One segment of a memory-mapped index, read through the footer that ends at ``end``.
+
+    Raises:
+        ValueError: If there is no valid segment footer at ``end``.
+    """
+
+    def __init__(self, view, end):
+        if end - FOOTER.size < HEADER.size:
+            raise ValueError("truncated index segment")
+        (self.start, self.previous_end, self.indexed_bytes, self.lines, self.first_bucket, self.last_bucket,
+         n_buckets, n_ranges, n_ips, n_postings, name_bytes, magic) = FOOTER.unpack_from(view, end - FOOTER.size)
+        if (magic != SEGMENT_MAGIC or not HEADER.size <= self.previous_end <= self.start
+                or self.start + _segment_size(n_buckets, n_ranges, n_ips, n_postings, name_bytes) != end):
+            raise ValueError("damaged index segment")
+        self.end = end
+        self.counts = (n_buckets, n_ranges, n_ips, n_postings, name_bytes)
+
+        position = self.start
+        self._buckets = view[position:position + n_buckets * BUCKET.size].cast('q')
+        position += n_buckets * BUCKET.size
+        self._ranges = view[position:position + n_ranges * RANGE.size].cast('q')
+        position += n_ranges * RANGE.size
+        self._ips = view[position:position + n_ips * IP_ENTRY.size].cast('q')
+        position += n_ips * IP_ENTRY.size
+        self._postings = view[position:position + n_postings * POSTING.size].cast('q')
+        position += n_postings * POSTING.size
+        self._names = view[position:position + name_bytes]
+
+    def release(self):
+        for view in (self._buckets, self._ranges, self._ips, self._postings, self._names):
+            view.release()
+
+    @property
+    def size(self):
+        return self.end - self.start
+
+    @property
+    def bucket_count(self):
+        return len(self._buckets) // 3
+
+    @property
+    def ip_count(self):
+        return len(self._ips) // 4
+
+    def footer(self, start, previous_end):
+        """This segment's footer for a copy of it placed at ``start``."""
+        return FOOTER.pack(start, previous_end, self.indexed_bytes, self.lines, self.first_bucket, self.last_bucket,
+                           *self.counts, SEGMENT_MAGIC)
+
+    def bucket_start(self, index):
+        return self._buckets[3 * index]
+
+    def ip_name(self, index):
+        start, length = self._ips[4 * index], self._ips[4 * index + 1]
+        return bytes(self._names[start:start + length])
+
+    def ip_names(self):
+        return [self.ip_name(index) for index in range(self.ip_count)]
+
+    def bucket_starts(self):
+        return [self.bucket_start(index) for index in range(self.bucket_count)]
+
+    def time_ranges(self, start=None, end=None):
+        """Unmerged (start offset, end offset, first line number) ranges of the buckets around [start, end]."""
+        buckets = range(self.bucket_count)
+        first = 0 if start is None else bisect_right(buckets, start, key=self.bucket_start) - 1
+        last = self.bucket_count if end is None else bisect_right(buckets, end, key=self.bucket_start)
+        ranges = []
+        for bucket in range(max(first, 0), last):
+            range_start, range_count = self._buckets[3 * bucket + 1], self._buckets[3 * bucket + 2]
+            for index in range(range_start, range_start + range_count):
+                ranges.append(tuple(self._ranges[3 * index:3 * index + 3]))
+        return ranges
+
+    def postings(self, key, start=None, end=None):
+        """(timestamp, offset, line number) of each posting of the encoded IP ``key`` in [start, end]."""
+        index = bisect_left(range(self.ip_count), key, key=self.ip_name)
+        if index == self.ip_count or self.ip_name(index) != key:
+            return []
+        first, count = self._ips[4 * index + 2], self._ips[4 * index + 3]
+        times = range(first, first + count)
+        timestamp = self._postings.__getitem__
+        low = first if start is None else first + bisect_left(times, start, key=lambda i: timestamp(3 * i))
+        high = first + count if end is None else first + bisect_right(times, end, key=lambda i: timestamp(3 * i))
+        return [tuple(self._postings[3 * i:3 * i + 3]) for i in range(low, high)]
+
+    def entries(self):
+        """Decode the segment into mutable buckets and postings, for merging."""
+        buckets = {}
+        for bucket in range(self.bucket_count):
+            range_start, range_count = self._buckets[3 * bucket + 1], self._buckets[3 * bucket + 2]
+            buckets[self.bucket_start(bucket)] = [
+                list(self._ranges[3 * i:3 * i + 3]) for i in range(range_start, range_start + range_count)
+            ]
+        postings = {}
+        for entry in range(self.ip_count):
+            first, count = self._ips[4 * entry + 2], self._ips[4 * entry + 3]
+            postings[self.ip_name(entry)] = [tuple(self._postings[3 * i:3 * i + 3])
+                                             for i in range(first, first + count)]
+        return buckets, postings
+
+
+class LogIndex:
+    """Read-only, memory-mapped view of an index file and its segments (oldest first)."""
+
+    def __init__(self, index_file):
+        with open(index_file, 'rb') as file:
+            if os.fstat(file.fileno()).st_size < HEADER.size:
+                raise ValueError(f"{index_file} is not a log index")
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.bucket_seconds, dev, ino = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != INDEX_VERSION:
+            self._map.close()
+            raise ValueError(f"{index_file} is not a log index (or was written by another version)")
+        self.file_id = (dev, ino)
+        self.size = len(self._map)
+
+        self._view = memoryview(self._map)
+        self.segments = []
+        end = self.size
+        try:
+            while end > HEADER.size:
+                segment = IndexSegment(self._view, end)
+                self.segments.append(segment)
+                end = segment.previous_end
+        except ValueError:
+            self.close()
+            raise ValueError(f"{index_file} is damaged (an interrupted write?)") from None
+        self.segments.reverse()
+
+    def close(self):
+        for segment in self.segments:
+            segment.release()
+        self._view.release()
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def indexed_bytes(self):
+        return self.segments[-1].indexed_bytes if self.segments else 0
+
+    @property
+    def lines(self):
+        return self.segments[-1].lines if self.segments else 0
+
+    @property
+    def bucket_count(self):
+        return len(set().union(*(segment.bucket_starts() for segment in self.segments)))
+
+    def ips(self):
+        names = set().union(*(segment.ip_names() for segment in self.segments))
+        return [name.decode('ascii', 'replace') for name in sorted(names)]
+
+    def time_ranges(self, start=None, end=None):
+        """
+        Byte ranges covering every line with a timestamp in [start, end], as merged,
+        sorted (start offset, end offset, first line number) tuples. The ranges are
+        bucket-aligned, so they may also hold lines just outside the interval.
+        """
+        ranges = []
+        for segment in self.segments:
+            if not segment.bucket_count:
+                continue
+            if start is not None and segment.last_bucket + self.bucket_seconds <= start:
+                continue
+            if end is not None and segment.first_bucket > end:
+                continue
+            ranges.extend(segment.time_ranges(start, end))
+        ranges.sort()
+        merged = []
+        for range_start, range_end, line_number in ranges:
+            if merged and range_start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], range_end)
+            else:
+                merged.append([range_start, range_end, line_number])
+        return [tuple(entry) for entry in merged]
+
+    def postings(self, ip, start=None, end=None):
+        """(timestamp, offset, line number) of each request from ``ip`` in [start, end], in time order."""
+        key = ip.encode('ascii', 'replace')
+        return list(heapq.merge(*(segment.postings(key, start, end) for segment in self.segments)))
+
+
+def _encode_segment(start, previous_end, indexed_bytes, lines, buckets, postings):
+    """A segment (body and footer) for the given buckets and postings, to be written at ``start``."""
+    ips = sorted(postings)
+    n_ranges = sum(len(ranges) for ranges in buckets.values())
+    n_postings = sum(len(entries) for entries in postings.values())
+    name_bytes = sum(len(ip) for ip in ips)
+    parts = []
+    range_index = 0
+    for bucket in sorted(buckets):
+        parts.append(BUCKET.pack(bucket, range_index, len(buckets[bucket])))
+        range_index += len(buckets[bucket])
+    for bucket in sorted(buckets):
+        parts.append(b''.join(RANGE.pack(*entry) for entry in buckets[bucket]))
+    name_offset = posting_index = 0
+    for ip in ips:
+        parts.append(IP_ENTRY.pack(name_offset, len(ip), posting_index, len(postings[ip])))
+        name_offset += len(ip)
+        posting_index += len(postings[ip])
+    for ip in ips:
+        parts.append(b''.join(POSTING.pack(*entry) for entry in sorted(postings[ip])))
+    parts.append(b''.join(ips))
+    parts.append(b'\x00' * (-name_bytes % 8))
+    parts.append(FOOTER.pack(start, previous_end, indexed_bytes, lines, min(buckets, default=0),
+                             max(buckets, default=0), len(buckets), n_ranges, len(ips), n_postings, name_bytes,
+                             SEGMENT_MAGIC))
+    return b''.join(parts)
+
+
+def _entries_size(buckets, postings):
+    return _segment_size(len(buckets), sum(len(ranges) for ranges in buckets.values()), len(postings),
+                         sum(len(entries) for entries in postings.values()), sum(len(ip) for ip in postings))
+
+
+def _merge_entries(older, newer):
+    """Add the (buckets, postings) of a newer segment to those of the one before it."""
+    buckets, postings = older
+    for bucket, ranges in newer[0].items():
+        target = buckets.setdefault(bucket, [])
+        for entry in ranges:
+            if target and target[-1][1] == entry[0]:
+                target[-1][1] = entry[1]
+            else:
+                target.append(entry)
+    for ip, entries in newer[1].items():
+        postings.setdefault(ip, []).extend(entries)
+    return buckets, postings
+
+
+def _create_index(index_file, bucket_seconds, file_id):
+    temp_file = f"{index_file}.tmp"
+    with open(temp_file, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, INDEX_VERSION, bucket_seconds, *file_id))
+    os.replace(temp_file, index_file)
+
+
+def _append_segment(index_file, index, indexed_bytes, lines, buckets, postings):
+    """Append new entries to an open index, merging or compacting its segments as needed."""
+    segments = list(index.segments)
+    entries = (buckets, postings)
+    size = _entries_size(buckets, postings)
+    while segments and segments[-1].size <= size:
+        entries = _merge_entries(segments.pop().entries(), entries)
+        size = _entries_size(*entries)
+    live = sum(segment.size for segment in segments) + size
+
+    if index.size - HEADER.size - live <= live:
+        previous_end = segments[-1].end if segments else HEADER.size
+        with open(index_file, 'ab') as file:
+            file.write(_encode_segment(index.size, previous_end, indexed_bytes, lines, *entries))
+        return
+
+    # Superseded segments outweigh the live ones: copy the live ones to a new file
+    temp_file = f"{index_file}.tmp"
+    with open(temp_file, 'wb') as file:
+        file.write(index._view[:HEADER.size])
+        previous_end = HEADER.size
+        for segment in segments:
+            start = file.tell()
+            file.write(index._view[segment.start:segment.end - FOOTER.size])
+            file.write(segment.footer(start, previous_end))
+            previous_end = file.tell()
+        file.write(_encode_segment(previous_end, previous_end, indexed_bytes, lines, *entries))
+    os.replace(temp_file, index_file)
+
+
+def _parse_appended(log_file, position, line_number, bucket_seconds):
+    """Buckets and postings of the complete lines from byte ``position`` on, and where they end."""
+    buckets = {}
+    postings = {}
+    parse = BytesLineParser(FIELDS).parse
+    current = None  # the range the previous line was added to
+    with open(log_file, 'rb') as file:
+        file.seek(position)
+        pending = b''
+        for block in read_blocks(file):
+            data = pending + block
+            cut = complete_lines_end(data)
+            pending = data[cut:]
+            for raw in data[:cut].splitlines(keepends=True):
+                line_start = position
+                position += len(raw)
+                line_number += 1
+                record = parse(raw.rstrip(b'\r\n') + b'\n', line_number)
+                if record.timestamp is None:
+                    if current is not None and current[1] == line_start:
+                        current[1] = position
+                    continue
+                bucket = record.timestamp - record.timestamp % bucket_seconds
+                ranges = buckets.setdefault(bucket, [])
+                if ranges and ranges[-1][1] == line_start:
+                    ranges[-1][1] = position
+                else:
+                    ranges.append([line_start, position, line_number])
+                current = ranges[-1]
+                if record.ip is not None:
+                    postings.setdefault(record.ip.encode('ascii', 'replace'), []).append(
+                        (record.timestamp, line_start, line_number))
+    return buckets, postings, position, line_number
+
+
+def build_index(log_file, index_file=None, bucket_seconds=None):
+    """
+    Create or update the index for ``log_file``, parsing only bytes appended since the last build.
+
+    Lines are split like the text path's universal newlines ('\n', '\r\n' or a lone
+    '\r'); a trailing line without one, or ending in a '\r' that may still become
+    '\r\n', is left for the next build. ``bucket_seconds`` defaults to the existing index's (or a minute); a
+    different value rebuilds the index.
+
+    Returns:
+        tuple: (lines indexed by this call, bytes indexed by this call)
+    """
+    index_file = index_file or default_index_file(log_file)
+    stat = os.stat(log_file)
+    file_id = (stat.st_dev, stat.st_ino)
+    try:
+        index = LogIndex(index_file)
+    except (FileNotFoundError, ValueError):
+        index = None
+    if bucket_seconds is None:
+        bucket_seconds = index.bucket_seconds if index is not None else DEFAULT_BUCKET_SECONDS
+    if index is not None and (index.file_id != file_id or index.bucket_seconds != bucket_seconds
+                              or index.indexed_bytes > stat.st_size):
+        index.close()
+        index = None
+    if index is not None and index.indexed_bytes == stat.st_size:
+        index.close()
+        return 0, 0
+
+    start = index.indexed_bytes if index is not None else 0
+    first_line = index.lines if index is not None else 0
+    buckets, postings, position, line_number = _parse_appended(log_file, start, first_line, bucket_seconds)
+    if index is None:
+        _create_index(index_file, bucket_seconds, file_id)
+        index = LogIndex(index_file)
+    with index:
+        if position > start:
+            _append_segment(index_file, index, position, line_number, buckets, postings)
+    return line_number - first_line, position - start
+
+
+def _read_line(file, offset, encoding):
+    file.seek(offset)
+    data = b''
+    while True:
+        block = file.read(READ_LINE_BYTES)
+        data += block
+        if not block or complete_lines_end(data):
+            line = data.splitlines()[0] if data else b''
+            return line.decode(encoding, 'replace') + '\n'
+
+
+def query_lines(log_file, ip=None, start=None, end=None, index_file=None):
+    """
+    Yield (line number, line) for the lines from ``ip`` (if given) with a timestamp in
+    [start, end], reading only the parts of the log the index points at.
+
+    The index is updated first, so lines appended since the last build are included.
+    """
+    index_file = index_file or default_index_file(log_file)
+    build_index(log_file, index_file)
+    encoding = locale.getpreferredencoding(False)
+    parse_timestamp = TimestampParser()
+    with LogIndex(index_file) as index, open(log_file, 'rb') as file:
+        if ip is not None:
+            for _, offset, line_number in index.postings(ip, start, end):
+                yield line_number, _read_line(file, offset, encoding)
+            return
+        for range_start, range_end, line_number in index.time_ranges(start, end):
+            file.seek(range_start)
+            for raw in file.read(range_end - range_start).splitlines():
+                line = raw.decode(encoding, 'replace') + '\n'
+                timestamp = parse_timestamp(line)
+                if timestamp is not None and (start is None or timestamp >= start) and (end is None or timestamp <= end):
+                    yield line_number, line
+                line_number += 1
+
+
+def run_indexed(log_file, aggregators, ip=None, start=None, end=None, index_file=None):
+    """
+    Like log_engine.run_analysis, but only for the lines ``query_lines`` selects.
+
+    Returns:
+        int: Number of lines fed to the aggregators.
+    """
+    fields = frozenset().union(*(aggregator.fields for aggregator in aggregators))
+    adders = [aggregator.add for aggregator in aggregators]
+    parse_timestamp = TimestampParser()
+    count = 0
+    for line_number, line in query_lines(log_file, ip, start, end, index_file):
+        record = parse_line(line, line_number, fields, parse_timestamp)
+        for add in adders:
+            add(record)
+        count += 1
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a log's time/IP index, or query it")
+    parser.add_argument("log_file", nargs="?", default="NodeJsApp.log")
+    parser.add_argument("--index", help="index file (default: <log_file>.idx)")
+    parser.add_argument("--bucket", type=int,
+                        help=f"time bucket length in seconds (default: {DEFAULT_BUCKET_SECONDS})")
+    parser.add_argument("--ip", help="only lines from this IP")
+    parser.add_argument("--since", type=parse_time, help="start time, e.g. 2025-06-03T10:09 (UTC)")
+    parser.add_argument("--until", type=parse_time, help="end time, inclusive")
+    args = parser.parse_args()
+    index_file = args.index or default_index_file(args.log_file)
+
+    lines, size = build_index(args.log_file, index_file, args.bucket)
+    if args.ip is None and args.since is None and args.until is None:
+        with LogIndex(index_file) as index:
+            print(f"Indexed {lines} new lines ({size} bytes); {index.lines} lines, "
+                  f"{index.bucket_count} buckets, {len(index.ips())} IPs in {len(index.segments)} segments "
+                  f"of {index_file}")
+    else:
+        for line_number, line in query_lines(args.log_file, args.ip, args.since, args.until, index_file):
+            print(f"{line_number}: {line}", end="")
@@ -0,0 +1,295 @@
+"""
+Log inputs other than a single plain file: compressed files, stdin, rotation sets
+and in-memory iterables of lines.
+
+Compression is detected from the file's magic bytes rather than its name, so a
+``.1`` file that is really gzip (or gzip piped into stdin) works too. Files are
+decompressed as a stream through large read buffers, and ``ThreadedLines`` can
+run the read + decode on a background thread so it overlaps with parsing (zlib,
+bz2 and lzma release the GIL while decompressing).
+
+Supported sources:
+    - "-": standard input (plain or compressed)
+    - a path to a plain, gzip, bzip2, xz or zstd (needs ``zstandard``) file
+    - a glob such as "NodeJsApp.log*", expanded in rotation order (oldest first);
+      index and state files next to the log (NodeJsApp.log.idx, ...) are skipped
+    - a list of paths, read in the given order
+    - an open text file or any other iterable of lines
+
+Example:
+    >>> with open_lines("logs/NodeJsApp.log*") as lines:
+    ...     feed_lines(lines, aggregators)
+"""
+import bz2
+import glob
+import gzip
+import io
+import itertools
+import lzma
+import os
+import queue
+import re
+import sys
+import threading
+from contextlib import contextmanager
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+READ_BUFFER_BYTES = 1024 * 1024
+BATCH_BYTES = 256 * 1024
+QUEUE_BATCHES = 16
+CLOSE_TIMEOUT_SECONDS = 1.0
+
+GZIP_MAGIC = b'\x1f\x8b'
+BZIP2_MAGIC = b'BZh'
+XZ_MAGIC = b'\xfd7zXZ\x00'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+STDIN = "-"
+GLOB_CHARACTERS = re.compile(r'[*?\[]')
+# NodeJsApp.log.3.gz -> 3; the unnumbered live file sorts last
+ROTATION_SUFFIX = re.compile(r'\.(\d+)(?:\.(?:gz|bz2|xz|zst))?$')
+# What a rotated or compressed copy adds to the log's name: .1, .2.gz, .gz, ...
+ROTATION_NAME = re.compile(r'(?:\.\d+)?(?:\.(?:gz|bz2|xz|zst))?$')
+
+
+def detect_compression(head):
+    """Return "gzip", "bz2", "xz", "zstd" or None for the first bytes of a stream."""
+    if head.startswith(GZIP_MAGIC):
+        return "gzip"
+    if head.startswith(BZIP2_MAGIC):
+        return "bz2"
+    if head.startswith(XZ_MAGIC):
+        return "xz"
+    if head.startswith(ZSTD_MAGIC):
+        return "zstd"
+    return None
+
+
+def _decompressed(binary, compression):
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=binary, mode='rb')
+    if compression == "bz2":
+        return bz2.BZ2File(binary, mode='rb')
+    if compression == "xz":
+        return lzma.LZMAFile(binary, mode='rb')
+    if compression == "zstd":
+        if zstandard is None:
+            raise ImportError("reading zstd-compressed logs requires the 'zstandard' package")
+        return zstandard.ZstdDecompressor().stream_reader(binary, read_across_frames=True)
+    return binary
+
+
+class _Prefixed(io.RawIOBase):
+    """A raw stream that returns ``head`` and then the rest of ``stream``."""
+
+    def __init__(self, head, stream):
+        self.head = head
+        self.stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.head:
+            size = min(len(buffer), len(self.head))
+            buffer[:size] = self.head[:size]
+            self.head = self.head[size:]
+            return size
+        return self.stream.readinto(buffer)
+
+    def close(self):
+        self.stream.close()
+        super().close()
+
+
+def _read_head(binary, size=6):
+    """
+    Return the first ``size`` bytes of a buffered stream and a stream that still starts with them.
+
+    ``peek`` returns whatever a single read gave, which on a pipe can be only part
+    of the magic bytes; those are then read in full and put back in front.
+    """
+    head = binary.peek(size)[:size]
+    if len(head) < size:
+        head = binary.read(size)
+        binary = io.BufferedReader(_Prefixed(head, binary), READ_BUFFER_BYTES)
+    return head, binary
+
+
+def open_binary(binary):
+    """Wrap a binary stream so that reads return its decompressed bytes, if its magic bytes say so."""
+    if not isinstance(binary, io.BufferedReader):
+        binary = io.BufferedReader(binary, READ_BUFFER_BYTES)
+    head, binary = _read_head(binary)
+    compression = detect_compression(head)
+    if compression is not None:
+        binary = io.BufferedReader(_decompressed(binary, compression), READ_BUFFER_BYTES)
+    return binary
+
+
+def open_text(binary):
+    """
+    Wrap a binary stream as text, decompressing it first if its magic bytes say so.
+
+    Text is decoded like ``open(filename, 'r')``: locale encoding, universal newlines.
+    """
+    return io.TextIOWrapper(open_binary(binary), newline=None)
+
+
+def open_log(path):
+    """Open a log path (or "-" for stdin) as text, transparently decompressing it."""
+    if path == STDIN:
+        return open_text(sys.stdin.buffer)
+    return open_text(open(path, 'rb', buffering=READ_BUFFER_BYTES))
+
+
+def is_compressed(path):
+    with open(path, 'rb') as file:
+        return detect_compression(file.read(6)) is not None
+
+
+def is_plain_file(source):
+    """True for a path to a single uncompressed file, which the fast paths can mmap/seek."""
+    return (isinstance(source, (str, os.PathLike)) and source != STDIN
+            and not GLOB_CHARACTERS.search(os.fspath(source))
+            and os.path.isfile(source) and not is_compressed(source))
+
+
+def rotation_members(paths):
+    """
+    Drop the files that only share a rotation set's prefix, such as the
+    NodeJsApp.log.idx or NodeJsApp.log.state.json written next to NodeJsApp.log:
+    a match is kept if it is a log's name, optionally with a rotation suffix.
+    """
+    bases = {ROTATION_NAME.sub('', path, count=1) for path in paths}
+    members = []
+    for path in paths:
+        base = ROTATION_NAME.sub('', path, count=1)
+        if not any(base.startswith(other + '.') for other in bases if other != base):
+            members.append(path)
+    return members
+
+
+def rotation_order(paths):
+    """Sort a rotation set oldest first: log.3.gz, log.2.gz, log.1, log."""
+    def key(path):
+        match = ROTATION_SUFFIX.search(path)
+        return (-int(match.group(1)) if match else 0, path)
+    return sorted(paths, key=key)
+
+
+def expand_sources(source):
+    """Expand a path, glob, "-" or list of paths into the ordered list of paths to read."""
+    if isinstance(source, (str, os.PathLike)):
+        source = os.fspath(source)
+        if source != STDIN and GLOB_CHARACTERS.search(source):
+            paths = rotation_order(rotation_members(glob.glob(source)))
+            if not paths:
+                raise FileNotFoundError(f"no files match {source!r}")
+            return paths
+        return [source]
+    return list(source)
+
+
+def source_size(source):
+    """Total on-disk bytes of the files a source refers to (0 for stdin and iterables)."""
+    if not isinstance(source, (str, os.PathLike, list, tuple)):
+        return 0
+    return sum(os.path.getsize(path) for path in expand_sources(source) if path != STDIN)
+
+
+class ThreadedLines:
+    """
+    Iterate the lines of text streams, reading them on a background thread.
+
+    Lines are handed over in batches of about ``BATCH_BYTES`` through a bounded
+    queue, so memory stays flat and the reader can run ahead of the parser.
+
+    ``close`` waits at most ``CLOSE_TIMEOUT_SECONDS`` for the reader: one blocked
+    on a stream with no input yet (stdin) is left to the daemon thread, which
+    stops at its next batch.
+    """
+
+    _DONE = object()
+
+    def __init__(self, streams):
+        self._queue = queue.Queue(QUEUE_BATCHES)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._read, args=(streams,), daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read(self, streams):
+        try:
+            for stream in streams:
+                with stream:
+                    while True:
+                        batch = stream.readlines(BATCH_BYTES)
+                        if not batch:
+                            break
+                        if not self._put(batch):
+                            return
+        except BaseException as error:
+            self._put(error)
+            return
+        self._put(self._DONE)
+
+    def _batches(self):
+        while True:
+            batch = self._queue.get()
+            if batch is self._DONE:
+                return
+            if isinstance(batch, BaseException):
+                raise batch
+            yield batch
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self._batches())
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(CLOSE_TIMEOUT_SECONDS)
+
+
+def _chained(streams):
+    for stream in streams:
+        with stream:
+            yield from stream
+
+
+@contextmanager
+def open_lines(source, threaded=True):
+    """
+    Yield an iterable over the lines of any supported source (see module docstring).
+
+    Paths are opened lazily, one after another, so a rotation set is never
+    concatenated on disk or in memory.
+    """
+    if not isinstance(source, (str, os.PathLike, list, tuple)):
+        yield source
+        return
+    streams = (open_log(path) for path in expand_sources(source))
+    if not threaded:
+        lines = _chained(streams)
+        try:
+            yield lines
+        finally:
+            lines.close()
+        return
+    lines = ThreadedLines(streams)
+    try:
+        yield lines
+    finally:
+        lines.close()
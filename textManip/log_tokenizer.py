@@ -0,0 +1,42 @@
+"""
+One-pass tokenizer for the NodeJsApp access-log format.
+
+    2025-06-03T10:09:02.654Z 197.159.135.110 - - [03/Jun/2025:10:09:02 +0000] "GET / HTTP/1.1" 200 - "-" "Mozilla/5.0 ..."
+
+i.e. an ISO timestamp followed by the Apache/Nginx "combined" format. A single
+compiled regex splits a line into every field at once. Lines in any other format
+do not tokenize (``tokenize`` returns None) and are left to the per-field patterns
+in log_engine.
+"""
+import re
+from collections import namedtuple
+
+# The leading tokens exclude '"' and '[' so that the request's quote and the
+# [clf] bracket are the first of their kind on a tokenized line. The strict ISO
+# token cannot contain anything the IP pattern would match.
+ACCESS_LINE = re.compile(
+    r'(?P<iso_time>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?Z?)'
+    r' (?P<ip>(?P<ipv4>(?:[0-9]{1,3}\.){3}[0-9]{1,3})|[0-9A-Fa-f:.]+)'
+    r' (?P<ident>[^\s"\[]+) (?P<user>[^\s"\[]+)'
+    r' \[(?P<clf_time>[^\]]*)\]'
+    r' "(?P<request>(?P<method>[A-Z]+) (?P<path>[^\s"]+) (?P<protocol>HTTP[^"]*)|[^"]*)"'
+    r' (?P<status>\d{3}) (?P<size>\d+|-)'
+    r' "(?P<referer>[^"]*)" "(?P<user_agent>[^"]*)"[^"]*$'
+)
+
+LogTokens = namedtuple("LogTokens", sorted(ACCESS_LINE.groupindex, key=ACCESS_LINE.groupindex.get))
+
+
+def tokenize(line):
+    """
+    Split an access-log line into its fields.
+
+    Returns:
+        LogTokens or None: All fields as strings (``ipv4`` is None for IPv6 addresses;
+        ``method``, ``path`` and ``protocol`` are None when the request is not of the
+        form "METHOD /path HTTP/x"), or None if the line is not in this format.
+    """
+    match = ACCESS_LINE.match(line)
+    if match is None:
+        return None
+    return LogTokens._make(match.groups())
@@ -0,0 +1,142 @@
+"""
+Multi-process backend for log_engine.
+
+The log is memory-mapped and split into newline-aligned byte ranges. Each range is
+parsed in a ProcessPoolExecutor worker with fresh copies of the caller's aggregators,
+and the partial results are merged back in file order, so the output is identical
+to a serial ``run_analysis`` pass.
+"""
+import io
+import locale
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bytes_engine import feed_bytes
+from log_engine import EngineStats, feed_lines
+
+MIN_CHUNK_BYTES = 1024 * 1024
+CHUNKS_PER_WORKER = 4
+
+
+class TimestampCollector:
+    """Collects every timestamp for a fixed set of IPs (used to rescan unstitched bursts)."""
+
+    fields = frozenset(["ip", "timestamp"])
+
+    def __init__(self, ips):
+        self.ips = frozenset(ips)
+        self.timestamps = {}
+
+    def add(self, record):
+        if record.ip in self.ips and record.timestamp is not None:
+            self.timestamps.setdefault(record.ip, []).append(record.timestamp)
+
+    def fresh(self):
+        return TimestampCollector(self.ips)
+
+    def partial(self):
+        return self.timestamps
+
+    def merge(self, timestamps, line_offset=0):
+        for ip, values in timestamps.items():
+            self.timestamps.setdefault(ip, []).extend(values)
+
+
+def find_chunks(filename, chunk_bytes):
+    """
+    Split a file into (start, end) byte ranges of roughly ``chunk_bytes`` that each
+    end just after a newline (or at end of file).
+    """
+    chunks = []
+    with open(filename, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if size == 0:
+            return chunks
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start = 0
+            while start < size:
+                newline = mapped.find(b'\n', min(start + chunk_bytes, size) - 1)
+                end = size if newline == -1 else newline + 1
+                chunks.append((start, end))
+                start = end
+    return chunks
+
+
+def _parse_chunk(filename, start, end, aggregators, encoding, binary=False):
+    """Worker: parse one byte range and return (line count, partial result per aggregator)."""
+    with open(filename, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            data = mapped[start:end]
+
+    if binary:
+        lines = feed_bytes([data], aggregators, encoding=encoding)
+        return lines, [aggregator.partial() for aggregator in aggregators]
+    # newline=None gives the same universal-newline splitting as open(filename, 'r')
+    lines = feed_lines(io.StringIO(data.decode(encoding), newline=None), aggregators)
+    return lines, [aggregator.partial() for aggregator in aggregators]
+
+
+def _run_chunks(executor, filename, chunks, aggregators, encoding, binary=False):
+    """Parse all chunks and merge their partials into ``aggregators`` in file order."""
+    fresh = [aggregator.fresh() for aggregator in aggregators]
+    jobs = [
+        executor.submit(_parse_chunk, filename, start, end, fresh, encoding, binary)
+        for start, end in chunks
+    ]
+    line_offset = 0
+    for job in jobs:
+        lines, partials = job.result()
+        for aggregator, partial in zip(aggregators, partials):
+            aggregator.merge(partial, line_offset)
+        line_offset += lines
+    return line_offset
+
+
+def run_analysis_parallel(filename, aggregators, workers=None, chunk_bytes=None, binary=False):
+    """
+    Parallel equivalent of log_engine.run_analysis.
+
+    Args:
+        filename (str): Path to the log file.
+        aggregators (list): Aggregators that implement ``fresh``, ``partial`` and ``merge``
+            in addition to ``add``.
+        workers (int): Number of worker processes (default: one per CPU).
+        chunk_bytes (int): Target chunk size. Defaults to a few chunks per worker, at
+            least 1 MB each.
+        binary (bool): Parse chunks in bytes mode (see bytes_engine).
+
+    Returns:
+        EngineStats: Lines and bytes processed, elapsed seconds and derived throughput.
+    """
+    for aggregator in aggregators:
+        if not hasattr(aggregator, "merge"):
+            raise ValueError(f"{type(aggregator).__name__} does not support parallel parsing")
+
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(filename)
+    if chunk_bytes is None:
+        chunk_bytes = max(MIN_CHUNK_BYTES, size // (workers * CHUNKS_PER_WORKER) + 1)
+    chunks = find_chunks(filename, chunk_bytes)
+    encoding = locale.getpreferredencoding(False)
+
+    with ProcessPoolExecutor(max_workers=min(workers, max(len(chunks), 1))) as executor:
+        lines = _run_chunks(executor, filename, chunks, aggregators, encoding, binary)
+
+        # Bursts from IPs whose chunks overlap in time (e.g. out-of-order logs) cannot be
+        # stitched from chunk edges, so collect their full timestamp lists in a second pass
+        unstitched = set()
+        for aggregator in aggregators:
+            unstitched.update(getattr(aggregator, "unstitched", ()))
+        if unstitched:
+            collector = TimestampCollector(unstitched)
+            _run_chunks(executor, filename, chunks, [collector], encoding, binary)
+            for aggregator in aggregators:
+                if getattr(aggregator, "unstitched", None):
+                    aggregator.resolve(
+                        {ip: collector.timestamps.get(ip, []) for ip in aggregator.unstitched}
+                    )
+
+    return EngineStats(lines, size, time.perf_counter() - start)
@@ -0,0 +1,145 @@
+"""
+Ranking and output helpers shared by the analyzers' reports.
+
+``top_items`` ranks a result dict highest first. With ``top_n`` it keeps only the n
+largest entries using ``heapq.nlargest`` (O(n log k) rather than sorting every
+entry), and with ``threshold`` it drops entries below a minimum before ranking. The
+order matches ``sorted(..., reverse=True)``, including ties.
+
+``ReportWriter`` batches output lines into large writes. ``write_rows`` streams rows
+as JSON lines or CSV for other tools to consume.
+
+Example:
+    >>> top_items({"/": 408, "/favicon.ico": 316, "/login": 2}, top_n=2)
+    [('/', 408), ('/favicon.ico', 316)]
+"""
+import csv
+import heapq
+import io
+import json
+import sys
+from contextlib import contextmanager
+from json.encoder import encode_basestring_ascii
+from operator import itemgetter
+
+FORMATS = ("text", "jsonl", "csv")
+BUFFER_LINES = 4096
+
+_encode_json = json.JSONEncoder().encode
+
+
+def top_items(results, top_n=None, threshold=None, key=None):
+    """
+    Rank ``results`` (a dict) by value, highest first.
+
+    Args:
+        results (dict): Mapping to rank.
+        top_n (int): Keep only the ``top_n`` highest entries.
+        threshold: Keep only entries whose ranking value is at least this.
+        key (callable): Ranking value of an (item, value) pair (default: the value).
+
+    Returns:
+        list: (item, value) pairs.
+    """
+    rank = key or itemgetter(1)
+    items = results.items()
+    if threshold is not None:
+        items = (item for item in items if rank(item) >= threshold)
+    if top_n is None:
+        return sorted(items, key=rank, reverse=True)
+    return heapq.nlargest(top_n, items, key=rank)
+
+
+class ReportWriter:
+    """
+    Collects report lines and writes them ``buffer_lines`` at a time.
+
+    Use as a context manager, or call ``flush()`` when done.
+
+    Args:
+        out: Text stream to write to (default: sys.stdout at creation).
+        buffer_lines (int): Lines to collect before each write.
+    """
+
+    def __init__(self, out=None, buffer_lines=BUFFER_LINES):
+        self.out = out if out is not None else sys.stdout
+        self.buffer_lines = buffer_lines
+        self.pending = []
+
+    def line(self, text=""):
+        self.pending.append(text)
+        if len(self.pending) >= self.buffer_lines:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.out.write("\n".join(self.pending) + "\n")
+            self.pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+
+def _json_value(value):
+    kind = type(value)
+    if kind is str:
+        return encode_basestring_ascii(value)
+    if kind is int:
+        return int.__repr__(value)
+    return _encode_json(value)
+
+
+def write_rows(rows, fields, fmt, out=None, buffer_lines=BUFFER_LINES):
+    """
+    Write rows as JSON lines (one object per row) or CSV (with a header).
+
+    Args:
+        rows (iterable): Tuples of values in ``fields`` order.
+        fields (sequence): Column names.
+        fmt (str): "jsonl" or "csv".
+        out: Text stream (default: sys.stdout).
+    """
+    out = out if out is not None else sys.stdout
+    if fmt == "jsonl":
+        # Same text as json.dumps(dict(zip(fields, row))), with the keys encoded once
+        template = "{" + ", ".join(json.dumps(field).replace("%", "%%") + ": %s" for field in fields) + "}"
+        with ReportWriter(out, buffer_lines) as writer:
+            for row in rows:
+                writer.line(template % tuple(map(_json_value, row)))
+    elif fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(fields)
+        for count, row in enumerate(rows, 1):
+            writer.writerow(row)
+            if count % buffer_lines == 0:
+                out.write(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+        out.write(buffer.getvalue())
+    else:
+        raise ValueError(f"unknown format {fmt!r} (expected jsonl or csv)")
+
+
+@contextmanager
+def open_output(path=None):
+    """A text stream for ``path``, or stdout (left open) for None or "-"."""
+    if path is None or path == "-":
+        yield sys.stdout
+        sys.stdout.flush()
+        return
+    with open(path, 'w', newline='', buffering=1024 * 1024) as file:
+        yield file
+
+
+def add_report_arguments(parser):
+    """Add --top, --min, --format and --output to an analyzer's argument parser."""
+    parser.add_argument("--top", type=int, metavar="N", help="report only the N highest entries")
+    parser.add_argument("--min", type=int, metavar="N", dest="threshold",
+                        help="report only entries with a count of at least N")
+    parser.add_argument("--format", choices=FORMATS, default="text",
+                        help="text report, or JSON lines / CSV rows (default: %(default)s)")
+    parser.add_argument("--output", metavar="FILE", help="write the report to FILE instead of stdout")
@@ -0,0 +1,161 @@
+"""
+Route-template normalisation for endpoint counting.
+
+``/users/123`` and ``/users/456`` are the same route; counting them separately
+blows up the number of distinct endpoint keys. ``RouteNormalizer`` maps each
+request path to a template:
+
+1. the query string is dropped (or reduced to its sorted parameter names),
+2. the path is matched against user-supplied route patterns such as
+   ``/users/:id/orders/:order_id`` or ``/static/*``, stored in a segment trie so
+   matching follows the path's segments rather than trying every route,
+3. paths that match no route have numeric, UUID and long hex segments collapsed
+   into ``:id``.
+
+Example:
+    >>> normalize = RouteNormalizer(["/api/:version/items/:item"])
+    >>> normalize("/api/v1/items/42?expand=true")
+    '/api/:version/items/:item'
+    >>> normalize("/users/123/avatar.png")
+    '/users/:id/avatar.png'
+"""
+import re
+
+ID_PLACEHOLDER = ":id"
+WILDCARD = "*"
+
+UUID_PATTERN = re.compile(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}')
+HEX_PATTERN = re.compile(r'(?=[0-9a-fA-F]*[0-9])[0-9a-fA-F]{8,}')
+
+
+def is_id_segment(segment):
+    """True for segments that look like identifiers: numbers, UUIDs and long hex strings."""
+    if segment.isdigit() and segment.isascii():
+        return True
+    return bool(UUID_PATTERN.fullmatch(segment) or HEX_PATTERN.fullmatch(segment))
+
+
+def split_query(endpoint):
+    """Split an endpoint into (path, query) at the first '?' (fragments are dropped)."""
+    path, _, query = endpoint.partition('?')
+    path = path.partition('#')[0]
+    return path, query.partition('#')[0]
+
+
+def collapse_ids(path):
+    """Replace identifier-like path segments with ':id'."""
+    segments = path.split('/')
+    if not any(is_id_segment(segment) for segment in segments):
+        return path
+    return '/'.join(ID_PLACEHOLDER if is_id_segment(segment) else segment for segment in segments)
+
+
+class _Node:
+    __slots__ = ("static", "param", "wildcard", "template")
+
+    def __init__(self):
+        self.static = {}
+        self.param = None
+        self.wildcard = None
+        self.template = None
+
+
+class RouteTrie:
+    """
+    Segment trie of route patterns.
+
+    Pattern segments are literal, ``:name`` (matches any one segment) or a trailing
+    ``*`` (matches the rest of the path). Literal segments take precedence over
+    parameters, and parameters over wildcards.
+
+    A match walks one trie node per path segment, O(path depth), as long as no
+    literal branch overlaps a parameter branch. When they do, a literal branch that
+    fails deeper down is backtracked out of so that "/users/me/orders" still matches
+    "/users/:id/orders" next to "/users/me". Each trie node is visited at most once
+    per match, so the worst case is bounded by the size of the trie (the total
+    number of pattern segments), not by the number of paths through it.
+    """
+
+    def __init__(self, patterns=()):
+        self.root = _Node()
+        for pattern in patterns:
+            self.add(pattern)
+
+    @staticmethod
+    def _segments(path):
+        return [segment for segment in path.split('/') if segment]
+
+    def add(self, pattern):
+        node = self.root
+        segments = self._segments(pattern)
+        for index, segment in enumerate(segments):
+            if segment == WILDCARD:
+                if index != len(segments) - 1:
+                    raise ValueError(f"'*' must be the last segment: {pattern}")
+                if node.wildcard is None:
+                    node.wildcard = _Node()
+                node = node.wildcard
+                break
+            if segment.startswith(':'):
+                if node.param is None:
+                    node.param = _Node()
+                node = node.param
+            else:
+                node = node.static.setdefault(segment, _Node())
+        node.template = pattern
+
+    def match(self, path):
+        """Return the template of the best matching route, or None."""
+        return self._match(self.root, self._segments(path), 0)
+
+    def _match(self, node, segments, index):
+        if index == len(segments):
+            if node.template is not None:
+                return node.template
+            return node.wildcard.template if node.wildcard is not None else None
+        child = node.static.get(segments[index])
+        if child is not None:
+            template = self._match(child, segments, index + 1)
+            if template is not None:
+                return template
+        if node.param is not None:
+            template = self._match(node.param, segments, index + 1)
+            if template is not None:
+                return template
+        if node.wildcard is not None:
+            return node.wildcard.template
+        return None
+
+
+class RouteNormalizer:
+    """
+    Callable mapping raw endpoints to route templates (see module docstring).
+
+    Args:
+        routes (iterable): Optional route patterns to match first.
+        keep_query_keys (bool): Keep the sorted query parameter names ("/search?page&q")
+            instead of dropping the query string entirely.
+        collapse (bool): Collapse identifier-like segments of unmatched paths into ':id'.
+    """
+
+    def __init__(self, routes=(), keep_query_keys=False, collapse=True):
+        self.trie = RouteTrie(routes)
+        self.has_routes = bool(routes)
+        self.keep_query_keys = keep_query_keys
+        self.collapse = collapse
+
+    def __call__(self, endpoint):
+        path, query = split_query(endpoint)
+        template = self.trie.match(path) if self.has_routes else None
+        if template is None:
+            template = collapse_ids(path) if self.collapse else path
+        if self.keep_query_keys and query:
+            keys = sorted({parameter.partition('=')[0] for parameter in query.split('&') if parameter})
+            template = f"{template}?{'&'.join(keys)}"
+        return template
+
+
+def load_routes(filename):
+    """Read route patterns from a file, one per line; blank lines and '#' comments are ignored."""
+    with open(filename, 'r') as file:
+        return [line.strip() for line in file if line.strip() and not line.lstrip().startswith('#')]
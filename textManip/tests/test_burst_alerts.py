@@ -0,0 +1,38 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+
+from burst_alerts import tail_lines
+
+
+class TailLinesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "app.log")
+
+    def test_partial_line_is_joined_across_rotation(self):
+        async def scenario():
+            queue = asyncio.Queue()
+            with open(self.path, 'w') as file:
+                file.write("first\nsec")
+            task = asyncio.create_task(tail_lines(self.path, queue, from_start=True, poll_seconds=0.01))
+            self.assertEqual(await asyncio.wait_for(queue.get(), 1), "first\n")
+            await asyncio.sleep(0.05)
+            with open(self.path, 'a') as file:
+                file.write("ond\nthird\n")
+            os.rename(self.path, self.path + ".1")
+            with open(self.path, 'w') as file:
+                file.write("fourth\n")
+            lines = [await asyncio.wait_for(queue.get(), 1) for _ in range(3)]
+            task.cancel()
+            return lines
+
+        self.assertEqual(asyncio.run(scenario()), ["second\n", "third\n", "fourth\n"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import random
+import unittest
+
+from burst_windows import DEFAULT_PROFILE_WINDOWS, StreamingBurstTracker, burst_profile, max_requests_in_window
+from log_engine import BurstProfileAggregator, BurstWindowAggregator, run_analysis
+
+SAMPLE_LOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "NodeJsApp.log")
+
+
+class StreamingBurstTrackerTest(unittest.TestCase):
+
+    def track(self, timestamps, window_seconds=10, reorder_seconds=1):
+        tracker = StreamingBurstTracker(window_seconds, reorder_seconds)
+        for timestamp in timestamps:
+            tracker.add("a", timestamp)
+        return tracker
+
+    def test_in_order_matches_full_history(self):
+        timestamps = [80, 81, 82, 83, 84, 92, 93, 110, 111]
+        tracker = self.track(timestamps)
+        self.assertEqual(tracker.results(), {"a": max_requests_in_window(timestamps, 10)})
+        self.assertEqual(tracker.restarts, 0)
+
+    def test_late_within_reorder_is_exact(self):
+        tracker = self.track([80, 81, 82, 83, 84, 92, 91])
+        self.assertEqual(tracker.results(), {"a": 4})
+        self.assertEqual(tracker.restarts, 0)
+
+    def test_late_beyond_reorder_is_counted_as_restart(self):
+        # 84 arrives 8s late: more than reorder_seconds, less than window + reorder.
+        # 80 is already trimmed, so the true maximum of 4 cannot be seen exactly.
+        tracker = self.track([80, 81, 82, 83, 92, 84])
+        self.assertEqual(tracker.restarts, 1)
+
+
+def brute_force_profile(timestamps, windows, thresholds):
+    """BurstProfile by counting, for every request, the later requests within each window."""
+    maxima, over, histograms = {}, {}, {}
+    for window in windows:
+        followers = [sum(1 for later in timestamps[index + 1:] if later <= timestamp + window)
+                     for index, timestamp in enumerate(timestamps)]
+        maxima[window] = max(followers, default=0)
+        over[window] = {threshold: sum(1 for count in followers if count > threshold) for threshold in thresholds}
+        histogram = {}
+        for count in followers:
+            low = 1 << count.bit_length() >> 1
+            histogram[low] = histogram.get(low, 0) + 1
+        histograms[window] = histogram
+    return maxima, over, histograms
+
+
+class BurstProfileTest(unittest.TestCase):
+
+    def test_random_timestamps_match_brute_force(self):
+        rng = random.Random(13)
+        windows = (0, 1, 5, 60)
+        thresholds = (0, 2, 7, 30)
+        for _ in range(200):
+            # Few distinct seconds, so runs of equal timestamps are common
+            timestamps = sorted(rng.randint(0, rng.choice((3, 30, 300))) for _ in range(rng.randint(0, 60)))
+            profile = burst_profile(timestamps, windows, thresholds)
+            self.assertEqual(tuple(profile), brute_force_profile(timestamps, windows, thresholds), timestamps)
+
+    def test_maxima_match_burst_window_aggregator(self):
+        profiles = BurstProfileAggregator(DEFAULT_PROFILE_WINDOWS)
+        windows = [BurstWindowAggregator(window) for window in DEFAULT_PROFILE_WINDOWS]
+        run_analysis(SAMPLE_LOG, [profiles] + windows)
+        profiles = profiles.result()
+        for window, aggregator in zip(DEFAULT_PROFILE_WINDOWS, windows):
+            self.assertEqual({ip: profile.maxima[window] for ip, profile in profiles.items()}, aggregator.result())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import io
+import os
+import unittest
+
+from bytes_engine import complete_lines_end, feed_bytes, split_lines
+from log_engine import EndpointCounter, UserAgentCounter, feed_lines
+
+SAMPLE_LOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "NodeJsApp.log")
+
+MIXED = b"a\nb\rc\r\nd\r\re\n\rf"
+
+
+def text_lines(data):
+    """The lines open(filename, 'r') would give for ``data``."""
+    return io.StringIO(data.decode(), newline=None).readlines()
+
+
+class SplitLinesTest(unittest.TestCase):
+
+    def test_matches_universal_newlines_at_every_block_boundary(self):
+        for split in range(len(MIXED) + 1):
+            lines, pending = split_lines(MIXED[:split])
+            more, pending = split_lines(pending + MIXED[split:])
+            last, _ = split_lines(pending, final=True)
+            self.assertEqual([line.decode() for line in lines + more + last], text_lines(MIXED), split)
+
+    def test_trailing_carriage_return_waits_for_the_next_block(self):
+        self.assertEqual(complete_lines_end(b"a\r"), 0)
+        self.assertEqual(complete_lines_end(b"a\rb\r"), 2)
+        self.assertEqual(complete_lines_end(b"a\r\n"), 3)
+        self.assertEqual(complete_lines_end(b"a\n\r"), 2)
+
+
+class FeedBytesTest(unittest.TestCase):
+
+    def test_mixed_line_endings_match_text_path(self):
+        with open(SAMPLE_LOG, 'rb') as file:
+            raw_lines = file.read().splitlines()
+        data = b"".join(line + (b"\n", b"\r", b"\r\n")[number % 3] for number, line in enumerate(raw_lines))
+        text = [EndpointCounter(), UserAgentCounter()]
+        binary = [EndpointCounter(), UserAgentCounter()]
+        text_count = feed_lines(io.StringIO(data.decode(), newline=None), text)
+        blocks = [data[start:start + 4099] for start in range(0, len(data), 4099)]
+        self.assertEqual(feed_bytes(blocks, binary), text_count)
+        self.assertEqual(text_count, len(raw_lines))
+        for expected, actual in zip(text, binary):
+            self.assertEqual(actual.result(), expected.result())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import unittest
+
+from compact_records import RecordStore, pack_ip, unpack_ip
+from log_engine import analyze_log, parse_line
+
+SAMPLE_LOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "NodeJsApp.log")
+
+
+class PackIpTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        for text in ("0.0.0.0", "10.1.2.3", "255.255.255.255", "2001:db8::1"):
+            self.assertEqual(unpack_ip(pack_ip(text)), text)
+
+    def test_ipv4_matches_mapped_ipv6(self):
+        self.assertEqual(pack_ip("10.1.2.3"), pack_ip("::ffff:10.1.2.3"))
+
+    def test_leading_zero_octets_are_rejected(self):
+        for text in ("010.001.002.003", "1.2.3.04", "256.1.1.1", "1.2.3"):
+            with self.assertRaises(ValueError):
+                pack_ip(text)
+
+
+class RecordStoreTest(unittest.TestCase):
+
+    def test_analyze_log_keeps_records(self):
+        store = RecordStore()
+        endpoints, _, _, stats = analyze_log(SAMPLE_LOG, records=store)
+        self.assertEqual(len(store), stats.lines)
+        with open(SAMPLE_LOG) as file:
+            for line_number, line in enumerate(file, 1):
+                expected = parse_line(line, line_number, RecordStore.fields)
+                self.assertEqual(store.log_record(line_number - 1)._replace(line=None), expected._replace(line=None))
+        self.assertEqual(sum(1 for row in store if row.endpoint is not None), sum(endpoints.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import random
+import unittest
+from collections import Counter
+
+from heavy_hitters import CountMinSketch, SpaceSaving, approximate_top_k
+from log_engine import EndpointCounter, UserAgentCounter, run_analysis
+
+SAMPLE_LOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "NodeJsApp.log")
+
+
+def zipf_stream(length, keys=5000, seed=7):
+    """A skewed stream of keys, like URLs behind a scanner's long tail."""
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, keys + 1)]
+    return [f"/page/{key}" for key in rng.choices(range(keys), weights, k=length)]
+
+
+class SpaceSavingTest(unittest.TestCase):
+
+    def assert_bounds(self, summary, truth):
+        total = sum(truth.values())
+        self.assertEqual(summary.total, total)
+        for hitter in summary.top(summary.capacity):
+            self.assertLessEqual(hitter.count - hitter.error, truth[hitter.key], hitter)
+            self.assertGreaterEqual(hitter.count, truth[hitter.key], hitter)
+        # Every key above N / capacity is monitored
+        for key, count in truth.items():
+            if count > total / summary.capacity:
+                self.assertIn(key, summary.counts)
+
+    def test_error_bounds_hold(self):
+        stream = zipf_stream(50000)
+        summary = SpaceSaving(200)
+        for key in stream:
+            summary.add(key)
+        self.assert_bounds(summary, Counter(stream))
+        self.assertEqual(len(summary.counts), 200)
+
+    def test_weighted_adds(self):
+        rng = random.Random(3)
+        stream = [(key, rng.randint(1, 5)) for key in zipf_stream(20000)]
+        summary = SpaceSaving(150)
+        truth = Counter()
+        for key, count in stream:
+            summary.add(key, count)
+            truth[key] += count
+        self.assert_bounds(summary, truth)
+
+    def test_merged_summaries_keep_bounds(self):
+        stream = zipf_stream(40000)
+        halves = SpaceSaving(200), SpaceSaving(200)
+        for number, key in enumerate(stream):
+            halves[number % 2].add(key)
+        halves[0].merge(halves[1])
+        self.assert_bounds(halves[0], Counter(stream))
+
+    def test_exact_below_capacity(self):
+        stream = zipf_stream(5000, keys=50)
+        summary = SpaceSaving(100)
+        for key in stream:
+            summary.add(key)
+        truth = Counter(stream)
+        self.assertEqual([(hitter.key, hitter.count, hitter.error) for hitter in summary.top(10)],
+                         [(key, count, 0) for key, count in truth.most_common(10)])
+
+
+class CountMinSketchTest(unittest.TestCase):
+
+    def test_estimates_never_undercount_and_stay_within_bound(self):
+        stream = zipf_stream(50000)
+        sketch = CountMinSketch.for_error(epsilon=0.005, delta=0.01, k=10)
+        for key in stream:
+            sketch.add(key)
+        truth = Counter(stream)
+        over_bound = 0
+        for key, count in truth.items():
+            estimate = sketch.estimate(key)
+            self.assertGreaterEqual(estimate, count)
+            over_bound += estimate - count > sketch.error_bound
+        self.assertLessEqual(over_bound / len(truth), 1 - sketch.confidence)
+        top = sketch.top()
+        self.assertEqual({hitter.key for hitter in top[:5]}, {key for key, _ in truth.most_common(5)})
+        for hitter in top:
+            self.assertLessEqual(hitter.count - hitter.error, truth[hitter.key])
+
+    def test_merged_sketch_never_undercounts(self):
+        stream = zipf_stream(20000)
+        halves = CountMinSketch(1000, k=10), CountMinSketch(1000, k=10)
+        for number, key in enumerate(stream):
+            halves[number % 2].add(key)
+        halves[0].merge(halves[1])
+        truth = Counter(stream)
+        self.assertEqual(halves[0].total, len(stream))
+        for key, count in truth.items():
+            self.assertGreaterEqual(halves[0].estimate(key), count)
+        with self.assertRaises(ValueError):
+            halves[0].merge(CountMinSketch(500))
+
+
+class ApproximateTopKTest(unittest.TestCase):
+
+    def test_matches_exact_counts_when_everything_fits(self):
+        endpoints, user_agents = EndpointCounter(), UserAgentCounter()
+        run_analysis(SAMPLE_LOG, [endpoints, user_agents])
+        for field, exact in (("endpoint", endpoints.result()), ("user_agent", user_agents.result())):
+            hitters = approximate_top_k(SAMPLE_LOG, field, k=len(exact), capacity=100)
+            self.assertEqual({hitter.key: hitter.count for hitter in hitters}, exact)
+            self.assertTrue(all(hitter.error == 0 for hitter in hitters))
+
+
+if __name__ == "__main__":
+    unittest.main()
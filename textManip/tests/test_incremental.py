@@ -0,0 +1,107 @@
+import contextlib
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from incremental import follow_log
+from log_engine import analyze_log
+
+SAMPLE_LOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "NodeJsApp.log")
+# Long enough for the sample log's out-of-order requests to be counted exactly
+REORDER_SECONDS = 24 * 3600
+
+
+class FollowLogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.log = os.path.join(self.directory, "NodeJsApp.log")
+        self.state = os.path.join(self.directory, "state.json")
+        with open(SAMPLE_LOG, 'rb') as file:
+            self.lines = file.read().splitlines(keepends=True)
+        endpoints, bursts, user_agents, _ = analyze_log(SAMPLE_LOG)
+        self.expected = endpoints, bursts, user_agents
+
+    def write(self, lines, mode='ab'):
+        with open(self.log, mode) as file:
+            file.writelines(lines)
+
+    def follow(self, reorder_seconds=REORDER_SECONDS):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            endpoints, bursts, user_agents, stats = follow_log(self.log, self.state, reorder_seconds=reorder_seconds)
+        return (endpoints, bursts, user_agents), stats, stderr.getvalue()
+
+    def test_runs_over_appends_match_a_full_pass(self):
+        self.write(self.lines[:100], 'wb')
+        self.follow()
+        # A line still being written is left for the next run
+        self.write(self.lines[100:250] + [self.lines[250][:20]])
+        _, stats, _ = self.follow()
+        self.assertEqual(stats.lines, 150)
+        self.write([self.lines[250][20:]] + self.lines[251:])
+        totals, stats, notes = self.follow()
+        self.assertEqual(stats.lines, len(self.lines) - 250)
+        self.assertEqual(totals, self.expected)
+        self.assertEqual(notes, "")
+        _, stats, _ = self.follow()
+        self.assertEqual(stats.lines, 0)
+
+    def rotate_and_follow(self, rotate):
+        self.write(self.lines[:300], 'wb')
+        self.follow()
+        self.write(self.lines[300:500])
+        rotate(self.log + ".1")
+        self.write(self.lines[500:], 'wb')
+        return self.follow()
+
+    def test_rotation_to_plain_file(self):
+        totals, stats, notes = self.rotate_and_follow(lambda rotated: os.rename(self.log, rotated))
+        self.assertEqual(stats.lines, len(self.lines) - 300)
+        self.assertEqual(totals, self.expected)
+        self.assertEqual(notes, "")
+
+    def test_rotation_compressed_on_the_way(self):
+        def rotate(rotated):
+            with open(self.log, 'rb') as source, gzip.open(rotated + ".gz", 'wb') as target:
+                shutil.copyfileobj(source, target)
+            os.remove(self.log)
+        totals, stats, notes = self.rotate_and_follow(rotate)
+        self.assertEqual(stats.lines, len(self.lines) - 300)
+        self.assertEqual(totals, self.expected)
+        self.assertEqual(notes, "")
+
+    def test_copytruncate(self):
+        def rotate(rotated):
+            shutil.copyfile(self.log, rotated)
+            self.write([], 'wb')
+        totals, _, notes = self.rotate_and_follow(rotate)
+        self.assertEqual(totals, self.expected)
+        self.assertEqual(notes, "")
+
+    def test_missing_rotated_file_is_reported(self):
+        totals, stats, notes = self.rotate_and_follow(lambda rotated: os.remove(self.log))
+        self.assertEqual(stats.lines, len(self.lines) - 500)
+        self.assertIn("was rotated but", notes)
+        self.assertLess(sum(totals[0].values()), sum(self.expected[0].values()))
+
+    def test_out_of_order_jumps_are_reported(self):
+        self.write(self.lines, 'wb')
+        totals, _, notes = self.follow(reorder_seconds=1)
+        self.assertIn("out-of-order jumps", notes)
+        self.assertLess(max(totals[1].values()), max(self.expected[1].values()))
+
+    def test_changing_the_reorder_limit_resets_the_state(self):
+        self.write(self.lines, 'wb')
+        self.follow(reorder_seconds=1)
+        totals, stats, _ = self.follow()
+        self.assertEqual(stats.lines, len(self.lines))
+        self.assertEqual(totals, self.expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from log_index import LogIndex, build_index, parse_time, query_lines
+
+SAMPLE_LOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "NodeJsApp.log")
+
+
+class IncrementalIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.log = os.path.join(self.directory, "NodeJsApp.log")
+        with open(SAMPLE_LOG, 'rb') as file:
+            self.lines = file.read().splitlines(keepends=True)
+
+    def queries(self):
+        return (
+            list(query_lines(self.log, ip="197.159.135.110")),
+            list(query_lines(self.log, ip="154.161.35.247", start=parse_time("2025-06-03T10:09"),
+                             end=parse_time("2025-06-03T10:15"))),
+            list(query_lines(self.log, start=parse_time("2025-06-03T10:09"), end=parse_time("2025-06-03T10:10"))),
+        )
+
+    def test_appended_segments_match_a_fresh_build(self):
+        with open(self.log, 'wb') as file:
+            file.writelines(self.lines[:100])
+        build_index(self.log)
+        for line in self.lines[100:300]:
+            with open(self.log, 'ab') as file:
+                file.write(line)
+            build_index(self.log)
+        with LogIndex(self.log + ".idx") as index:
+            self.assertLess(len(index.segments), 20)
+            self.assertEqual(index.lines, 300)
+        incremental = self.queries()
+
+        os.remove(self.log + ".idx")
+        self.assertEqual(build_index(self.log)[0], 300)
+        self.assertEqual(self.queries(), incremental)
+        self.assertTrue(all(incremental))
+
+    def test_damaged_index_is_rebuilt(self):
+        with open(self.log, 'wb') as file:
+            file.writelines(self.lines)
+        build_index(self.log)
+        expected = self.queries()
+        index_file = self.log + ".idx"
+        with open(index_file, 'r+b') as file:
+            file.truncate(os.path.getsize(index_file) - 5)
+        self.assertEqual(build_index(self.log)[0], len(self.lines))
+        self.assertEqual(self.queries(), expected)
+
+    def test_mixed_line_endings_match_the_text_path(self):
+        with open(self.log, 'wb') as file:
+            file.writelines(self.lines)
+        expected = self.queries()
+        os.remove(self.log + ".idx")
+        endings = (b"\r", b"\r\n", b"\n")
+        with open(self.log, 'wb') as file:
+            file.writelines(line.rstrip(b"\r\n") + endings[number % 3] for number, line in enumerate(self.lines))
+        with open(self.log) as file:
+            text_lines = sum(1 for _ in file)
+        self.assertEqual(build_index(self.log)[0], text_lines)
+        self.assertEqual(self.queries(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
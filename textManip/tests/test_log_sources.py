@@ -0,0 +1,78 @@
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from endpoint_counter import count_endpoints
+from log_index import build_index
+from log_sources import ThreadedLines, expand_sources, open_lines, open_text
+
+SAMPLE_LOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "NodeJsApp.log")
+
+
+class RotationGlobTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.log = os.path.join(self.directory, "NodeJsApp.log")
+        shutil.copyfile(SAMPLE_LOG, self.log)
+        with open(SAMPLE_LOG, 'rb') as source, gzip.open(self.log + ".1.gz", 'wb') as rotated:
+            shutil.copyfileobj(source, rotated)
+
+    def test_glob_skips_sidecar_files(self):
+        build_index(self.log)
+        for name in ("NodeJsApp.log.state.json", "NodeJsApp.log.idx.tmp"):
+            with open(os.path.join(self.directory, name), 'w') as sidecar:
+                sidecar.write("{}")
+        pattern = os.path.join(self.directory, "NodeJsApp.log*")
+        self.assertEqual(expand_sources(pattern), [self.log + ".1.gz", self.log])
+        with open(SAMPLE_LOG) as sample:
+            sample_lines = sum(1 for _ in sample)
+        with open_lines(pattern) as lines:
+            self.assertEqual(sum(1 for _ in lines), 2 * sample_lines)
+        single = count_endpoints(SAMPLE_LOG)
+        self.assertEqual(count_endpoints(pattern), {endpoint: 2 * count for endpoint, count in single.items()})
+
+
+class TrickleReader(io.RawIOBase):
+    """A pipe that hands over one byte per read."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self.data or not len(buffer):
+            return 0
+        buffer[0] = self.data[0]
+        self.data = self.data[1:]
+        return 1
+
+
+class StreamInputTest(unittest.TestCase):
+
+    def test_magic_bytes_split_across_reads(self):
+        with open(SAMPLE_LOG, 'rb') as source:
+            data = source.read(4096)
+        with open_text(TrickleReader(gzip.compress(data))) as text:
+            self.assertEqual(text.read(), data.decode().replace('\r\n', '\n'))
+        with open_text(TrickleReader(data)) as text:
+            self.assertEqual(text.read(), data.decode().replace('\r\n', '\n'))
+
+    def test_close_does_not_wait_for_idle_stdin(self):
+        read_end, write_end = os.pipe()
+        self.addCleanup(os.close, write_end)
+        lines = ThreadedLines([open(read_end)])
+        start = time.perf_counter()
+        lines.close()
+        self.assertLess(time.perf_counter() - start, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
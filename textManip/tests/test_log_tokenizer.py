@@ -0,0 +1,76 @@
+import os
+import unittest
+
+from log_engine import ALL_FIELDS, parse_line
+from log_tokenizer import tokenize
+
+SAMPLE_LOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "NodeJsApp.log")
+
+LINE = ('2025-06-03T10:09:02.654Z {ip} - - [{clf}] "{request}" {status} - "-" "{user_agent}"\n')
+GOOD = dict(ip="197.159.135.110", clf="03/Jun/2025:10:09:02 +0000", request="GET /api/users?id=1 HTTP/1.1",
+            status="200", user_agent="Mozilla/5.0 (X11; Linux x86_64)")
+
+# Tokenized lines whose fields need the per-field patterns, and lines in other formats
+VARIANTS = [
+    dict(ip="2001:db8::1"),
+    dict(ip="::ffff:10.0.0.1"),
+    dict(request="-"),
+    dict(request="GET"),
+    dict(request="get /lowercase HTTP/1.1"),
+    dict(request="GET /no-protocol"),
+    dict(request="\\x16\\x03\\x01 binary probe"),
+    dict(user_agent="-"),
+    dict(user_agent=""),
+    dict(user_agent="   "),
+    dict(user_agent="42"),
+    dict(user_agent="x"),
+    dict(clf="03/Jun/2025:10:09"),
+    dict(clf="31/Feb/2025:10:09:02 +0000"),
+    dict(clf=""),
+]
+OTHER_FORMATS = [
+    '197.159.135.110 - - [03/Jun/2025:10:09:02 +0000] "GET / HTTP/1.1" 200 512 "-" "curl/8.0"\n',
+    '2025-06-03 10:09:02 INFO GET /health from 10.0.0.1\n',
+    '2025-06-03T10:09:02Z 10.0.0.1 - - [03/Jun/2025:10:09:02 +0000] "GET / HTTP/1.1" 200 - "-" "a" extra "x"\n',
+    LINE.format(**dict(GOOD, status="20")),
+    '\n',
+]
+
+
+def per_field(line, line_number=1):
+    """The record the per-field patterns alone give (a single field never tokenizes)."""
+    values = {field: getattr(parse_line(line, line_number, frozenset([field])), field) for field in ALL_FIELDS}
+    return parse_line(line, line_number, frozenset())._replace(**values)
+
+
+class TokenizerTest(unittest.TestCase):
+
+    def test_tokenizes_access_lines(self):
+        tokens = tokenize(LINE.format(**GOOD))
+        self.assertEqual(tokens.ipv4, "197.159.135.110")
+        self.assertEqual((tokens.method, tokens.path, tokens.protocol), ("GET", "/api/users?id=1", "HTTP/1.1"))
+        self.assertEqual(tokens.status, "200")
+        self.assertEqual(tokens.user_agent, GOOD["user_agent"])
+        self.assertIsNone(tokenize(LINE.format(**dict(GOOD, request="-"))).path)
+        self.assertIsNone(tokenize(LINE.format(**dict(GOOD, ip="2001:db8::1"))).ipv4)
+
+    def test_other_formats_do_not_tokenize(self):
+        for line in OTHER_FORMATS:
+            self.assertIsNone(tokenize(line), line)
+
+    def test_tokenized_records_match_per_field_patterns(self):
+        for variant in [{}] + VARIANTS:
+            line = LINE.format(**dict(GOOD, **variant))
+            self.assertIsNotNone(tokenize(line), line)
+            self.assertEqual(parse_line(line, 1), per_field(line), line)
+        for line in OTHER_FORMATS:
+            self.assertEqual(parse_line(line, 1), per_field(line), line)
+
+    def test_sample_log_matches_per_field_patterns(self):
+        with open(SAMPLE_LOG) as file:
+            for line_number, line in enumerate(file, 1):
+                self.assertEqual(parse_line(line, line_number), per_field(line, line_number))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from compact_records import RecordStore
+from log_engine import (
+    BurstProfileAggregator,
+    BurstWindowAggregator,
+    EndpointCounter,
+    UserAgentCounter,
+    run_analysis,
+)
+from parallel_engine import find_chunks, run_analysis_parallel
+
+SAMPLE_LOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "NodeJsApp.log")
+CHUNK_BYTES = 8192
+
+
+def aggregators():
+    return [EndpointCounter(), UserAgentCounter(keep_skipped=True), BurstWindowAggregator(10),
+            BurstProfileAggregator((10, 60), thresholds=(20,)), RecordStore()]
+
+
+def snapshot(aggregators):
+    endpoints, user_agents, bursts, profiles, records = aggregators
+    return (endpoints.result(), user_agents.result(), user_agents.total_lines, dict(user_agents.skip_reasons),
+            user_agents.samples, user_agents.skipped, bursts.result(), profiles.result(),
+            [records.log_record(row) for row in range(len(records))])
+
+
+class ParallelEquivalenceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        with open(SAMPLE_LOG, 'rb') as file:
+            self.lines = file.read().splitlines(keepends=True)
+
+    def write(self, lines):
+        path = os.path.join(self.directory, "NodeJsApp.log")
+        with open(path, 'wb') as file:
+            file.writelines(lines)
+        return path
+
+    def assert_parallel_matches_serial(self, path):
+        self.assertGreater(len(find_chunks(path, CHUNK_BYTES)), 10)
+        for binary in (False, True):
+            serial = aggregators()
+            serial_stats = run_analysis(path, serial)
+            parallel = aggregators()
+            parallel_stats = run_analysis_parallel(path, parallel, workers=2, chunk_bytes=CHUNK_BYTES, binary=binary)
+            self.assertEqual(parallel_stats.lines, serial_stats.lines)
+            self.assertEqual(snapshot(parallel), snapshot(serial))
+
+    def test_in_order_log_is_stitched_across_chunks(self):
+        path = self.write(sorted(self.lines))
+        self.assert_parallel_matches_serial(path)
+
+    def test_out_of_order_log_is_rescanned(self):
+        # The sample repeated: each IP's chunks overlap in time
+        path = self.write(self.lines * 3)
+        self.assert_parallel_matches_serial(path)
+
+    def test_chunks_end_on_line_boundaries(self):
+        path = self.write(self.lines)
+        chunks = find_chunks(path, CHUNK_BYTES)
+        self.assertEqual(chunks[0][0], 0)
+        self.assertEqual(chunks[-1][1], os.path.getsize(path))
+        with open(path, 'rb') as file:
+            data = file.read()
+        for (_, end), (start, _) in zip(chunks, chunks[1:]):
+            self.assertEqual(end, start)
+            self.assertEqual(data[end - 1:end], b'\n')
+
+
+if __name__ == "__main__":
+    unittest.main()
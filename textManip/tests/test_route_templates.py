@@ -0,0 +1,107 @@
+import random
+import unittest
+
+from route_templates import RouteNormalizer, RouteTrie, collapse_ids, split_query
+
+
+def brute_force_match(patterns, path):
+    """The best route by trying every pattern: literal beats :param beats *, segment by segment."""
+    segments = [segment for segment in path.split('/') if segment]
+    best = None
+    for pattern in patterns:
+        parts = [part for part in pattern.split('/') if part]
+        rank = []
+        for index, part in enumerate(parts):
+            if part == '*':
+                rank.append(2)
+                break
+            if index >= len(segments) or (not part.startswith(':') and part != segments[index]):
+                rank = None
+                break
+            rank.append(1 if part.startswith(':') else 0)
+        else:
+            if len(parts) != len(segments):
+                rank = None
+        if rank is not None and (best is None or rank < best[0]):
+            best = rank, pattern
+    return best and best[1]
+
+
+class CountingTrie(RouteTrie):
+
+    def __init__(self, patterns):
+        super().__init__(patterns)
+        self.visits = 0
+
+    def _match(self, node, segments, index):
+        self.visits += 1
+        return super()._match(node, segments, index)
+
+
+def trie_nodes(node):
+    children = list(node.static.values()) + [child for child in (node.param, node.wildcard) if child]
+    return 1 + sum(trie_nodes(child) for child in children)
+
+
+class RouteTrieTest(unittest.TestCase):
+
+    def test_precedence_and_backtracking(self):
+        trie = RouteTrie(["/users/me", "/users/:id", "/users/:id/orders", "/users/me/settings",
+                          "/static/*", "/:section/help"])
+        self.assertEqual(trie.match("/users/me"), "/users/me")
+        self.assertEqual(trie.match("/users/42"), "/users/:id")
+        # The literal "me" branch has no "orders", so the match backs out to :id
+        self.assertEqual(trie.match("/users/me/orders"), "/users/:id/orders")
+        self.assertEqual(trie.match("/users/me/settings"), "/users/me/settings")
+        self.assertEqual(trie.match("/static/css/site.css"), "/static/*")
+        self.assertEqual(trie.match("/static"), "/static/*")
+        self.assertEqual(trie.match("/docs/help"), "/:section/help")
+        self.assertEqual(trie.match("/users/help"), "/users/:id")
+        self.assertEqual(trie.match("//users//42/"), "/users/:id")
+        self.assertIsNone(trie.match("/users/42/orders/7"))
+        self.assertIsNone(trie.match("/"))
+
+    def test_wildcard_must_be_last(self):
+        with self.assertRaises(ValueError):
+            RouteTrie(["/static/*/css"])
+
+    def test_random_routes_match_brute_force(self):
+        rng = random.Random(11)
+        vocabulary = ["a", "b", "c"]
+        for _ in range(200):
+            patterns = set()
+            for _ in range(rng.randint(1, 12)):
+                parts = [rng.choice(vocabulary + [":p"]) for _ in range(rng.randint(1, 4))]
+                if rng.random() < 0.2:
+                    parts[-1] = "*"
+                patterns.add("/" + "/".join(parts))
+            patterns = sorted(patterns)
+            trie = CountingTrie(patterns)
+            nodes = trie_nodes(trie.root)
+            for _ in range(30):
+                path = "/" + "/".join(rng.choice(vocabulary + ["d"]) for _ in range(rng.randint(0, 5)))
+                trie.visits = 0
+                self.assertEqual(trie.match(path), brute_force_match(patterns, path), (patterns, path))
+                # Each node is visited at most once per match
+                self.assertLessEqual(trie.visits, nodes)
+
+
+class RouteNormalizerTest(unittest.TestCase):
+
+    def test_routes_then_id_collapsing(self):
+        normalize = RouteNormalizer(["/api/:version/items/:item"])
+        self.assertEqual(normalize("/api/v1/items/42?expand=true"), "/api/:version/items/:item")
+        self.assertEqual(normalize("/users/123/avatar.png"), "/users/:id/avatar.png")
+        self.assertEqual(normalize("/files/0123456789abcdef#top"), "/files/:id")
+        self.assertEqual(normalize("/o/123e4567-e89b-12d3-a456-426614174000"), "/o/:id")
+        self.assertEqual(normalize("/deadbeef"), "/deadbeef")  # long hex needs a digit
+
+    def test_query_keys(self):
+        normalize = RouteNormalizer(keep_query_keys=True)
+        self.assertEqual(normalize("/search?q=x&page=2&q=y"), "/search?page&q")
+        self.assertEqual(split_query("/a?b=1#frag"), ("/a", "b=1"))
+        self.assertEqual(collapse_ids("/a/b"), "/a/b")
+
+
+if __name__ == "__main__":
+    unittest.main()
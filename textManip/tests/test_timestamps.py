@@ -0,0 +1,78 @@
+import os
+import unittest
+
+from timestamps import (
+    APACHE,
+    DETECT_LINES,
+    EUROPEAN,
+    ISO,
+    RECHECK_LINES,
+    TimestampParser,
+    extract_timestamp,
+)
+
+SAMPLE_LOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "NodeJsApp.log")
+
+APACHE_LINE = '1.2.3.4 - - [25/Dec/2023:10:15:{:02d} +0000] "GET / HTTP/1.1" 200'
+ISO_LINE = '2023-12-25 10:15:{:02d} INFO request from 1.2.3.4'
+EUROPEAN_LINE = '25/12/2023 10:15:{:02d} INFO request from 1.2.3.4'
+
+# Lines the fast paths must hand back to the regexes (or agree with them on)
+AWKWARD_LINES = [
+    '1.2.3.4 - - [31/Feb/2023:10:15:30 +0000] "GET / HTTP/1.1"',    # no such day
+    '1.2.3.4 - - [25/Dec/2023:24:15:30 +0000] "GET / HTTP/1.1"',    # no such hour
+    '1.2.3.4 - - [25/Foo/2023:10:15:30 +0000] "GET / HTTP/1.1"',    # no such month
+    '[worker 3] 1.2.3.4 - - [25/Dec/2023:10:15:30 +0000] "GET /"',  # an earlier '['
+    '2023-12-25 10:15:30 [25/Dec/2023:11:15:30 +0000] both',        # Apache wins over ISO
+    '2023-13-25 10:15:30 bad month, then 2023-12-25 10:15:31',
+    '25/12/2023 10:15:30 then 2023-12-25 10:15:31',                 # ISO wins over European
+    '31/04/2023 10:15:30 no such day',
+    '2023-12-25T10:15:30Z ISO with a T',
+    '١٢/12/2023 10:15:30 non-ASCII digits',
+    'short',
+    '',
+]
+
+
+def locked(line_format, fmt):
+    parser = TimestampParser()
+    for second in range(DETECT_LINES):
+        parser(line_format.format(second))
+    assert parser.format == fmt
+    return parser
+
+
+class TimestampParserTest(unittest.TestCase):
+
+    def test_detects_each_format_and_uses_the_fast_path(self):
+        for line_format, fmt in ((APACHE_LINE, APACHE), (ISO_LINE, ISO), (EUROPEAN_LINE, EUROPEAN)):
+            parser = locked(line_format, fmt)
+            for second in range(60):
+                line = line_format.format(second)
+                self.assertEqual(parser(line), extract_timestamp(line), line)
+            self.assertEqual(parser.fast_hits, 60)
+            self.assertEqual(parser.fallbacks, 0)
+
+    def test_fast_path_agrees_with_regexes_on_awkward_lines(self):
+        for line_format, fmt in ((APACHE_LINE, APACHE), (ISO_LINE, ISO), (EUROPEAN_LINE, EUROPEAN)):
+            parser = locked(line_format, fmt)
+            for line in AWKWARD_LINES:
+                self.assertEqual(parser(line), extract_timestamp(line), (fmt, line))
+
+    def test_format_change_is_detected_again(self):
+        parser = locked(APACHE_LINE, APACHE)
+        for number in range(RECHECK_LINES + DETECT_LINES):
+            line = ISO_LINE.format(number % 60)
+            self.assertEqual(parser(line), extract_timestamp(line))
+        self.assertEqual(parser.format, ISO)
+
+    def test_sample_log_matches_regexes(self):
+        parser = TimestampParser()
+        with open(SAMPLE_LOG) as file:
+            for line in file:
+                self.assertEqual(parser(line), extract_timestamp(line))
+        self.assertGreater(parser.fast_hits, parser.fallbacks)
+
+
+if __name__ == "__main__":
+    unittest.main()
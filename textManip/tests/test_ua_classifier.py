@@ -0,0 +1,101 @@
+import os
+import random
+import unittest
+
+from log_engine import UserAgentCounter, run_analysis
+from ua_classifier import AhoCorasick, UAClassification, UserAgentCategoryCounter, UserAgentClassifier
+from user_agent_counter import categorize_user_agents, summarize_browsers
+
+SAMPLE_LOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "NodeJsApp.log")
+
+KNOWN_AGENTS = {
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36":
+        UAClassification("Web Browsers", "Chrome", "137.0.0.0", "Linux"),
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 "
+    "Safari/537.36 Edg/120.0.2210.91":
+        UAClassification("Web Browsers", "Edge", "120.0.2210.91", "Windows"),
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+    "Version/17.1 Mobile/15E148 Safari/604.1":
+        UAClassification("Web Browsers", "Safari", "17.1", "iOS"),
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14.1; rv:121.0) Gecko/20100101 Firefox/121.0":
+        UAClassification("Web Browsers", "Firefox", "121.0", "macOS"),
+    "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)":
+        UAClassification("Bots/Crawlers", "Googlebot", "2.1", None),
+    "curl/8.4.0": UAClassification("API/Tools", "curl", "8.4.0", None),
+    "python-requests/2.31.0": UAClassification("API/Tools", "python-requests", "2.31.0", None),
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8)": UAClassification("Mobile Devices", None, None, "Android"),
+    "Mozilla/4.0 (compatible; MSIE 6.0)": UAClassification("Mozilla-based", None, None, None),
+    "Lynx/2.9.0": UAClassification("Other", None, None, None),
+}
+
+
+def original_category(user_agent):
+    """The rules of the original categorize_user_agents, one substring test at a time."""
+    ua_lower = user_agent.lower()
+    if any(bot in ua_lower for bot in ['bot', 'crawler', 'spider', 'scraper']):
+        return 'Bots/Crawlers'
+    if any(browser in ua_lower for browser in ['chrome', 'firefox', 'safari', 'edge']):
+        return 'Web Browsers'
+    if any(mobile in ua_lower for mobile in ['mobile', 'android', 'iphone', 'ipad']):
+        return 'Mobile Devices'
+    if any(tool in ua_lower for tool in ['curl', 'wget', 'python', 'java']):
+        return 'API/Tools'
+    if 'mozilla' in ua_lower:
+        return 'Mozilla-based'
+    return 'Other'
+
+
+def random_agents(count, seed=5):
+    rng = random.Random(seed)
+    pieces = ["bot", "Chrome/1.2", "safari/", "Version/9", "edg/", "iPad", "android", "curl/", "java/",
+              "mozilla", "windows nt", "CrOS", "mac os x", "linux", "spider", "xy", " ", "/", "0.1.", "python"]
+    return ["".join(rng.choice(pieces) for _ in range(rng.randint(0, 6))) for _ in range(count)]
+
+
+class AhoCorasickTest(unittest.TestCase):
+
+    def test_first_occurrences_match_str_find(self):
+        keywords = ["he", "she", "his", "hers", "s", "ushers"]
+        matcher = AhoCorasick(keywords)
+        rng = random.Random(2)
+        for _ in range(500):
+            text = "".join(rng.choice("hersu") for _ in range(rng.randint(0, 20)))
+            expected = {keyword: text.find(keyword) + len(keyword) for keyword in keywords if keyword in text}
+            self.assertEqual(matcher.find(text), expected, text)
+
+
+class UserAgentClassifierTest(unittest.TestCase):
+
+    def test_known_agents(self):
+        classifier = UserAgentClassifier()
+        for user_agent, expected in KNOWN_AGENTS.items():
+            self.assertEqual(classifier.classify(user_agent), expected, user_agent)
+
+    def test_categories_follow_the_original_rules(self):
+        classifier = UserAgentClassifier()
+        for user_agent in list(KNOWN_AGENTS) + random_agents(2000):
+            self.assertEqual(classifier.classify(user_agent).category, original_category(user_agent), user_agent)
+
+    def test_results_are_cached_per_user_agent(self):
+        classifier = UserAgentClassifier(cache_size=2)
+        for user_agent in ["curl/1", "curl/1", "wget/2", "curl/1", "java/3", "wget/2"]:
+            classifier.classify(user_agent)
+        info = classifier.classify.cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (2, 4, 2))
+
+
+class CategoryCounterTest(unittest.TestCase):
+
+    def test_streaming_counts_match_per_agent_summaries(self):
+        counter, user_agents = UserAgentCategoryCounter(), UserAgentCounter()
+        run_analysis(SAMPLE_LOG, [counter, user_agents])
+        browsers, operating_systems = summarize_browsers(user_agents.result())
+        self.assertEqual(counter.result(), {
+            "categories": categorize_user_agents(user_agents.result()),
+            "browsers": browsers,
+            "operating_systems": operating_systems,
+        })
+
+
+if __name__ == "__main__":
+    unittest.main()
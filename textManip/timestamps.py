@@ -0,0 +1,202 @@
+"""
+Timestamp extraction for the textManip analyzers.
+
+``extract_timestamp`` is the general path: up to three regexes and
+``datetime.strptime``. ``TimestampParser`` looks at the first timestamped lines
+of a log to find its format, then parses later lines by slicing fixed offsets and
+converting with integer arithmetic, falling back to ``extract_timestamp`` for any
+line the fast path cannot handle (so mixed-format files still parse correctly).
+"""
+import calendar
+import re
+from collections import Counter
+from datetime import date, datetime
+from functools import lru_cache
+
+TIMESTAMP_PATTERNS = [
+    re.compile(r'\[(\d{2}/\w{3}/\d{4}:\d{2}:\d{2}:\d{2})'),  # [25/Dec/2023:10:15:30
+    re.compile(r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})'),   # 2023-12-25 10:15:30
+    re.compile(r'(\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2})'),   # 25/12/2023 10:15:30
+]
+APACHE, ISO, EUROPEAN = range(len(TIMESTAMP_PATTERNS))
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_abbr) if name}
+
+# Lines used to detect a log's format, and how often to check it still fits
+DETECT_LINES = 20
+RECHECK_LINES = 1024
+
+
+def _parse_match(timestamp_str):
+    """Parse a string captured by one of TIMESTAMP_PATTERNS with strptime, or raise ValueError."""
+    if timestamp_str.count('/') == 2 and timestamp_str.count(':') == 2:
+        timestamp = datetime.strptime(timestamp_str, '%d/%m/%Y %H:%M:%S')
+    elif '/' in timestamp_str and ':' in timestamp_str:
+        timestamp = datetime.strptime(timestamp_str, '%d/%b/%Y:%H:%M:%S')
+    else:
+        timestamp = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S')
+    return calendar.timegm(timestamp.timetuple())
+
+
+def extract_timestamp_with_format(line):
+    """Return (epoch seconds, pattern index) for the first recognised timestamp, or (None, None)."""
+    for index, pattern in enumerate(TIMESTAMP_PATTERNS):
+        match = pattern.search(line)
+        if match:
+            try:
+                return _parse_match(match.group(1)), index
+            except ValueError:
+                continue
+    return None, None
+
+
+def extract_timestamp(line):
+    """
+    Return the first recognised timestamp on the line as epoch seconds, or None.
+
+    Supported Timestamp Formats:
+        - [25/Dec/2023:10:15:30]   (Apache)
+        - 2023-12-25 10:15:30      (ISO)
+        - 25/12/2023 10:15:30      (European)
+    """
+    return extract_timestamp_with_format(line)[0]
+
+
+def _digits(text):
+    return text.isdigit() and text.isascii()
+
+
+def _epoch(year, month, day, hour, minute, second):
+    """Epoch seconds for a UTC wall-clock time, or None if any field is out of range."""
+    if hour > 23 or minute > 59 or second > 59:
+        return None
+    try:
+        days = date(year, month, day).toordinal() - EPOCH_ORDINAL
+    except ValueError:
+        return None
+    return days * 86400 + hour * 3600 + minute * 60 + second
+
+
+# Consecutive lines nearly always share the same whole-second timestamp, so the
+# string -> epoch conversions below are memoised.
+
+@lru_cache(maxsize=1024)
+def apache_epoch(text):
+    """'25/Dec/2023:10:15:30' -> epoch seconds, or None."""
+    if (text[2] != '/' or text[6] != '/' or text[11] != ':' or text[14] != ':' or text[17] != ':'
+            or not _digits(text[0:2] + text[7:11] + text[12:14] + text[15:17] + text[18:20])):
+        return None
+    month = MONTHS.get(text[3:6].lower())
+    if month is None:
+        return None
+    return _epoch(int(text[7:11]), month, int(text[0:2]),
+                  int(text[12:14]), int(text[15:17]), int(text[18:20]))
+
+
+@lru_cache(maxsize=1024)
+def _iso_epoch(text):
+    """'2023-12-25 10:15:30' -> epoch seconds, or None."""
+    if (text[4] != '-' or text[7] != '-' or text[10] != ' ' or text[13] != ':' or text[16] != ':'
+            or not _digits(text[0:4] + text[5:7] + text[8:10] + text[11:13] + text[14:16] + text[17:19])):
+        return None
+    return _epoch(int(text[0:4]), int(text[5:7]), int(text[8:10]),
+                  int(text[11:13]), int(text[14:16]), int(text[17:19]))
+
+
+@lru_cache(maxsize=1024)
+def _european_epoch(text):
+    """'25/12/2023 10:15:30' -> epoch seconds, or None."""
+    if (text[2] != '/' or text[5] != '/' or text[10] != ' ' or text[13] != ':' or text[16] != ':'
+            or not _digits(text[0:2] + text[3:5] + text[6:10] + text[11:13] + text[14:16] + text[17:19])):
+        return None
+    return _epoch(int(text[6:10]), int(text[3:5]), int(text[0:2]),
+                  int(text[11:13]), int(text[14:16]), int(text[17:19]))
+
+
+def _fast_apache(line):
+    # The first '[' is the leftmost place the Apache regex could match
+    start = line.find('[')
+    if start == -1 or len(line) < start + 21:
+        return None
+    return apache_epoch(line[start + 1:start + 21])
+
+
+def _fast_iso(line):
+    # Only safe at the start of the line, and only when the Apache pattern cannot match
+    if len(line) < 19 or '[' in line:
+        return None
+    return _iso_epoch(line[:19])
+
+
+def _fast_european(line):
+    # The ISO pattern needs a '-', so without one the European match at offset 0 wins
+    if len(line) < 19 or '[' in line or '-' in line:
+        return None
+    return _european_epoch(line[:19])
+
+
+FAST_PARSERS = {APACHE: _fast_apache, ISO: _fast_iso, EUROPEAN: _fast_european}
+
+
+class TimestampParser:
+    """
+    Per-log timestamp parser that detects the format once and then uses a fast path.
+
+    Results are always identical to ``extract_timestamp``: the fast path only returns a
+    value when it is certain the regex path would return the same one, and otherwise
+    falls back to it. If most lines stop matching the detected format (e.g. a file
+    that changes format part way through) the format is detected again.
+
+    Example:
+        >>> parser = TimestampParser()
+        >>> parser.parse('1.2.3.4 - - [25/Dec/2023:10:15:30 +0000] "GET / HTTP/1.1"')
+        1703499330
+    """
+
+    def __init__(self):
+        self.format = None
+        self.fast_hits = 0
+        self.fallbacks = 0
+        self._detected = Counter()
+        self._fast = None
+        self._checked_hits = 0
+        self._checked_fallbacks = 0
+
+    def parse(self, line):
+        """Return the line's timestamp as epoch seconds, or None."""
+        fast = self._fast
+        if fast is not None:
+            timestamp = fast(line)
+            if timestamp is not None:
+                self.fast_hits += 1
+                return timestamp
+            self.fallbacks += 1
+            if self.fast_hits + self.fallbacks - self._checked_hits - self._checked_fallbacks >= RECHECK_LINES:
+                self._recheck()
+            return extract_timestamp(line)
+
+        timestamp, pattern_index = extract_timestamp_with_format(line)
+        if pattern_index is not None:
+            self._detected[pattern_index] += 1
+            if sum(self._detected.values()) >= DETECT_LINES:
+                self._lock_format()
+        return timestamp
+
+    __call__ = parse
+
+    def _lock_format(self):
+        self.format = self._detected.most_common(1)[0][0]
+        self._fast = FAST_PARSERS[self.format]
+        self._detected.clear()
+        self._checked_hits = self.fast_hits
+        self._checked_fallbacks = self.fallbacks
+
+    def _recheck(self):
+        hits = self.fast_hits - self._checked_hits
+        misses = self.fallbacks - self._checked_fallbacks
+        self._checked_hits = self.fast_hits
+        self._checked_fallbacks = self.fallbacks
+        if misses > hits:
+            self.format = None
+            self._fast = None
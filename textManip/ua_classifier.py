@@ -0,0 +1,211 @@
+"""
+User agent classification with a single-pass multi-pattern matcher and an LRU cache.
+
+Every keyword the classifier cares about (category hints such as "bot" or "curl",
+browser tokens such as "chrome/", OS tokens such as "windows nt") is compiled
+into one Aho-Corasick automaton, so a user agent is scanned once no matter how
+many keywords there are. Results are cached per raw user agent string, so in a
+streaming pass the cost is paid once per distinct user agent, not per request.
+
+Example:
+    >>> classify_user_agent("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    ...                     "(KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36")
+    UAClassification(category='Web Browsers', browser='Chrome', version='137.0.0.0', os='Linux')
+"""
+import re
+from collections import defaultdict, deque, namedtuple
+from functools import lru_cache
+
+UAClassification = namedtuple("UAClassification", ["category", "browser", "version", "os"])
+
+# Checked in order; the first category with a matching keyword wins
+CATEGORY_KEYWORDS = [
+    ("Bots/Crawlers", ["bot", "crawler", "spider", "scraper"]),
+    ("Web Browsers", ["chrome", "firefox", "safari", "edge"]),
+    ("Mobile Devices", ["mobile", "android", "iphone", "ipad"]),
+    ("API/Tools", ["curl", "wget", "python", "java"]),
+    ("Mozilla-based", ["mozilla"]),
+]
+OTHER_CATEGORY = "Other"
+
+# (token, family) checked in order; the version is read right after the token
+BROWSER_TOKENS = [
+    ("edg/", "Edge"),
+    ("edge/", "Edge"),
+    ("opr/", "Opera"),
+    ("firefox/", "Firefox"),
+    ("fxios/", "Firefox"),
+    ("crios/", "Chrome"),
+    ("chrome/", "Chrome"),
+    ("safari/", "Safari"),
+    ("googlebot/", "Googlebot"),
+    ("bingbot/", "Bingbot"),
+    ("curl/", "curl"),
+    ("wget/", "Wget"),
+    ("python-requests/", "python-requests"),
+    ("java/", "Java"),
+]
+SAFARI_VERSION_TOKEN = "version/"
+
+OS_TOKENS = [
+    ("windows nt", "Windows"),
+    ("iphone", "iOS"),
+    ("ipad", "iOS"),
+    ("android", "Android"),
+    ("cros", "ChromeOS"),
+    ("mac os x", "macOS"),
+    ("linux", "Linux"),
+]
+
+VERSION_PATTERN = re.compile(r'[0-9][0-9.]*')
+DEFAULT_CACHE_SIZE = 4096
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton reporting where each keyword first ends in a text."""
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [[]]
+        for keyword in keywords:
+            self._insert(keyword)
+        self._link()
+
+    def _insert(self, keyword):
+        state = 0
+        for char in keyword:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            state = next_state
+        self.outputs[state].append(keyword)
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.outputs[next_state] = self.outputs[next_state] + self.outputs[self.fail[next_state]]
+
+    def find(self, text):
+        """Return {keyword: index just past its first occurrence} for keywords found in ``text``."""
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        found = {}
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword in outputs[state]:
+                if keyword not in found:
+                    found[keyword] = index + 1
+        return found
+
+
+class UserAgentClassifier:
+    """
+    Classifies user agents into a category, browser family/version and OS.
+
+    ``category`` uses the same rules as the original categorize_user_agents.
+    Results for the most recent ``cache_size`` distinct user agents are memoised.
+    """
+
+    def __init__(self, cache_size=DEFAULT_CACHE_SIZE):
+        keywords = {keyword for _, words in CATEGORY_KEYWORDS for keyword in words}
+        keywords.update(token for token, _ in BROWSER_TOKENS)
+        keywords.update(token for token, _ in OS_TOKENS)
+        keywords.add(SAFARI_VERSION_TOKEN)
+        self.matcher = AhoCorasick(sorted(keywords))
+        self.classify = lru_cache(maxsize=cache_size)(self._classify)
+
+    def __getstate__(self):
+        # The cache wrapper cannot be pickled; workers rebuild their own
+        return {"cache_size": self.classify.cache_parameters()["maxsize"]}
+
+    def __setstate__(self, state):
+        self.__init__(state["cache_size"])
+
+    def _classify(self, user_agent):
+        text = user_agent.lower()
+        found = self.matcher.find(text)
+
+        category = OTHER_CATEGORY
+        for name, words in CATEGORY_KEYWORDS:
+            if any(word in found for word in words):
+                category = name
+                break
+
+        browser = version = None
+        for token, family in BROWSER_TOKENS:
+            if token in found:
+                browser = family
+                end = found[SAFARI_VERSION_TOKEN] if family == "Safari" and SAFARI_VERSION_TOKEN in found else found[token]
+                match = VERSION_PATTERN.match(text, end)
+                version = match.group(0).rstrip('.') if match else None
+                break
+
+        os_name = next((name for token, name in OS_TOKENS if token in found), None)
+        return UAClassification(category, browser, version, os_name)
+
+
+_default_classifier = None
+
+
+def classify_user_agent(user_agent):
+    """Classify one user agent with a shared, cached classifier."""
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = UserAgentClassifier()
+    return _default_classifier.classify(user_agent)
+
+
+class UserAgentCategoryCounter:
+    """
+    Engine aggregator that counts requests per UA category, browser family and OS
+    while streaming, without keeping a per-UA dict.
+    """
+
+    fields = frozenset(["user_agent"])
+
+    def __init__(self, classifier=None):
+        self.classifier = classifier or UserAgentClassifier()
+        self.categories = defaultdict(int)
+        self.browsers = defaultdict(int)
+        self.operating_systems = defaultdict(int)
+
+    def add(self, record):
+        if record.user_agent is None:
+            return
+        classification = self.classifier.classify(record.user_agent)
+        self.categories[classification.category] += 1
+        self.browsers[classification.browser or "Unknown"] += 1
+        self.operating_systems[classification.os or "Unknown"] += 1
+
+    def result(self):
+        return {
+            "categories": dict(self.categories),
+            "browsers": dict(self.browsers),
+            "operating_systems": dict(self.operating_systems),
+        }
+
+    def fresh(self):
+        return UserAgentCategoryCounter(UserAgentClassifier(self.classifier.classify.cache_parameters()["maxsize"]))
+
+    def partial(self):
+        return self.result()
+
+    def merge(self, partial, line_offset=0):
+        for name, counter in (("categories", self.categories), ("browsers", self.browsers),
+                              ("operating_systems", self.operating_systems)):
+            for key, count in partial[name].items():
+                counter[key] += count
@@ -1,19 +1,31 @@
-import re
+import argparse
+import logging
+import sys
 from collections import defaultdict
 
-def analyze_user_agents(filename):
+from diagnostics import get_logger, start_background_logging
+from log_engine import DEFAULT_SKIP_SAMPLES, UserAgentCounter, run_analysis
+from reporting import ReportWriter, add_report_arguments, open_output, top_items, write_rows
+from ua_classifier import classify_user_agent
+
+def analyze_user_agents(filename, workers=1, sample_lines=DEFAULT_SKIP_SAMPLES, dump_skipped=False, logger=None):
     """
     Analyzes a web server log file to count the number of requests made by each unique user agent.
 
     This function reads a log file line by line, attempts to extract the user agent string from each line
     using several common log patterns, and counts how many times each user agent appears. User agents are
     identifiers sent by browsers, bots, or other clients to indicate what software is making the request.
-    If a user agent cannot be extracted from a line, the line is counted as skipped, and a debug message is printed.
-    At the end of processing, debug information about the total lines processed, lines with user agents, and
-    lines skipped is printed.
+    If a user agent cannot be extracted from a line, the line is counted as skipped under a reason
+    (blank line, empty user agent, no user agent field). Diagnostics are reported once, after the pass:
+    totals, skip counts by reason and the first few skipped lines.
 
     Args:
         filename (str): The path to the log file to analyze.
+        workers (int): Number of processes to parse with (default 1, None for one per CPU).
+        sample_lines (int): Number of skipped lines to show as samples.
+        dump_skipped (bool): Report every skipped line instead of just the samples.
+        logger (logging.Logger): Send diagnostics to this logger (see diagnostics.py for
+            buffered and background handlers) instead of printing them.
 
     Returns:
         dict: A dictionary where the keys are user agent strings and the values are the number of requests
@@ -30,110 +42,150 @@ def analyze_user_agents(filename):
 
     Notes:
         - This function is useful for understanding what browsers, bots, or tools are accessing your server.
-        - The function prints debug information to the console for skipped lines and summary statistics.
+        - No output happens while parsing; diagnostics are written in one batch at the end.
         - The log file should be in a standard format (such as Apache or Nginx access logs) for best results.
     """
-    user_agent_counts = defaultdict(int)
-    total_lines = 0
-    skipped_lines = 0
-    
-    # Common user agent patterns in log files
-    user_agent_patterns = [
-        r'"([^"]*)"[^"]*$',  # Last quoted string in line
-        r'" "([^"]*)"$',     # After response code, before end
-        r'"[^"]*" "([^"]*)"$',  # Standard Apache format
-        r'"[^"]*" \d+ \d+ "([^"]*)"$'  # With response size
-    ]
-    
-    with open(filename, 'r') as file:
-        for line in file:
-            total_lines += 1
-            user_agent = None
-            
-            # Try each pattern to extract user agent
-            for pattern in user_agent_patterns:
-                match = re.search(pattern, line)
-                if match:
-                    candidate = match.group(1).strip()
-                    # Validate it looks like a user agent
-                    if candidate and not candidate.isdigit() and len(candidate) > 1:
-                        user_agent = candidate
-                        break
-            
-            # If no pattern worked, try finding Mozilla or other common UA indicators
-            if not user_agent:
-                mozilla_match = re.search(r'(Mozilla[^"]*)', line)
-                if mozilla_match:
-                    user_agent = mozilla_match.group(1).strip()
-            
-            # Count the user agent or track skipped lines
-            if user_agent and user_agent != '-':
-                user_agent_counts[user_agent] += 1
-            else:
-                skipped_lines += 1
-                print(f"DEBUG: Skipped line {total_lines}: {line.strip()}")
-    
-    print(f"DEBUG: Total lines processed: {total_lines}")
-    print(f"DEBUG: Lines with user agents: {sum(user_agent_counts.values())}")
-    print(f"DEBUG: Lines skipped: {skipped_lines}")
-    
-    return dict(user_agent_counts)
-
-def categorize_user_agents(user_agent_counts):
+    counter = UserAgentCounter(sample_lines, keep_skipped=dump_skipped)
+    run_analysis(filename, [counter], workers)
+    report_skipped(counter, logger)
+    return counter.result()
+
+def report_skipped(counter, logger=None):
+    """
+    Report a UserAgentCounter's diagnostics, either printed in a single write or
+    as DEBUG records on ``logger``.
+    """
+    messages = [("Skipped line %d: %s", line_number, line) for line_number, line in counter.skipped]
+    messages.append(("Total lines processed: %d", counter.total_lines))
+    messages.append(("Lines with user agents: %d", sum(counter.counts.values())))
+    messages.append(("Lines skipped: %d", counter.skipped_count))
+    for reason, count in sorted(counter.skip_reasons.items(), key=lambda x: x[1], reverse=True):
+        messages.append(("  %s: %d", reason, count))
+    if counter.samples and not counter.keep_skipped:
+        messages.append(("First %d skipped lines:", len(counter.samples)))
+        messages.extend(("  line %d: %s", line_number, line) for line_number, line in counter.samples)
+
+    if logger is not None:
+        for message in messages:
+            logger.debug(*message)
+        return
+    sys.stdout.write("".join(f"DEBUG: {message[0] % message[1:]}\n" for message in messages))
+
+def categorize_user_agents(user_agent_counts, classifier=None):
     """
     Categorize user agents into types (browser, bot, mobile, etc.)
+
+    Categories are checked in order (bots, browsers, mobile devices, API tools,
+    Mozilla-based) and the first match wins. Classification goes through a cached
+    UserAgentClassifier, so repeated calls only scan each distinct user agent once.
     """
+    classify = classifier.classify if classifier else classify_user_agent
     categories = defaultdict(int)
-    
+
     for user_agent, count in user_agent_counts.items():
-        ua_lower = user_agent.lower()
-        
-        # Categorize based on common patterns
-        if any(bot in ua_lower for bot in ['bot', 'crawler', 'spider', 'scraper']):
-            categories['Bots/Crawlers'] += count
-        elif any(browser in ua_lower for browser in ['chrome', 'firefox', 'safari', 'edge']):
-            categories['Web Browsers'] += count
-        elif any(mobile in ua_lower for mobile in ['mobile', 'android', 'iphone', 'ipad']):
-            categories['Mobile Devices'] += count
-        elif any(tool in ua_lower for tool in ['curl', 'wget', 'python', 'java']):
-            categories['API/Tools'] += count
-        elif 'mozilla' in ua_lower:
-            categories['Mozilla-based'] += count
-        else:
-            categories['Other'] += count
-    
+        categories[classify(user_agent).category] += count
+
     return dict(categories)
 
-def display_user_agent_analysis(user_agent_counts):
-    """Display user agent analysis results"""
+def summarize_browsers(user_agent_counts, classifier=None):
+    """
+    Count requests per browser family and per operating system.
+
+    Returns:
+        tuple: (browser_counts, os_counts) dictionaries; user agents without a
+        recognised browser or OS are counted as 'Unknown'.
+    """
+    classify = classifier.classify if classifier else classify_user_agent
+    browsers = defaultdict(int)
+    operating_systems = defaultdict(int)
+
+    for user_agent, count in user_agent_counts.items():
+        classification = classify(user_agent)
+        browsers[classification.browser or 'Unknown'] += count
+        operating_systems[classification.os or 'Unknown'] += count
+
+    return dict(browsers), dict(operating_systems)
+
+def display_user_agent_analysis(user_agent_counts, top_n=None, threshold=None, fmt="text", out=None):
+    """
+    Display user agent analysis results.
+
+    ``top_n`` and ``threshold`` (a minimum request count) limit the per-agent list;
+    the category, browser and OS summaries and the totals always cover every agent.
+    With fmt "jsonl" or "csv" only the per-agent rows are written.
+    """
+    ranked = top_items(user_agent_counts, top_n, threshold)
+    if fmt != "text":
+        write_rows(ranked, ("user_agent", "requests"), fmt, out)
+        return
     if not user_agent_counts:
-        print("No user agents found in log file")
+        print("No user agents found in log file", file=out)
         return
-    
-    print("User Agent Request Analysis")
-    print("=" * 50)
-    
-    # Show all user agents
-    sorted_agents = sorted(user_agent_counts.items(), key=lambda x: x[1], reverse=True)
-    
-    print("\nAll User Agents by Request Count:")
-    print("-" * 50)
-    for i, (agent, count) in enumerate(sorted_agents, 1):
-        print(f"{i:2d}. Requests: {count}")
-        print(f"    Full User Agent: {agent}")
-        print()
-    
-    # Show categories
-    categories = categorize_user_agents(user_agent_counts)
-    print("\nUser Agent Categories:")
-    print("-" * 30)
-    for category, count in sorted(categories.items(), key=lambda x: x[1], reverse=True):
-        print(f"{category}: {count} requests")
-    
-    print(f"\nTotal unique user agents: {len(user_agent_counts)}")
-    print(f"Total requests analyzed: {sum(user_agent_counts.values())}")
+
+    with ReportWriter(out) as writer:
+        writer.line("User Agent Request Analysis")
+        writer.line("=" * 50)
+
+        if top_n is None and threshold is None:
+            writer.line("\nAll User Agents by Request Count:")
+        else:
+            writer.line(f"\nTop {len(ranked)} User Agents by Request Count:")
+        writer.line("-" * 50)
+        for i, (agent, count) in enumerate(ranked, 1):
+            writer.line(f"{i:2d}. Requests: {count}")
+            writer.line(f"    Full User Agent: {agent}")
+            writer.line()
+
+        # Show categories
+        categories = categorize_user_agents(user_agent_counts)
+        writer.line("\nUser Agent Categories:")
+        writer.line("-" * 30)
+        for category, count in top_items(categories):
+            writer.line(f"{category}: {count} requests")
+
+        browsers, operating_systems = summarize_browsers(user_agent_counts)
+        writer.line("\nBrowser Families:")
+        writer.line("-" * 30)
+        for browser, count in top_items(browsers):
+            writer.line(f"{browser}: {count} requests")
+
+        writer.line("\nOperating Systems:")
+        writer.line("-" * 30)
+        for os_name, count in top_items(operating_systems):
+            writer.line(f"{os_name}: {count} requests")
+
+        writer.line(f"\nTotal unique user agents: {len(user_agent_counts)}")
+        writer.line(f"Total requests analyzed: {sum(user_agent_counts.values())}")
 
 if __name__ == "__main__":
-    log_file = "NodeJsApp.log"  # Replace with your log file path
-    results = analyze_user_agents(log_file)
-    display_user_agent_analysis(results)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Count and categorize requests by user agent")
+    parser.add_argument("log_file", nargs="?", default="NodeJsApp.log")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="parse with this many processes (0 = one per CPU)")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SKIP_SAMPLES,
+                        help="number of skipped lines to show (default: %(default)s)")
+    parser.add_argument("--dump-skipped", action="store_true",
+                        help="show every skipped line, not just the samples")
+    parser.add_argument("--debug-log", metavar="FILE",
+                        help="write diagnostics to FILE from a background thread instead of stdout")
+    add_report_arguments(parser)
+    args = parser.parse_args()
+
+    logger = listener = None
+    if args.debug_log:
+        logger = get_logger("user_agents")
+        listener = start_background_logging(logger, logging.FileHandler(args.debug_log))
+    elif args.format != "text" and args.output is None:
+        # Keep diagnostics out of the JSON lines / CSV rows on stdout
+        logger = get_logger("user_agents")
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("DEBUG: %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.DEBUG)
+    try:
+        results = analyze_user_agents(args.log_file, args.workers or None, args.samples, args.dump_skipped, logger)
+    finally:
+        if listener is not None:
+            listener.stop()
+    with open_output(args.output) as out:
+        display_user_agent_analysis(results, args.top, args.threshold, args.format, out)
\ No newline at end of file